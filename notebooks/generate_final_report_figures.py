@@ -4,7 +4,8 @@ Consistent visual style throughout; saves PNG to outputs/final_report/.
 Run from: notebooks/ directory
 """
 
-import os, shutil
+import os, shutil, sys
+from functools import lru_cache
 import numpy as np
 import pandas as pd
 import matplotlib
@@ -52,6 +53,21 @@ plt.rcParams.update({
     'ytick.color': DARK,
 })
 
+# Panel I/O goes through src/panel_store.py (Parquet if converted, else CSV).
+# Each panel is read once and handed out as a copy to the figure functions.
+sys.path.insert(0, os.path.join(BASE, 'src'))
+from panel_store import read_panel
+
+
+@lru_cache(maxsize=None)
+def _read_merged(name):
+    return read_panel(os.path.join(DATA, name))
+
+
+def load_merged(name):
+    return _read_merged(name).copy()
+
+
 def save(fig, path):
     fig.savefig(path, dpi=DPI, bbox_inches='tight')
     plt.close(fig)
@@ -65,7 +81,7 @@ CREATED = []
 # ─────────────────────────────────────────────────────────────────────────────
 
 def fig01_summary_stats():
-    mono = pd.read_csv(os.path.join(DATA, 'panel_monadic_1992_2024.csv'))
+    mono = load_merged('panel_monadic_1992_2024.csv')
 
     vars_info = [
         ('arms_tiv_total',           'Arms TIV total'),
@@ -132,7 +148,7 @@ def fig01_summary_stats():
 
 
 def fig02_target_distribution():
-    mono = pd.read_csv(os.path.join(DATA, 'panel_monadic_1992_2024.csv'))
+    mono = load_merged('panel_monadic_1992_2024.csv')
     k = mono['journalist_killings'].dropna()
 
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 4))
@@ -426,7 +442,7 @@ def fig07_roc_curves():
 # ─────────────────────────────────────────────────────────────────────────────
 
 def fig08_econ_structural_mismatch():
-    mono = pd.read_csv(os.path.join(DATA, 'panel_monadic_1992_2024.csv'))
+    mono = load_merged('panel_monadic_1992_2024.csv')
 
     country_stats = mono.groupby('recipient_iso3').agg(
         econ_mean=('econ_neocol_score_total', 'mean'),
@@ -477,7 +493,7 @@ def fig08_econ_structural_mismatch():
 
 
 def fig09_econ_top_recipients():
-    mono = pd.read_csv(os.path.join(DATA, 'panel_monadic_1992_2024.csv'))
+    mono = load_merged('panel_monadic_1992_2024.csv')
 
     country_mean = mono.groupby('recipient_iso3')['econ_neocol_score_total'].mean()
     top25 = country_mean.nlargest(25).reset_index()
@@ -511,7 +527,7 @@ def fig09_econ_top_recipients():
 # ─────────────────────────────────────────────────────────────────────────────
 
 def figa01_corr_matrix():
-    mono = pd.read_csv(os.path.join(DATA, 'panel_monadic_1992_2024.csv'))
+    mono = load_merged('panel_monadic_1992_2024.csv')
     vars_corr = ['arms_tiv_total','oda_total','econ_neocol_score_total',
                  'colonial_tie_flag','gdp_per_capita_log','population_log',
                  'armed_conflict','journalist_killings']
@@ -552,8 +568,8 @@ def figa02_predicted_vs_actual():
     # For now, display the stored image with our style wrapper
 
     # Fallback: load nb16 NB coefficients and reconstruct rough predictions
-    mono = pd.read_csv(os.path.join(DATA, 'panel_monadic_1992_2024.csv'))
-    final = pd.read_csv(os.path.join(DATA, 'panel_final_1992_2024.csv'))
+    mono = load_merged('panel_monadic_1992_2024.csv')
+    final = load_merged('panel_final_1992_2024.csv')
 
     pos = final[final['journalist_killings'] > 0].copy()
     n_pos = len(pos)
@@ -596,7 +612,7 @@ def figa02_predicted_vs_actual():
 
 
 def figa03_econ_distribution():
-    mono = pd.read_csv(os.path.join(DATA, 'panel_monadic_1992_2024.csv'))
+    mono = load_merged('panel_monadic_1992_2024.csv')
     raw = mono['econ_neocol_score_total'].dropna()
     log_v = np.log1p(raw * 1e9)
 
@@ -656,7 +672,7 @@ def figa04_econ_decile():
 
 
 def figa05_econ_trajectories():
-    mono = pd.read_csv(os.path.join(DATA, 'panel_monadic_1992_2024.csv'))
+    mono = load_merged('panel_monadic_1992_2024.csv')
     mono['econ_log'] = np.log1p(mono['econ_neocol_score_total'].fillna(0) * 1e9)
 
     country_colors = {
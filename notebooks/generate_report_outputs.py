@@ -10,6 +10,7 @@ Outputs:
 """
 
 import os
+import sys
 import numpy as np
 import pandas as pd
 import matplotlib
@@ -31,11 +32,16 @@ OUT_LIM  = os.path.join(BASE, "outputs", "limitations")
 for d in [OUT_DM, OUT_APP, OUT_LIM]:
     os.makedirs(d, exist_ok=True)
 
+# Panel I/O goes through src/panel_store.py (Parquet if converted, else CSV)
+sys.path.insert(0, os.path.join(BASE, "src"))
+from panel_store import read_panel
+
 # ---------------------------------------------------------------------------
 # Load data
 # ---------------------------------------------------------------------------
-mono = pd.read_csv(MONO)
-dyad = pd.read_csv(DYAD)
+mono = read_panel(MONO)
+# Only the missingness / share checks in section 5 use the dyadic panel
+dyad = read_panel(DYAD, columns=["econ_neocol_score", "bilateral_oda", "colonial_tie"])
 
 print(f"Monadic panel: {mono.shape}")
 print(f"Dyadic panel:  {dyad.shape}")
@@ -0,0 +1,76 @@
+# bench_country_import.py
+# Import-time benchmark for country_utils_extended
+#
+# Spawns fresh interpreters (like a worker process would) and measures:
+#   - time to import country_utils_extended
+#   - time for the first get_iso3 call (loads the shipped country_index.pkl)
+#   - whether pandas / pycountry were pulled in along the way
+#
+# USAGE: Run from project root directory:
+#   python src/benchmarks/bench_country_import.py [n_runs]
+#
+# Exits with status 1 if the median startup exceeds STARTUP_BUDGET_MS.
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Import + first lookup must stay under this (median over runs)
+STARTUP_BUDGET_MS = 50
+
+PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import country_utils_extended as cue
+t1 = time.perf_counter()
+codes = [cue.get_iso3(n) for n in ["France", "Congo - Kinshasa", "Government of Iran", "Kosovo"]]
+t2 = time.perf_counter()
+print(json.dumps({
+    "import_ms": (t1 - t0) * 1000,
+    "first_lookup_ms": (t2 - t1) * 1000,
+    "codes": codes,
+    "pandas_loaded": "pandas" in sys.modules,
+    "pycountry_loaded": "pycountry" in sys.modules,
+}))
+"""
+
+
+def run_once():
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=SRC_DIR, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout)
+
+
+def main(n_runs=10):
+    runs = [run_once() for _ in range(n_runs)]
+
+    import_ms = statistics.median(r["import_ms"] for r in runs)
+    lookup_ms = statistics.median(r["first_lookup_ms"] for r in runs)
+    total_ms = import_ms + lookup_ms
+
+    print("=" * 60)
+    print(f"country_utils_extended startup ({n_runs} fresh interpreters)")
+    print("=" * 60)
+    print(f"Import (median):        {import_ms:8.2f} ms")
+    print(f"First lookup (median):  {lookup_ms:8.2f} ms")
+    print(f"Total:                  {total_ms:8.2f} ms  (budget {STARTUP_BUDGET_MS} ms)")
+    print(f"Sample codes:           {runs[0]['codes']}")
+    print(f"pandas imported:        {runs[0]['pandas_loaded']}")
+    print(f"pycountry imported:     {runs[0]['pycountry_loaded']}")
+
+    if total_ms > STARTUP_BUDGET_MS:
+        print("\n✗ Startup budget exceeded")
+        return 1
+    print("\n✓ Within startup budget")
+    return 0
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    sys.exit(main(n))
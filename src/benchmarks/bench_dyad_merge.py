@@ -0,0 +1,159 @@
+# bench_dyad_merge.py
+# Benchmark: DataFrame.merge chain vs int64 DyadIndex for the dyadic panel
+#
+# Builds synthetic aggregated inputs shaped like merge_datasets.py's (SIPRI,
+# DAC2 and debt sender-recipient-year aggregates, COLDAT pairs, CPJ
+# country-years), then times:
+#   - merge chain: concat + drop_duplicates + year filter + 5 DataFrame.merge
+#     calls on the ISO3 keys (merge_datasets.py before dyad_index.py)
+#   - dyad index:  DyadIndex union + hash-lookup alignment on int64 keys
+# and checks that both produce the same panel. Both are run on inputs with
+# plain string ISO3 keys and on inputs already in the compact schema (shared
+# categorical ISO3, as merge_datasets.py has them since panel_store.py).
+#
+# USAGE: Run from project root directory:
+#   python src/benchmarks/bench_dyad_merge.py [scale] [n_runs]
+#
+# scale multiplies the number of dyads per dataset (1 ~ the real inputs).
+
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from country_codes import country_codes
+from dyad_index import DyadIndex
+from panel_store import apply_schema
+
+YEAR_MIN = 1992
+YEAR_MAX = 2024
+KEYS = ['sender_iso3', 'recipient_iso3', 'year']
+
+# Approximate sizes of the real aggregated inputs (rows at scale 1)
+BASE_ROWS = {'arms_tiv': 20000, 'bilateral_oda': 100000, 'bilateral_debt': 20000}
+
+
+def make_inputs(scale, seed=0):
+    rng = np.random.default_rng(seed)
+    countries = np.array(country_codes()[:250], dtype=object)
+    aggs = {}
+    for col, rows in BASE_ROWS.items():
+        n = int(rows * scale)
+        df = pd.DataFrame({
+            'sender_iso3': rng.choice(countries, n),
+            'recipient_iso3': rng.choice(countries, n),
+            'year': rng.integers(1980, 2026, n),
+            col: rng.lognormal(size=n),
+        })
+        aggs[col] = df.drop_duplicates(KEYS).reset_index(drop=True)
+
+    coldat = pd.DataFrame({
+        'colony_iso3': rng.choice(countries, 300),
+        'colonizer_iso3': rng.choice(countries[:20], 300),
+    })
+    cpj = pd.MultiIndex.from_product([countries, range(YEAR_MIN, YEAR_MAX + 1)],
+                                     names=['iso3', 'year']).to_frame(index=False)
+    cpj['journalist_killings'] = rng.poisson(0.5, len(cpj)).astype(float)
+    return aggs, coldat, cpj
+
+
+def merge_chain(aggs, coldat, cpj):
+    sipri_agg, dac2_agg, debt_agg = aggs['arms_tiv'], aggs['bilateral_oda'], aggs['bilateral_debt']
+    all_dyads = pd.concat([sipri_agg[KEYS], dac2_agg[KEYS], debt_agg[KEYS]])
+    panel = all_dyads.drop_duplicates().copy()
+    panel = panel[(panel['year'] >= YEAR_MIN) & (panel['year'] <= YEAR_MAX)]
+
+    panel = panel.merge(sipri_agg, on=KEYS, how='left')
+    panel = panel.merge(dac2_agg, on=KEYS, how='left')
+    panel = panel.merge(debt_agg, on=KEYS, how='left')
+    panel['arms_tiv'] = panel['arms_tiv'].fillna(0)
+
+    coldat_binary = coldat[['colony_iso3', 'colonizer_iso3']].drop_duplicates()
+    coldat_binary['colonial_tie'] = 1
+    coldat_binary.columns = ['recipient_iso3', 'sender_iso3', 'colonial_tie']
+    panel = panel.merge(coldat_binary, on=['sender_iso3', 'recipient_iso3'], how='left')
+    panel['colonial_tie'] = panel['colonial_tie'].fillna(0).astype(int)
+
+    cpj_subset = cpj[['iso3', 'year', 'journalist_killings']].copy()
+    cpj_subset.columns = ['recipient_iso3', 'year', 'journalist_killings']
+    panel = panel.merge(cpj_subset, on=['recipient_iso3', 'year'], how='left')
+    panel['journalist_killings'] = panel['journalist_killings'].fillna(0)
+    return panel
+
+
+def dyad_index(aggs, coldat, cpj):
+    dyads = DyadIndex.from_frames(aggs.values()).between_years(YEAR_MIN, YEAR_MAX)
+    panel = dyads.to_frame()
+    for col, agg in aggs.items():
+        panel[col] = dyads.align(agg, col)
+    panel['arms_tiv'] = panel['arms_tiv'].fillna(0)
+    panel['colonial_tie'] = dyads.has_pair(coldat['colonizer_iso3'], coldat['colony_iso3'])
+    panel['journalist_killings'] = dyads.align_recipient_year(
+        cpj['iso3'], cpj['year'], cpj['journalist_killings'])
+    panel['journalist_killings'] = panel['journalist_killings'].fillna(0)
+    return panel
+
+
+def timed(fn, inputs, n_runs):
+    times = []
+    for _ in range(n_runs):
+        t0 = time.perf_counter()
+        result = fn(*inputs)
+        times.append(time.perf_counter() - t0)
+    return result, statistics.median(times)
+
+
+def same_panel(a, b):
+    return (len(a) == len(b)
+            and all((a[c].astype(str).to_numpy() == b[c].astype(str).to_numpy()).all()
+                    for c in ['sender_iso3', 'recipient_iso3'])
+            and np.array_equal(a['year'].to_numpy(), b['year'].to_numpy())
+            and all(np.allclose(a[c], b[c], equal_nan=True)
+                    for c in ['arms_tiv', 'bilateral_oda', 'bilateral_debt',
+                              'colonial_tie', 'journalist_killings']))
+
+
+def compact_inputs(aggs, coldat, cpj):
+    """Inputs with ISO3 keys as shared categoricals, as in merge_datasets.py"""
+    compact = {col: apply_schema(agg, schema={}, float_dtype=None) for col, agg in aggs.items()}
+    return (compact, apply_schema(coldat, schema={}, float_dtype=None),
+            apply_schema(cpj, schema={}, float_dtype=None))
+
+
+def main(scale=1.0, n_runs=5):
+    inputs = make_inputs(scale)
+    compact = compact_inputs(*inputs)
+
+    print("=" * 60)
+    print(f"Dyadic panel build (scale {scale}, median of {n_runs} runs)")
+    print("=" * 60)
+
+    reference = None
+    ok = True
+    for keys, data in (('string keys', inputs), ('categorical keys', compact)):
+        chain, chain_s = timed(merge_chain, data, n_runs)
+        index, index_s = timed(dyad_index, data, n_runs)
+        reference = chain if reference is None else reference
+        same = same_panel(reference, chain) and same_panel(reference, index)
+        ok = ok and same
+
+        print(f"\nInputs with {keys}:")
+        print(f"  Merge chain:          {chain_s * 1000:8.1f} ms  "
+              f"({chain.memory_usage(deep=True).sum() / 1e6:.1f} MB)")
+        print(f"  Dyad index:           {index_s * 1000:8.1f} ms  "
+              f"({index.memory_usage(deep=True).sum() / 1e6:.1f} MB)")
+        print(f"  Speedup:              {chain_s / index_s:8.1f}x")
+        print(f"  Identical panels:     {same}")
+
+    print(f"\nPanel rows:             {len(reference):,}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    scale = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    sys.exit(main(scale, n))
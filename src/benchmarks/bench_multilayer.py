@@ -0,0 +1,100 @@
+# bench_multilayer.py
+# Benchmark: multiplex (supra-adjacency) centrality over 1992-2024
+#
+# On a synthetic dyadic panel (see bench_network_parallel.py) times:
+#   - batched:  network_multilayer.compute_multilayer_measures on one
+#               MultiplexGraph (all 33 supra-adjacency matrices iterated
+#               together)
+#   - per year: the same function on a MultiplexGraph of one year at a time
+#   - networkx: a supra DiGraph per year ((layer, country) replica nodes,
+#               intra-layer + coupling edges) and nx.pagerank
+# and checks that the multiplex PageRank versatility agrees across all three.
+#
+# USAGE: Run from project root directory:
+#   python src/benchmarks/bench_multilayer.py [scale] [n_runs]
+
+import os
+import statistics
+import sys
+import time
+import warnings
+
+import networkx as nx
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_network_parallel import make_panel
+from multiplex import MultiplexGraph
+from network_multilayer import OMEGA, compute_multilayer_measures
+
+
+def batched(df):
+    return compute_multilayer_measures(MultiplexGraph.from_panel(df))
+
+
+def per_year(df):
+    return [compute_multilayer_measures(MultiplexGraph.from_panel(df[df['year'] == year]))
+            for year in sorted(df['year'].unique())]
+
+
+def networkx_pagerank(graph):
+    """Multiplex PageRank versatility per year with networkx, in graph row order"""
+    out = []
+    for year in graph.years:
+        nodes = graph.nodes(year)
+        supra = nx.DiGraph()
+        supra.add_nodes_from((layer, c) for layer in graph.layers for c in nodes)
+        for layer in graph.layers:
+            edges = graph.edges(year, layer)
+            top = edges['weight'].max() if len(edges) else 1.0
+            supra.add_weighted_edges_from(((layer, s), (layer, r), w / top)
+                                          for s, r, w in edges.itertuples(index=False))
+            for other in graph.layers:
+                if other != layer:
+                    supra.add_weighted_edges_from(((layer, c), (other, c), OMEGA) for c in nodes)
+        pr = nx.pagerank(supra)
+        out.append([sum(pr[(layer, c)] for layer in graph.layers) for c in nodes])
+    return np.concatenate(out)
+
+
+def timed(fn, arg, n_runs):
+    times = []
+    for _ in range(n_runs):
+        t0 = time.perf_counter()
+        result = fn(arg)
+        times.append(time.perf_counter() - t0)
+    return result, statistics.median(times)
+
+
+def main(scale=1.0, n_runs=3):
+    df = make_panel(scale)
+    graph = MultiplexGraph.from_panel(df)
+
+    print("=" * 60)
+    print(f"Multiplex centrality, {df['year'].min()}-{df['year'].max()} "
+          f"({len(df):,} dyad-years, scale {scale}, median of {n_runs} runs)")
+    print("=" * 60)
+
+    result, batched_s = timed(batched, df, n_runs)
+    years, per_year_s = timed(per_year, df, n_runs)
+    nx_scores, nx_s = timed(networkx_pagerank, graph, 1)
+
+    per_year_scores = np.concatenate([y['multiplex_pagerank'].to_numpy() for y in years])
+    diff_year = np.abs(per_year_scores - result['multiplex_pagerank'].to_numpy()).max()
+    diff_nx = np.abs(nx_scores - result['multiplex_pagerank'].to_numpy()).max()
+    ok = diff_year < 1e-12 and diff_nx < 1e-6
+
+    print(f"  Batched (all years):  {batched_s * 1000:8.1f} ms")
+    print(f"  Per-year loop:        {per_year_s * 1000:8.1f} ms  ({per_year_s / batched_s:.1f}x slower)")
+    print(f"  networkx PageRank:    {nx_s * 1000:8.1f} ms  ({nx_s / batched_s:.1f}x slower, PageRank only)")
+    print(f"  Max |diff| per-year:  {diff_year:.2e}")
+    print(f"  Max |diff| networkx:  {diff_nx:.2e}")
+    print(f"\nSupra nodes (replicas): {graph.n:,} over {len(graph.years)} years")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    warnings.simplefilter('ignore', RuntimeWarning)
+    scale = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    sys.exit(main(scale, n))
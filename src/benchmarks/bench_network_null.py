@@ -0,0 +1,138 @@
+# bench_network_null.py
+# Benchmark: null-model replicates of every year x layer graph
+#
+# On a synthetic dyadic panel (see bench_network_parallel.py) times:
+#   - batched:  network_null.null_model_test (configuration model + repair,
+#               replicates stacked into block-diagonal batches) per replicate,
+#               and the projected time for 1,000 replicates
+#   - networkx: one replicate as nx.directed_edge_swap (one swap per edge) +
+#               nx.pagerank on every graph
+# and checks that the replicates are valid (in/out degrees kept, no
+# self-loops or repeated edges, out-strength kept by the degree model,
+# in-strength by the strength model, out-strength too on the graphs it
+# reports as strength preserving) and that the result does not depend on the
+# number of processes.
+#
+# USAGE: Run from project root directory:
+#   python src/benchmarks/bench_network_null.py [scale] [n_replicates]
+
+import os
+import sys
+import time
+import warnings
+
+import networkx as nx
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_network_parallel import make_panel
+from multiplex import MultiplexGraph
+from network_engine import MEASURES
+from network_null import STRENGTH_TOL, _measures, graph_edges, null_model_test, randomize
+
+
+def check_replicates(graph, model, n_replicates=4, seed=0):
+    """Degree / strength / simplicity checks on one stacked set of replicates"""
+    edges = graph_edges(graph)
+    node_graph = np.repeat(np.arange(len(graph)), graph.sizes)
+    observed, _ = _measures(*edges[:3], node_graph, graph.sizes)
+    s, d, w, dropped, error = randomize(edges, graph.n, len(graph), observed, model,
+                                        n_replicates, np.random.default_rng(seed))
+    size = graph.n * n_replicates
+
+    def tiled(values):
+        return np.tile(values, n_replicates)
+
+    keep = ~dropped
+    keys = s[keep] * size + d[keep]
+    checks = {
+        'in/out degree': (np.array_equal(np.bincount(s, minlength=size), tiled(np.bincount(edges[0], minlength=graph.n)))
+                          and np.array_equal(np.bincount(d, minlength=size), tiled(np.bincount(edges[1], minlength=graph.n)))),
+        'simple graphs': len(np.unique(keys)) == len(keys) and not (s[keep] == d[keep]).any(),
+    }
+    kept_out = np.bincount(s, weights=w, minlength=size)
+    kept_in = np.bincount(d, weights=w, minlength=size)
+    lost_out = np.bincount(s[dropped], minlength=size) > 0
+    lost_in = np.bincount(d[dropped], minlength=size) > 0
+    if model == 'degree':
+        target = tiled(observed[MEASURES.index('out_strength')])
+        checks['out-strength'] = np.allclose(kept_out[~lost_out], target[~lost_out])
+        preserved = 0.0
+    else:
+        target = tiled(observed[MEASURES.index('in_strength')])
+        checks['in-strength'] = np.allclose(kept_in[~lost_in], target[~lost_in])
+        # Out-strength must hold wherever the RAS residual says it does
+        stacked_graph = tiled(node_graph) + np.repeat(np.arange(n_replicates), graph.n) * len(graph)
+        residual = np.zeros(len(graph) * n_replicates)
+        np.maximum.at(residual, stacked_graph, error)
+        ok = (residual <= STRENGTH_TOL)[stacked_graph] & ~lost_out
+        target = tiled(observed[MEASURES.index('out_strength')])
+        checks['out-strength'] = np.allclose(kept_out[ok], target[ok], rtol=STRENGTH_TOL, atol=0.0)
+        preserved = (residual <= STRENGTH_TOL).mean()
+    return checks, dropped.mean(), error.max(initial=0.0), preserved
+
+
+def networkx_replicate(graph, seed=0):
+    """One degree-preserving replicate of every graph with networkx, plus PageRank"""
+    scores = []
+    for g in range(len(graph)):
+        coo = graph.graph(g).tocoo()
+        nx_graph = nx.DiGraph()
+        nx_graph.add_nodes_from(range(graph.sizes[g]))
+        nx_graph.add_weighted_edges_from(zip(coo.row.tolist(), coo.col.tolist(), coo.data.tolist()))
+        if nx_graph.number_of_edges() >= 4:
+            try:
+                nx.directed_edge_swap(nx_graph, nswap=nx_graph.number_of_edges(),
+                                      max_tries=100 * nx_graph.number_of_edges(), seed=seed)
+            except nx.NetworkXAlgorithmError:
+                pass
+        scores.append(nx.pagerank(nx_graph))
+    return scores
+
+
+def main(scale=1.0, n_replicates=16):
+    df = make_panel(scale)
+    graph = MultiplexGraph.from_panel(df)
+
+    print("=" * 60)
+    print(f"Null models, {df['year'].min()}-{df['year'].max()} "
+          f"({len(df):,} dyad-years, {graph.adjacency.nnz:,} edges, scale {scale}, "
+          f"{n_replicates} replicates)")
+    print("=" * 60)
+
+    ok = True
+    per_replicate = {}
+    for model in ('degree', 'strength'):
+        t0 = time.perf_counter()
+        nodes, graphs, _ = null_model_test(graph, model, n_replicates=n_replicates, processes=1)
+        per_replicate[model] = (time.perf_counter() - t0) / n_replicates
+        checks, dropped, error, preserved = check_replicates(graph, model)
+        ok &= all(checks.values())
+        print(f"  {model:8s}  {per_replicate[model] * 1000:8.1f} ms / replicate  "
+              f"(1,000 replicates ~ {per_replicate[model] * 1000 / 60:.1f} min on one core)")
+        print(f"            checks: " + ", ".join(f"{k} {'ok' if v else 'FAILED'}" for k, v in checks.items()))
+        print(f"            dropped edges {dropped:.3%}, max RAS residual {error:.2e}")
+        if model == 'strength':
+            print(f"            strength preserved in {preserved:.1%} of replicate graphs")
+
+    t0 = time.perf_counter()
+    networkx_replicate(graph)
+    nx_s = time.perf_counter() - t0
+    print(f"  networkx  {nx_s * 1000:8.1f} ms / replicate  ({nx_s / per_replicate['degree']:.0f}x slower "
+          f"than degree, swaps + PageRank only)")
+
+    serial = null_model_test(graph, 'degree', n_replicates=8, processes=1)
+    pooled = null_model_test(graph, 'degree', n_replicates=8, processes=2)
+    same = all(a.equals(b) for a, b in zip(serial, pooled))
+    ok &= same
+    print(f"\n1 vs 2 processes identical: {same}   (cores available: {os.cpu_count()})")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    warnings.simplefilter('ignore', RuntimeWarning)
+    # Graphs RAS cannot fit are reported by the checks above, not one warning each
+    warnings.filterwarnings('ignore', message='.*strength_preserved=False')
+    scale = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    sys.exit(main(scale, n))
@@ -0,0 +1,93 @@
+# bench_network_parallel.py
+# Benchmark: network measures serial vs over a process pool
+#
+# Builds a synthetic dyadic panel shaped like the real one (~200 countries,
+# 33 years, four layers), then times network_engine.compute_network_measures
+# (all years as one batch, one process) against
+# network_parallel.compute_network_measures_parallel for 2, 4, ... processes
+# up to the number of cores, and checks that every run gives the same frame.
+#
+# USAGE: Run from project root directory:
+#   python src/benchmarks/bench_network_parallel.py [scale] [n_runs]
+#
+# scale multiplies the number of dyads per year (1 ~ the real panel).
+
+import os
+import statistics
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from country_codes import country_codes
+from network_engine import build_edge_list, compute_network_measures
+from network_parallel import compute_network_measures_parallel
+
+YEARS = range(1992, 2025)
+DYADS_PER_YEAR = 3500
+
+
+def make_panel(scale, seed=0):
+    rng = np.random.default_rng(seed)
+    countries = np.array(country_codes()[:200], dtype=object)
+    frames = []
+    for year in YEARS:
+        n = int(DYADS_PER_YEAR * scale)
+        pairs = pd.DataFrame({
+            'sender_iso3': rng.choice(countries[:60], n),
+            'recipient_iso3': rng.choice(countries, n),
+        }).drop_duplicates()
+        pairs = pairs[pairs['sender_iso3'] != pairs['recipient_iso3']]
+        k = len(pairs)
+        frames.append(pairs.assign(
+            year=year,
+            arms_tiv=np.where(rng.random(k) < 0.1, rng.lognormal(2, 1, k), 0.0),
+            bilateral_oda=np.where(rng.random(k) < 0.6, rng.lognormal(1, 2, k), np.nan),
+            econ_neocol_score_log=np.where(rng.random(k) < 0.5, rng.random(k), np.nan),
+            colonial_tie=(rng.random(k) < 0.02).astype(int),
+        ))
+    return pd.concat(frames, ignore_index=True)
+
+
+def timed(fn, n_runs):
+    times = []
+    for _ in range(n_runs):
+        t0 = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t0)
+    return result, statistics.median(times)
+
+
+def main(scale=1.0, n_runs=3):
+    edge_list = build_edge_list(make_panel(scale))
+    cores = os.cpu_count() or 1
+
+    print("=" * 60)
+    print(f"Network measures, {len(edge_list):,} edge rows (scale {scale}, median of {n_runs} runs)")
+    print("=" * 60)
+
+    reference, serial_s = timed(lambda: compute_network_measures(edge_list), n_runs)
+    print(f"  Serial batch:         {serial_s * 1000:8.1f} ms")
+
+    ok = True
+    processes = 2
+    while processes <= max(cores, 2):
+        result, s = timed(lambda: compute_network_measures_parallel(edge_list, processes=processes), n_runs)
+        same = result.equals(reference)
+        ok = ok and same
+        print(f"  {processes:2d} processes:         {s * 1000:8.1f} ms  "
+              f"(speedup {serial_s / s:4.1f}x, identical: {same})")
+        processes *= 2
+
+    print(f"\nCores available:        {cores}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    warnings.simplefilter('ignore', RuntimeWarning)
+    scale = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    sys.exit(main(scale, n))
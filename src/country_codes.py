@@ -0,0 +1,96 @@
+# country_codes.py
+# Global country code table shared by every panel and dataset
+#
+# Each ISO3 code gets one small integer code, and all ISO3 columns are stored
+# as pandas categoricals over the same category list (country_dtype()). Because
+# the categories are identical everywhere, merges and groupbys on ISO3 columns
+# run on the integer codes instead of on Python strings, and code k means the
+# same country in every frame.
+#
+# The table starts from every ISO3 code the CountryIndex can produce (sorted).
+# Codes that appear in the data but not in the index (e.g. historical or
+# aggregate codes) are appended at the end the first time they are seen, so
+# existing codes never change within a run.
+
+import numpy as np
+import pandas as pd
+
+from country_utils_extended import get_country_index
+
+_codes = None
+_positions = None
+_dtype = None
+
+
+def _base_codes():
+    """Every ISO3 code the CountryIndex can resolve to, sorted"""
+    index = get_country_index()
+    codes = set(index.names.values())
+    codes.update(index.special.values())
+    codes.update(index.aliases.values())
+    codes.discard(None)
+    return sorted(codes)
+
+
+def _init():
+    global _codes, _positions, _dtype
+    if _codes is None:
+        _codes = _base_codes()
+        _positions = {code: i for i, code in enumerate(_codes)}
+        _dtype = pd.CategoricalDtype(_codes)
+
+
+def country_codes():
+    """Current code table (position = integer code)"""
+    _init()
+    return list(_codes)
+
+
+def register(values):
+    """Append any unseen ISO3 codes in values to the table; returns the number added"""
+    global _dtype
+    _init()
+    new = sorted({v for v in pd.unique(pd.Series(values, dtype=object).dropna())
+                  if v not in _positions})
+    for code in new:
+        _positions[code] = len(_codes)
+        _codes.append(code)
+    if new:
+        _dtype = pd.CategoricalDtype(_codes)
+    return len(new)
+
+
+def country_dtype():
+    """The shared CategoricalDtype for ISO3 columns"""
+    _init()
+    return _dtype
+
+
+def as_country(values):
+    """ISO3 values as a categorical over the shared table (unseen codes registered)"""
+    values = pd.Series(values)
+    if isinstance(values.dtype, pd.CategoricalDtype) and values.dtype == country_dtype():
+        return values
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Recode via the categories only (no per-row string work)
+        register(values.cat.categories)
+        return values.cat.set_categories(country_codes()).astype(country_dtype())
+    # Factorize once, then map the (few) uniques to table positions
+    codes, uniques = pd.factorize(values)
+    register(uniques)
+    positions = np.array([_positions[u] for u in uniques] + [-1], dtype=np.int32)
+    categorical = pd.Categorical.from_codes(positions[codes], dtype=country_dtype())
+    return pd.Series(categorical, index=values.index, name=values.name)
+
+
+def encode(values):
+    """ISO3 values -> int16 codes (-1 for missing)"""
+    return as_country(values).cat.codes.to_numpy().astype(np.int16)
+
+
+def decode(codes):
+    """int codes -> ISO3 strings (None for -1)"""
+    _init()
+    table = np.array(_codes + [None], dtype=object)
+    codes = np.asarray(codes)
+    return table[np.where(codes < 0, len(_codes), codes)]
@@ -0,0 +1,234 @@
+# Batch fuzzy matching for country names that get_iso3 cannot resolve
+#
+# Workflow (e.g. in a preprocessing notebook):
+#   matcher = FuzzyMatcher(candidates_path=..., aliases_path=...)
+#   check_coverage(df, 'iso3', 'country', 'My dataset', matcher=matcher)
+#   matcher.accept("Afghanistan, Islamic Rep. of", "AFG")   # or accept_above(0.9)
+#   resolver = ISO3Resolver(aliases=matcher.aliases.aliases)
+#
+# Every unmatched unique name is scored against the names in the CountryIndex
+# in one vectorized pass (character-trigram cosine via a sparse matrix
+# product), then the best few choices are re-ranked with token-set overlap
+# and edit-distance similarity. Scored names are cached on disk, so on the
+# next ingest only strings that have never been seen before are scored.
+
+import os
+import re
+import unicodedata
+from difflib import SequenceMatcher
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from country_utils_extended import _normalize_name, alias_table_key, get_country_index
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+# Ranked candidates kept per unmatched name
+TOP_K = 3
+
+# Trigram shortlist size re-ranked with the (slower) token / edit scores
+SHORTLIST = 15
+
+CANDIDATE_COLUMNS = ['name', 'rank', 'iso3', 'candidate', 'score',
+                     'trigram_score', 'token_score', 'edit_score', 'table_key']
+
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+# Bump when the normalization or scoring changes: cached candidates carry
+# this with the alias table key and are rescored when it differs
+SCORING_VERSION = 2
+
+
+# =============================================================================
+# TEXT NORMALIZATION
+# =============================================================================
+
+def _simplify(name):
+    """Fold accents, lowercase, strip punctuation and collapse whitespace"""
+    decomposed = unicodedata.normalize('NFKD', _normalize_name(name))
+    folded = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _NON_ALNUM.sub(' ', folded.lower()).strip()
+
+
+def candidates_key():
+    """Cache key of scored candidates: alias table key plus SCORING_VERSION"""
+    return f"{alias_table_key()}-s{SCORING_VERSION}"
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def _token_score(a, b):
+    """Share of the smaller token set found in the other (token-set ratio)"""
+    ta, tb = set(a.split()), set(b.split())
+    if not ta or not tb:
+        return 0.0
+    return len(ta & tb) / min(len(ta), len(tb))
+
+
+# =============================================================================
+# ALIAS STORE
+# =============================================================================
+
+class AliasStore:
+    """Persistent table of accepted name -> ISO3 decisions"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.aliases = {}
+        if path is not None and os.path.exists(path):
+            table = pd.read_csv(path, dtype=str, keep_default_na=False)
+            self.aliases.update(zip(table['name'], table['iso3']))
+
+    def __contains__(self, name):
+        return name in self.aliases
+
+    def __len__(self):
+        return len(self.aliases)
+
+    def add(self, name, iso3):
+        self.aliases[str(name)] = iso3
+
+    def save(self):
+        if self.path is None:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        table = pd.DataFrame(sorted(self.aliases.items()), columns=['name', 'iso3'])
+        table.to_csv(self.path, index=False)
+
+
+# =============================================================================
+# FUZZY MATCHER
+# =============================================================================
+
+class FuzzyMatcher:
+    """Propose ranked ISO3 candidates for unmatched names, with a persistent cache"""
+
+    def __init__(self, index=None, candidates_path=None, aliases_path=None, top_k=TOP_K):
+        self.index = index if index is not None else get_country_index()
+        self.candidates_path = candidates_path
+        self.top_k = top_k
+        self.aliases = AliasStore(aliases_path)
+
+        self.candidates = pd.DataFrame(columns=CANDIDATE_COLUMNS)
+        if candidates_path is not None and os.path.exists(candidates_path):
+            cached = pd.read_csv(candidates_path, keep_default_na=False,
+                                 dtype={'name': str, 'iso3': str, 'candidate': str, 'table_key': str})
+            # Candidates scored against an older alias table or scoring are rescored
+            if 'table_key' in cached.columns:
+                self.candidates = cached[cached['table_key'] == candidates_key()].reset_index(drop=True)
+
+        self._build_choices()
+
+    def _build_choices(self):
+        """Collect matchable names (not 2/3-letter or numeric codes) and their trigram matrix"""
+        choices = {}
+        for name, iso3 in self.index.names.items():
+            if len(name) > 3 and not name.isdigit():
+                choices.setdefault(_simplify(name), iso3)
+        for name, iso3 in self.index.aliases.items():
+            if iso3 is not None and len(name) > 3:
+                choices.setdefault(_simplify(name), iso3)
+        choices.pop('', None)
+
+        self.choice_names = list(choices)
+        self.choice_iso3 = np.array(list(choices.values()), dtype=object)
+        self._vocab = {}
+        self._choice_matrix = self._vectorize(self.choice_names, grow=True)
+
+    def _vectorize(self, texts, grow=False):
+        """L2-normalized trigram count matrix (rows = texts)"""
+        rows, cols = [], []
+        for i, text in enumerate(texts):
+            for gram in _trigrams(text):
+                j = self._vocab.get(gram)
+                if j is None:
+                    if not grow:
+                        continue
+                    j = self._vocab[gram] = len(self._vocab)
+                rows.append(i)
+                cols.append(j)
+        data = np.ones(len(rows), dtype=np.float64)
+        matrix = sparse.csr_matrix((data, (rows, cols)), shape=(len(texts), len(self._vocab)))
+        matrix.sum_duplicates()
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        return sparse.diags(1.0 / norms) @ matrix
+
+    def score(self, names):
+        """Score names against the index; returns the ranked candidate table"""
+        names = [str(n) for n in names]
+        if not names:
+            return pd.DataFrame(columns=CANDIDATE_COLUMNS)
+
+        table_key = candidates_key()
+        simple = [_simplify(n) for n in names]
+        similarity = (self._vectorize(simple) @ self._choice_matrix.T).toarray()
+
+        k = min(SHORTLIST, similarity.shape[1])
+        shortlist = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+
+        records = []
+        for i, name in enumerate(names):
+            best = {}
+            for j in shortlist[i]:
+                choice = self.choice_names[j]
+                trigram = similarity[i, j]
+                token = _token_score(simple[i], choice)
+                edit = SequenceMatcher(None, simple[i], choice).ratio()
+                total = (trigram + token + edit) / 3
+                iso3 = self.choice_iso3[j]
+                # Several spellings map to one country; keep its best-scoring one
+                if iso3 not in best or total > best[iso3][0]:
+                    best[iso3] = (total, choice, trigram, token, edit)
+
+            ranked = sorted(best.items(), key=lambda item: -item[1][0])[:self.top_k]
+            for rank, (iso3, (total, choice, trigram, token, edit)) in enumerate(ranked, start=1):
+                records.append((name, rank, iso3, choice, round(total, 4),
+                                round(trigram, 4), round(token, 4), round(edit, 4), table_key))
+
+        return pd.DataFrame.from_records(records, columns=CANDIDATE_COLUMNS)
+
+    def propose(self, names):
+        """Ranked candidates for names; only never-seen names are scored"""
+        names = pd.unique(pd.Series([str(n) for n in names], dtype=object))
+        seen = set(self.candidates['name'])
+        new = [n for n in names if n not in seen and n not in self.aliases]
+
+        if new:
+            scored = self.score(new)
+            if len(self.candidates):
+                self.candidates = pd.concat([self.candidates, scored], ignore_index=True)
+            else:
+                self.candidates = scored
+            self.save()
+
+        return self.candidates[self.candidates['name'].isin(names)].reset_index(drop=True)
+
+    def accept(self, name, iso3):
+        """Record a manual decision for name (persisted to the alias store)"""
+        self.aliases.add(name, iso3)
+        self.aliases.save()
+
+    def accept_above(self, threshold, names=None):
+        """Accept every rank-1 candidate scoring at least threshold"""
+        best = self.candidates[self.candidates['rank'] == 1]
+        if names is not None:
+            best = best[best['name'].isin([str(n) for n in names])]
+        best = best[best['score'] >= threshold]
+        for name, iso3 in zip(best['name'], best['iso3']):
+            self.aliases.add(name, iso3)
+        self.aliases.save()
+        return best
+
+    def save(self):
+        if self.candidates_path is None:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.candidates_path)), exist_ok=True)
+        self.candidates.to_csv(self.candidates_path, index=False)
@@ -1,272 +1,83 @@
 # Extended country standardization for all datasets
 # Handles: AidData donors, Debt creditors, UCDP supporters
 
-import pandas as pd
-import pycountry
+import hashlib
+import json
+import os
+import pickle
+import sys
 import unicodedata
+from types import MappingProxyType
 
-# =============================================================================
-# MANUAL MAPPINGS
-# =============================================================================
+# pandas and pycountry are imported inside the functions that need them.
+# Importing pandas alone costs ~0.4 s, which dominates CLI runs and worker
+# processes that only resolve a handful of codes; name lookups themselves are
+# served from the prebuilt index in country_index.pkl (see below).
 
-# Base manual mapping (from your original script)
-manual_map = {
-    # Debt dataset variants
-    "Germany, Fed. Rep. of": "Germany",
-    "Korea, Republic of": "South Korea",
-    
-    # COLDAT lowercase
-    "britain": "United Kingdom",
-    "belgium": "Belgium",
-    "france": "France",
-    "germany": "Germany",
-    "netherlands": "Netherlands",
-    "portugal": "Portugal",
-    "spain": "Spain",
-    "italy": "Italy",
-    
-    # Congo variants
-    "Congo - Kinshasa": "Congo, The Democratic Republic of the",
-    "Congo, Dem. Rep.": "Congo, The Democratic Republic of the",
-    "Congo, Democratic Republic of": "Congo, The Democratic Republic of the",
-    "DR Congo": "Congo, The Democratic Republic of the",
-    "DRC": "Congo, The Democratic Republic of the",
-    "Democratic Republic of the Congo": "Congo, The Democratic Republic of the",
-    "DR Congo (Zaire)": "Congo, The Democratic Republic of the",
-    "Congo - Brazzaville": "Congo",
-    "Congo, Rep.": "Congo",
-    "Congo, Republic of": "Congo",
-    "Republic of Congo": "Congo",
-    
-    # Russia variants
-    "Russia": "Russian Federation",
-    "Soviet Union": "Russian Federation",
-    "Russia (Soviet Union)": "Russian Federation",
-    "Union of Soviet Socialist Republics (USSR)": "Russian Federation",
-    
-    # UCDP historical variants
-    "Cambodia (Kampuchea)": "Cambodia",
-    "East Germany": "Germany",
-    "Serbia (Yugoslavia)": "Serbia",
-    "Vietnam (North Vietnam)": "Viet Nam",
-    "Yemen (North Yemen)": "Yemen",
-    "Zimbabwe (Rhodesia)": "Zimbabwe",
-    
-    # Korea variants
-    "Korea": "South Korea",
-    "Korea, Rep.": "South Korea",
-    "Korea, Dem. People's Rep.": "North Korea",
-    "Korea, Democratic Republic of": "North Korea",
-    
-    # Common variants
-    "United States of America": "United States",
-    "Cote d'Ivoire": "Côte d'Ivoire",
-    "Cote d`Ivoire": "Côte d'Ivoire",
-    "Ivory Coast": "Côte d'Ivoire",
-    "Turkey": "Türkiye",
-    "Turkiye": "Türkiye",
-    "Myanmar (Burma)": "Myanmar",
-    "East Timor": "Timor-Leste",
-    "ETM": "Timor-Leste",
-    "Brunei": "Brunei Darussalam",
-    "Laos": "Lao People's Democratic Republic",
-    "Lao PDR": "Lao People's Democratic Republic",
-    "Iran, Islamic Rep.": "Iran",
-    "Egypt, Arab Rep.": "Egypt",
-    "Yemen, Rep.": "Yemen",
-    "Venezuela, RB": "Venezuela",
-    "Bahamas, The": "Bahamas",
-    "Gambia, The": "Gambia",
-    "Cape Verde": "Cabo Verde",
-    "Swaziland": "Eswatini",
-    "Macedonia, FYR": "North Macedonia",
-    "Micronesia, Fed. Sts.": "Micronesia, Federated States of",
-    "Micronesia (Federated States of)": "Micronesia, Federated States of",
-    "Micronesia": "Micronesia, Federated States of",
-    "Bosnia-Herzegovina": "Bosnia and Herzegovina",
-    "Bosnia": "Bosnia and Herzegovina",
-    "UK": "United Kingdom",
-    "UAE": "United Arab Emirates",
-    "Antigua & Barbuda": "Antigua and Barbuda",
-    "Trinidad & Tobago": "Trinidad and Tobago",
-    "St. Kitts & Nevis": "Saint Kitts and Nevis",
-    "St. Kitts and Nevis": "Saint Kitts and Nevis",
-    "St. Lucia": "Saint Lucia",
-    "St. Vincent & Grenadines": "Saint Vincent and the Grenadines",
-    "St. Vincent and the Grenadines": "Saint Vincent and the Grenadines",
-    "St.Vincent & Grenadines": "Saint Vincent and the Grenadines",
-    "Sao Tome & Principe": "Sao Tome and Principe",
-    "São Tomé & Príncipe": "Sao Tome and Principe",
-    "Hong Kong, China": "Hong Kong",
-    "Hong Kong SAR, China": "Hong Kong",
-    "Macao SAR, China": "Macao",
-    "Palestine": "Palestine, State of",
-    "Palestinian Authority or West Bank and Gaza Strip": "Palestine, State of",
-    "West Bank and Gaza": "Palestine, State of",
-    "Palestinian Adm. Areas": "Palestine, State of",
-    "Somalia, Fed. Rep.": "Somalia",
-    "Serbia and Montenegro": "Serbia",
-    "Yugoslavia": "Serbia",
-    "Yugoslavia, Socialist Federal Republic of": "Serbia",
-    "Czechoslovakia": "Czechia",
-    "Czech Republic": "Czechia",
-    "East Germany (GDR)": "Germany",
-    "Netherlands Antilles": "Netherlands",
-    "Israel and the Occupied Palestinian Territory": "Israel",
-    "Falkland Islands": "Falkland Islands (Malvinas)",
-    "Reunion": "Réunion",
-    "Northern Marianas": "Northern Mariana Islands",
-    "Virgin Islands (UK)": "Virgin Islands, British",
-    "Wallis & Futuna": "Wallis and Futuna",
-    "St. Helena": "Saint Helena, Ascension and Tristan da Cunha",
-    "Saint Helena": "Saint Helena, Ascension and Tristan da Cunha",
-    "Northern Cyprus": "Cyprus",
-    "Slovak Republic": "Slovakia",
-    
-    # MIP COW codes
-    "CUB": "Cuba",
-    "IRQ": "Iraq",
-    "KUW": "Kuwait",
-    "LBR": "Liberia",
-    "SAU": "Saudi Arabia",
-    "CAN": "Canada",
-    "IRN": "Iran",
-    "SOM": "Somalia",
-    "PER": "Peru",
-    "HAI": "Haiti",
-    "HON": "Honduras",
-    "LEB": "Lebanon",
-    "LIB": "Libya",
-    "NIR": "Niger",
-    "PHI": "Philippines",
-    "SUD": "Sudan",
-    "THI": "Thailand",
-    "URU": "Uruguay",
-    "YUG": "Serbia",
-    "BOS": "Bosnia and Herzegovina",
-    "CAM": "Cameroon",
-    "CAO": "Central African Republic",
-    "CEN": "Central African Republic",
-    "CDI": "Côte d'Ivoire",
-    "GUA": "Guatemala",
-    "SIE": "Sierra Leone",
-    "INS": "Indonesia",
-    "ICE": "Iceland",
-}
-
-manual_map.update({
-    "Holy See": "Holy See",
-    "Hong Kong Special Administrative Region, People's Republic of China": "Hong Kong",
-    "Hong Kong (China)": "Hong Kong",
-    "Macao Special Administrative Region, People's Republic of China": "Macao",
-    "Macau (China)": "Macao",
-    "Micronesia, Federated States of": "Micronesia, Federated States of",
-    "Sint Maarten, Kingdom of the Netherlands": "Sint Maarten",
-    "São Tomé and Príncipe, Democratic Republic of": "Sao Tome and Principe",
-    "Taiwan Province of China": "Taiwan",
-    "Chinese Taipei": "Taiwan",
-    "West Bank and Gaza": "Palestine, State of",
-    "Korea, Democratic People's Republic of": "North Korea",
-    "China (People's Republic of)": "China",
-    "Channel Islands": "Channel Islands",
-    "Curaï¿½o": "Curaçao",
-    "Czechoslovakia (former)": "Czechoslovakia",
-    "Cï¿½te d'Ivoire": "Côte d'Ivoire",
-    "Faeroe Islands": "Faroe Islands",
-    "Korea, Dem. Rep.": "North Korea",
-    "Netherlands Antilles (former)": "Netherlands Antilles",
-    "Puerto Rico (U.S.)": "Puerto Rico",
-    "Serbia and Montenegro (former)": "Serbia and Montenegro",
-    "St. Martin (French part)": "Saint Martin",
-    "Sï¿½o Tomï¿½ and Prï¿½ncipe": "Sao Tome and Principe",
-    "Tï¿½rkiye": "Türkiye",
-    "USSR (former)": "Russian Federation",
-    "Virgin Islands (U.S.)": "Virgin Islands, U.S.",
-    "Yugoslavia (former)": "Serbia",
-})
-
-# Special cases without official ISO codes
-special_codes = {
-    "Kosovo": "XKX",
-    "Taiwan": "TWN",
-    "Holy See": "VAT",
-    "Sint Maarten": "SXM",
-    "Channel Islands": "GGY",
-    "Saint Martin": "MAF",
-}
+# Frozen lookup table shipped next to this module (rebuild: run this file)
+INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'country_index.pkl')
 
 # =============================================================================
-# INTERNATIONAL ORGANIZATIONS (non-state actors in AidData)
+# ALIAS TABLE
 # =============================================================================
+# All hand-maintained name tables (manual_map, special_codes,
+# international_orgs) live in country_aliases.json, the single source for
+# every pipeline stage (country_utils.py re-exports from here). Entries are
+# grouped by origin in the file; they are flattened on load, in file order.
+#
+# Bump "version" in the JSON whenever you edit it. alias_table_key() combines
+# that version with a hash of the loaded tables and is used as the cache key
+# for the shipped index and for ISO3Resolver's on-disk table, so cached
+# resolutions are reused across runs and dropped only when the table changes.
+
+ALIAS_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'country_aliases.json')
+
+
+def load_alias_table(path=ALIAS_TABLE_PATH):
+    """Load the alias table; returns (version, manual_map, special_codes, international_orgs)"""
+    with open(path, encoding='utf-8') as f:
+        table = json.load(f)
+
+    manual = {}
+    for group in table['manual_map'].values():
+        manual.update(group)
+
+    orgs = set()
+    for group in table['international_orgs'].values():
+        orgs.update(group)
+
+    return table['version'], manual, dict(table['special_codes']), orgs
+
+
+ALIAS_TABLE_VERSION, manual_map, special_codes, international_orgs = load_alias_table()
+
+
+def alias_table_key():
+    """Cache key for the alias tables: version plus a hash of their contents"""
+    h = hashlib.sha1()
+    for table in (manual_map, special_codes):
+        for key in sorted(table):
+            h.update(f"{key}\x1f{table[key]}\x1e".encode('utf-8'))
+        h.update(b"\x1d")
+    return f"v{ALIAS_TABLE_VERSION}-{h.hexdigest()[:12]}"
 
-international_orgs = {
-    # Multilateral Development Banks
-    "African Capacity Building Foundation (ACBF)",
-    "African Development Bank (AFDB)",
-    "African Development Fund (AFDF)",
-    "Andean Development Corporation (CAF)",
-    "Arab Bank for Economic Development in Africa (BADEA)",
-    "Arab Fund for Economic & Social Development (AFESD)",
-    "Asian Development Bank (ASDB)",
-    "Asian Development Bank (AsDB Special Funds)",
-    "Asian Development Fund (ASDF)",
-    "Caribbean Development Bank (CDB)",
-    "European Bank for Reconstruction & Development (EBRD)",
-    "Inter-American Development Bank (IADB)",
-    "Islamic Development Bank (ISDB)",
-    "Nigerian Trust Fund (NTF)",
-    "Nordic Development Fund (NDF)",
-    "North American Development Bank (NADB)",
-    "OPEC Fund for International Development (OFID)",
-    
-    # UN Agencies
-    "United Nations Children`s Fund (UNICEF)",
-    "United Nations Democracy Fund (UNDEF)",
-    "United Nations Development Programme (UNDP)",
-    "United Nations Economic Commission for Europe (UNECE)",
-    "United Nations Economic and Social Commission for Asia and the Pacific (UNESCAP)",
-    "United Nations High Commissioner for Refugees (UNHCR)",
-    "United Nations Peacebuilding Fund (UNPBF)",
-    "United Nations Population Fund (UNFPA)",
-    "United Nations Relief and Works Agency for Palestine Refugees in the Near East (UNRWA)",
-    "Joint United Nations Programme on HIV/AIDS (UNAIDS)",
-    "World Health Organization (WHO)",
-    "World Trade Organization (WTO)",
-    
-    # World Bank Group
-    "World Bank - Carbon Finance Unit",
-    "World Bank - Debt Reduction Facility",
-    "World Bank - International Bank for Reconstruction and Development (IBRD)",
-    "World Bank - International Development Association (IDA)",
-    "World Bank - International Finance Corporation (IFC)",
-    "World Bank - Managed Trust Funds",
-    "International Fund for Agricultural Development (IFAD)",
-    "International Monetary Fund (IMF)",
-    
-    # Other multilaterals
-    "European Communities (EC)",
-    "Organization for Security and Co-operation in Europe (OSCE)",
-    "Global Alliance for Vaccines & Immunization (GAVI)",
-    "Global Environment Facility (GEF)",
-    "Global Fund to Fight Aids, Tuberculosis and Malaria (GFATM)",
-    "Global Green Growth Institute (GGGI)",
-    "Global Partnership for Education",
-    "Multilateral Fund for the Implementation of the Montreal Protocol",
-    "Congo Basin Forest Fund (CBFF)",
-    
-    # Private foundations
-    "Bill & Melinda Gates Foundation",
-}
 
 # =============================================================================
 # CORE FUNCTIONS
 # =============================================================================
 
-def clean_country_name(name):
-    """Clean country name before pycountry lookup"""
-    if pd.isna(name):
-        return None
-    
+def _isna(value):
+    """Scalar missing-value check that does not force a pandas import"""
+    if value is None:
+        return True
+    if 'pandas' in sys.modules:
+        return bool(sys.modules['pandas'].isna(value))
+    # Without pandas loaded the only other missing marker is a float NaN
+    return isinstance(value, float) and value != value
+
+
+def _normalize_name(name):
+    """Normalize a raw name up to (but not including) the manual mapping step"""
     name = str(name).strip()
 
     # Convert to string and normalize Unicode
@@ -278,56 +89,59 @@ def clean_country_name(name):
     # Strip "Government of" prefix (UCDP)
     if name.startswith("Government of "):
         name = name.replace("Government of ", "")
-    
-    # Apply manual mapping
-    if name in manual_map:
-        return manual_map[name]
 
-    # Remove everything after first comma (ASCII or full-width)
+    return name
+
+
+def _drop_qualifier(name):
+    """Remove everything after the first comma (ASCII or full-width)"""
     for comma in [",", "，"]:
         if comma in name:
             name = name.split(comma)[0]
             break
 
     # Final strip to remove leading/trailing spaces
-    name = name.strip()
-    
-    return name
+    return name.strip()
 
 
-def get_iso3(country_name):
-    """Get ISO3 code for a country name"""
-    cleaned = clean_country_name(country_name)
-    if cleaned is None:
+def clean_country_name(name):
+    """Clean country name before pycountry lookup"""
+    if _isna(name):
         return None
     
-    # Check special cases first
-    if cleaned in special_codes:
-        return special_codes[cleaned]
+    name = _normalize_name(name)
     
-    try:
-        return pycountry.countries.lookup(cleaned).alpha_3
-    except LookupError:
+    # Apply manual mapping
+    if name in manual_map:
+        return manual_map[name]
+
+    return _drop_qualifier(name)
+
+
+def get_iso3(country_name):
+    """Get ISO3 code for a country name"""
+    if _isna(country_name):
         return None
+    return get_country_index().lookup(country_name)
 
 
 def is_international_org(name):
     """Check if a donor/supporter is an international organization"""
-    if pd.isna(name):
+    if _isna(name):
         return False
     return str(name).strip() in international_orgs
 
 
 def is_state_actor(name):
     """Check if a UCDP supporter is a state actor (government)"""
-    if pd.isna(name):
+    if _isna(name):
         return False
     return str(name).strip().startswith("Government of ")
 
 
 def standardize_supporter(name):
     """Standardize UCDP supporter name and get ISO3 if state actor"""
-    if pd.isna(name):
+    if _isna(name):
         return None, None, False
     
     name = str(name).strip()
@@ -342,41 +156,262 @@ def standardize_supporter(name):
         return name, None, False
 
 
+# =============================================================================
+# PRECOMPILED NAME INDEX
+# =============================================================================
+# pycountry.countries.lookup probes seven separate field indices in turn. The
+# CountryIndex folds those fields (alpha_2, alpha_3, numeric, name,
+# official_name, common_name, ...) into one lowercase dict, and pre-resolves
+# every manual_map alias, so that a lookup after cleaning is a single dict
+# probe. Resolution order is identical to clean_country_name + get_iso3:
+#   manual_map alias -> special_codes -> pycountry fields.
+#
+# NOTE: the index is built once per process. If you edit manual_map or
+# special_codes at runtime (e.g. in a notebook), call rebuild_country_index().
+
+# Same order as pycountry's own indices, so the first field to claim a value wins
+PYCOUNTRY_FIELDS = ['alpha_2', 'alpha_3', 'flag', 'name', 'numeric', 'official_name', 'common_name']
+
+_UNMAPPED = object()
+
+
+class CountryIndex:
+    """Immutable name -> ISO3 index over pycountry and the manual tables"""
+
+    def __init__(self, names, special, aliases):
+        self.names = MappingProxyType(dict(names))
+        self.special = MappingProxyType(dict(special))
+        self.aliases = MappingProxyType(dict(aliases))
+
+    def __len__(self):
+        return len(self.names) + len(self.special) + len(self.aliases)
+
+    def lookup_clean(self, cleaned):
+        """Resolve an already-cleaned name (output of clean_country_name)"""
+        if cleaned in self.special:
+            return self.special[cleaned]
+        return self.names.get(cleaned.lower())
+
+    def lookup(self, name):
+        """Resolve a raw country name to ISO3 (None if unmatched)"""
+        name = _normalize_name(name)
+
+        iso3 = self.aliases.get(name, _UNMAPPED)
+        if iso3 is not _UNMAPPED:
+            return iso3
+
+        return self.lookup_clean(_drop_qualifier(name))
+
+    def save(self, path, fingerprint=None):
+        """Serialize the index to a pickle file"""
+        with open(path, 'wb') as f:
+            pickle.dump(
+                {
+                    'fingerprint': fingerprint,
+                    'names': dict(self.names),
+                    'special': dict(self.special),
+                    'aliases': dict(self.aliases),
+                },
+                f, protocol=pickle.HIGHEST_PROTOCOL,
+            )
+
+    @classmethod
+    def load(cls, path, fingerprint=None):
+        """Load an index written by save(); None if the fingerprint is stale"""
+        with open(path, 'rb') as f:
+            data = pickle.load(f)
+        if fingerprint is not None and data.get('fingerprint') != fingerprint:
+            return None
+        return cls(data['names'], data['special'], data['aliases'])
+
+
+def build_country_index():
+    """Build a CountryIndex from pycountry, manual_map and special_codes"""
+    import pycountry
+
+    names = {}
+    for field in PYCOUNTRY_FIELDS:
+        for country in pycountry.countries:
+            value = getattr(country, field, None)
+            if value is not None:
+                names.setdefault(value.lower(), country.alpha_3)
+
+    index = CountryIndex(names, special_codes, {})
+    aliases = {alias: index.lookup_clean(target) for alias, target in manual_map.items()}
+    return CountryIndex(names, special_codes, aliases)
+
+
+_country_index = None
+
+
+def get_country_index():
+    """Return the process-wide CountryIndex (shipped pickle, else built from pycountry)"""
+    global _country_index
+    if _country_index is None:
+        if os.path.exists(INDEX_PATH):
+            _country_index = CountryIndex.load(INDEX_PATH, fingerprint=alias_table_key())
+        if _country_index is None:
+            _country_index = build_country_index()
+    return _country_index
+
+
+def rebuild_country_index():
+    """Rebuild the index after manual_map / special_codes were edited"""
+    global _country_index
+    _country_index = build_country_index()
+    default_resolver.clear()
+    return _country_index
+
+
+def write_country_index(path=INDEX_PATH):
+    """Rebuild the index from pycountry and write it to path"""
+    index = build_country_index()
+    index.save(path, fingerprint=alias_table_key())
+    return index
+
+
+# =============================================================================
+# MEMOIZED RESOLVER
+# =============================================================================
+# get_iso3 re-cleans the string and queries pycountry on every call, which is
+# wasteful on registers where a few hundred names repeat over millions of rows.
+# The resolver maps each unique name once (factorize -> resolve uniques -> take)
+# and remembers the answer in one name -> ISO3 table, optionally persisted to
+# disk and reused across runs. The table holds one entry per distinct raw name
+# (a few thousand at most across all registers), so it is not bounded.
+
+class ISO3Resolver:
+    """Resolve country names to ISO3 codes once per unique name"""
+
+    def __init__(self, cache_path=None, aliases=None):
+        self.cache_path = cache_path
+        # Accepted name -> ISO3 decisions (e.g. from country_matching.AliasStore);
+        # these take precedence over automatic resolution
+        self.aliases = dict(aliases) if aliases is not None else {}
+        self._table = {}
+        self._dirty = False
+        if cache_path is not None and os.path.exists(cache_path):
+            self.load()
+
+    def __len__(self):
+        return len(self._table)
+
+    def resolve(self, name):
+        """Resolve a single name, consulting the aliases and the name table first"""
+        if _isna(name):
+            return None
+        key = str(name)
+
+        if key in self.aliases:
+            return self.aliases[key]
+        if key in self._table:
+            return self._table[key]
+
+        iso3 = self._table[key] = get_iso3(key)
+        self._dirty = True
+        return iso3
+
+    def resolve_series(self, series):
+        """Resolve a Series of names; each distinct value is looked up once"""
+        import pandas as pd
+
+        codes, uniques = pd.factorize(series)
+        resolved = pd.Series([self.resolve(u) for u in uniques], dtype=object)
+        # code -1 marks missing values; append a None slot for it to land on
+        resolved = pd.concat([resolved, pd.Series([None], dtype=object)], ignore_index=True)
+        codes[codes < 0] = len(uniques)
+        out = pd.Series(resolved.to_numpy()[codes], index=series.index, name=series.name, dtype=object)
+
+        if self._dirty and self.cache_path is not None:
+            self.save()
+        return out
+
+    def load(self):
+        """Load the persisted name -> ISO3 table (rows from other alias-table versions are dropped)"""
+        import pandas as pd
+
+        # keep_default_na=False so that e.g. "NA" (Namibia) stays a string
+        table = pd.read_csv(self.cache_path, dtype=str, keep_default_na=False)
+        if 'table_key' not in table.columns:
+            return
+        table = table[table['table_key'] == alias_table_key()]
+        self._table.update(
+            (name, iso3 if iso3 else None)
+            for name, iso3 in zip(table['name'], table['iso3'])
+        )
+
+    def save(self):
+        """Write the name -> ISO3 table to cache_path"""
+        import pandas as pd
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+        table = pd.DataFrame({
+            'name': list(self._table.keys()),
+            'iso3': [iso3 or '' for iso3 in self._table.values()],
+            'table_key': alias_table_key(),
+        })
+        table.to_csv(self.cache_path, index=False)
+        self._dirty = False
+
+    def clear(self):
+        """Drop all cached resolutions (in memory only)"""
+        self._table.clear()
+        self._dirty = False
+
+
+# Shared in-memory resolver used when no explicit resolver is passed
+default_resolver = ISO3Resolver()
+
+
 # =============================================================================
 # DATASET-SPECIFIC STANDARDIZATION FUNCTIONS
 # =============================================================================
 
-def standardize_aiddata(df):
+def standardize_aiddata(df, resolver=None):
     """Add donor_iso3 column to AidData, mark international orgs"""
+    if resolver is None:
+        resolver = default_resolver
     df = df.copy()
-    df['is_intl_org'] = df['donor'].apply(is_international_org)
-    df['donor_iso3'] = df['donor'].apply(lambda x: None if is_international_org(x) else get_iso3(x))
+    donors = df['donor']
+    df['is_intl_org'] = donors.notna() & donors.astype(str).str.strip().isin(international_orgs)
+    df['donor_iso3'] = resolver.resolve_series(donors.where(~df['is_intl_org']))
     return df
 
 
-def standardize_debt(df):
+def standardize_debt(df, resolver=None):
     """Add creditor_iso3 column to Debt data"""
+    if resolver is None:
+        resolver = default_resolver
     df = df.copy()
-    df['creditor_iso3'] = df['creditor'].apply(get_iso3)
+    df['creditor_iso3'] = resolver.resolve_series(df['creditor'])
     return df
 
 
-def standardize_ucdp(df):
+def standardize_ucdp(df, resolver=None):
     """Standardize UCDP supporter column"""
+    if resolver is None:
+        resolver = default_resolver
     df = df.copy()
-    
-    results = df['supporter'].apply(standardize_supporter)
-    df['supporter_clean'] = results.apply(lambda x: x[0])
-    df['supporter_iso3'] = results.apply(lambda x: x[1])
-    df['is_state_supporter'] = results.apply(lambda x: x[2])
-    
+
+    names = df['supporter'].astype(object).where(df['supporter'].notna())
+    stripped = names.map(lambda x: str(x).strip(), na_action='ignore')
+    is_state = stripped.map(lambda x: x.startswith("Government of "), na_action='ignore')
+    is_state = is_state.fillna(False).astype(bool)
+
+    clean = stripped.where(~is_state, stripped.str.replace("Government of ", "", regex=False))
+    df['supporter_clean'] = clean.astype(object).where(clean.notna(), None)
+    df['supporter_iso3'] = resolver.resolve_series(clean.where(is_state))
+    df['is_state_supporter'] = is_state
+
     return df
 
 
-def standardize_coldat(df):
+def standardize_coldat(df, resolver=None):
     """Add colonizer_iso3 column to COLDAT"""
+    if resolver is None:
+        resolver = default_resolver
     df = df.copy()
-    df['colonizer_iso3'] = df['colonizer'].apply(get_iso3)
+    df['colonizer_iso3'] = resolver.resolve_series(df['colonizer'])
     return df
 
 
@@ -384,8 +419,14 @@ def standardize_coldat(df):
 # VALIDATION FUNCTIONS
 # =============================================================================
 
-def check_coverage(df, iso3_col, name_col, dataset_name):
-    """Check standardization coverage for a dataset"""
+def check_coverage(df, iso3_col, name_col, dataset_name, matcher=None):
+    """Check standardization coverage for a dataset
+
+    If a country_matching.FuzzyMatcher is passed, ranked ISO3 candidates are
+    proposed (and cached) for every unmatched value, not just the first 20.
+    Values already resolved in the matcher's alias store are listed separately
+    as aliased, so aliased + still unmatched adds up to the unmatched count.
+    """
     total = len(df[name_col].dropna())
     matched = df[iso3_col].notna().sum()
     unmatched = df[df[iso3_col].isna()][name_col].dropna().unique()
@@ -395,7 +436,21 @@ def check_coverage(df, iso3_col, name_col, dataset_name):
     print(f"Matched to ISO3: {matched} ({100*matched/total:.1f}%)")
     print(f"Unmatched unique values: {len(unmatched)}")
     
-    if len(unmatched) > 0 and len(unmatched) <= 20:
+    if matcher is not None and len(unmatched) > 0:
+        aliased = [v for v in unmatched if str(v) in matcher.aliases]
+        pending = [v for v in unmatched if str(v) not in matcher.aliases]
+        if aliased:
+            print(f"Aliased (resolved in alias store): {len(aliased)}")
+            for v in sorted(aliased, key=str):
+                print(f"  - {v}  ->  {matcher.aliases.aliases[str(v)]}")
+        print(f"Still unmatched: {len(pending)}")
+        if pending:
+            candidates = matcher.propose(pending)
+            best = candidates[candidates['rank'] == 1].sort_values('score', ascending=False)
+            print("Unmatched values (best fuzzy candidate):")
+            for row in best.itertuples(index=False):
+                print(f"  - {row.name}  ->  {row.iso3} ({row.candidate}, score {row.score:.2f})")
+    elif len(unmatched) > 0 and len(unmatched) <= 20:
         print("Unmatched values:")
         for v in sorted(unmatched):
             print(f"  - {v}")
@@ -405,3 +460,10 @@ def check_coverage(df, iso3_col, name_col, dataset_name):
             print(f"  - {v}")
     
     return unmatched
+
+
+if __name__ == '__main__':
+    # Refresh the shipped lookup table after editing the manual mappings:
+    #   python src/country_utils_extended.py
+    index = write_country_index()
+    print(f"Wrote {INDEX_PATH} ({len(index)} entries)")
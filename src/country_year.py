@@ -0,0 +1,172 @@
+# country_year.py
+# Country-year attributes as dense year x country arrays
+#
+# Monadic attributes (ECI, GDP, population, conflict, journalist killings)
+# are attached to dyads once for the sender and once for the recipient.
+# Each merge onto the dyadic panel copies the whole panel. Here each
+# attribute is instead one float64 array of shape (years, countries),
+# indexed by year offset and the global integer country code
+# (country_codes.py). Attaching it to dyads is then a fancy-indexing gather:
+#
+#   pos = arrays.locate(recipient_codes, years)     # flat positions, -1 if absent
+#   panel['eci_receiver'] = arrays.take('eci_hs92', pos)
+#
+# Positions are computed once per side and reused for every attribute. The
+# processed country-year sources (controls, ECI) are loaded once per process
+# by country_year_arrays() and shared by every stage that needs them
+# (econ_score.py, ...). A table of ~300 countries x 33 years is ~80 KB per
+# attribute.
+#
+# USAGE:
+#   from country_year import country_year_arrays
+#   arrays = country_year_arrays()                  # controls + ECI, cached
+#   gdp = arrays.gather('gdp_per_capita', panel['recipient_iso3'], panel['year'])
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from country_codes import country_codes, encode
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+
+# name -> (path, country column, year column, attribute columns (None = all numeric))
+SOURCES = {
+    'controls': (os.path.join(PROJECT_ROOT, 'data', 'processed', 'controls', 'controls_merged.csv'),
+                 'iso3', 'year', None),
+    'eci': (os.path.join(PROJECT_ROOT, 'data', 'raw', 'economic', 'eci-rankings-raw.csv'),
+            'country_iso3_code', 'year', ['eci_hs92']),
+}
+DEFAULT_SOURCES = ('controls', 'eci')
+
+_shared = None
+_shared_sources = set()
+
+
+# =============================================================================
+# ARRAYS
+# =============================================================================
+
+class CountryYearArrays:
+    """Named (year, country code) float64 arrays over one shared grid"""
+
+    def __init__(self):
+        self.year_min = 0
+        self.shape = (0, 0)
+        self.arrays = {}
+
+    @classmethod
+    def from_frame(cls, df, columns, country='iso3', year='year'):
+        """Arrays for columns of a country-year frame (one row per country-year)"""
+        return cls().add(df, columns, country, year)
+
+    def __contains__(self, name):
+        return name in self.arrays
+
+    @property
+    def columns(self):
+        return list(self.arrays)
+
+    def _resize(self, year_min, year_max, width):
+        """Grow the grid to cover [year_min, year_max] x width codes (NaN padded)"""
+        if self.shape[0]:
+            year_min = min(year_min, self.year_min)
+            year_max = max(year_max, self.year_min + self.shape[0] - 1)
+            width = max(width, self.shape[1])
+        shape = (year_max - year_min + 1, width)
+        if shape == self.shape and year_min == self.year_min:
+            return
+        offset = self.year_min - year_min
+        for name, old in self.arrays.items():
+            new = np.full(shape, np.nan)
+            new[offset:offset + old.shape[0], :old.shape[1]] = old
+            self.arrays[name] = new
+        self.year_min, self.shape = year_min, shape
+
+    def add(self, df, columns, country='iso3', year='year'):
+        """Add (or overwrite) columns from a country-year frame; returns self
+
+        Rows with a missing country or year are skipped; duplicate
+        country-years raise, as a merge would silently duplicate dyads.
+        """
+        df = df[df[country].notna() & df[year].notna()]
+        codes = encode(df[country]).astype(np.int64)
+        years = df[year].to_numpy().astype(np.int64)
+        if len(df):
+            self._resize(int(years.min()), int(years.max()), len(country_codes()))
+        flat = (years - self.year_min) * self.shape[1] + codes
+        if len(np.unique(flat)) != len(flat):
+            raise ValueError(f"{country}/{year}: duplicate country-year rows, aggregate first")
+        for name in columns:
+            array = self.arrays.get(name)
+            if array is None:
+                array = self.arrays[name] = np.full(self.shape, np.nan)
+            array.flat[flat] = df[name].to_numpy(dtype=np.float64)
+        return self
+
+    def update(self, other):
+        """Add every array of another CountryYearArrays; returns self"""
+        if not other.arrays:
+            return self
+        self._resize(other.year_min, other.year_min + other.shape[0] - 1, other.shape[1])
+        offset = other.year_min - self.year_min
+        for name, array in other.arrays.items():
+            self.arrays[name] = np.full(self.shape, np.nan)
+            self.arrays[name][offset:offset + other.shape[0], :other.shape[1]] = array
+        return self
+
+    # -------------------------------------------------------------------------
+    # Gathers
+    # -------------------------------------------------------------------------
+
+    def locate(self, codes, years):
+        """Flat grid positions of (code, year) pairs; -1 outside the grid"""
+        codes = np.asarray(codes, dtype=np.int64)
+        offsets = np.asarray(years, dtype=np.int64) - self.year_min
+        inside = (codes >= 0) & (codes < self.shape[1]) & (offsets >= 0) & (offsets < self.shape[0])
+        return np.where(inside, offsets * self.shape[1] + codes, -1)
+
+    def positions(self, country, year):
+        """Flat grid positions of ISO3 values and years"""
+        years = pd.Series(year).to_numpy(dtype=np.float64)
+        missing = np.isnan(years)
+        pos = self.locate(encode(country), np.where(missing, -1, years))
+        pos[missing] = -1
+        return pos
+
+    def take(self, name, positions):
+        """Values of one attribute at flat positions (NaN at -1)"""
+        out = self.arrays[name].ravel()[np.maximum(positions, 0)]
+        out[positions < 0] = np.nan
+        return out
+
+    def gather(self, name, country, year):
+        """Values of one attribute for ISO3 values and years"""
+        return self.take(name, self.positions(country, year))
+
+
+# =============================================================================
+# SHARED SOURCES
+# =============================================================================
+
+def load_source(name):
+    """CountryYearArrays of one entry in SOURCES, read from disk"""
+    path, country, year, columns = SOURCES[name]
+    df = pd.read_csv(path)
+    if columns is None:
+        columns = [c for c in df.select_dtypes('number').columns if c != year]
+    return CountryYearArrays.from_frame(df, columns, country, year)
+
+
+def country_year_arrays(sources=DEFAULT_SOURCES):
+    """Process-wide CountryYearArrays holding the given sources (each read once)"""
+    global _shared
+    if _shared is None:
+        _shared = CountryYearArrays()
+    for name in sources:
+        if name not in _shared_sources:
+            _shared.update(load_source(name))
+            _shared_sources.add(name)
+    return _shared
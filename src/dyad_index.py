@@ -0,0 +1,161 @@
+# dyad_index.py
+# Integer-keyed index of sender-recipient-year dyads
+#
+# Each dyad is packed into one int64 key using the global country code table
+# (country_codes.py):
+#
+#   key = year << 32 | sender_code << 16 | recipient_code
+#
+# so building the dyad universe is one pd.unique over an int64 array, and
+# every join onto it is a hash lookup (pd.Index.get_indexer) on one integer
+# column instead of a string-keyed DataFrame.merge that copies the frame.
+# Lower-dimensional keys are the same layout with fields zeroed:
+#   pair key (static, e.g. COLDAT):        sender_code << 16 | recipient_code
+#   recipient-year key:                    year << 32 | recipient_code
+# Country-year attributes (e.g. the CPJ target) are gathered from dense
+# year x country arrays instead (country_year.py).
+#
+# USAGE (see merge_datasets.py):
+#   dyads = DyadIndex.from_frames([sipri_agg, dac2_agg]).between_years(1992, 2024)
+#   panel = dyads.to_frame()
+#   panel['arms_tiv'] = dyads.align(sipri_agg, 'arms_tiv')
+
+import numpy as np
+import pandas as pd
+
+from country_codes import country_dtype, encode
+from country_year import CountryYearArrays
+
+DYAD_COLUMNS = ('sender_iso3', 'recipient_iso3', 'year')
+
+_CODE_BITS = 16
+_CODE_MASK = (1 << _CODE_BITS) - 1
+_YEAR_SHIFT = 2 * _CODE_BITS
+_PAIR_MASK = (1 << _YEAR_SHIFT) - 1
+
+
+# =============================================================================
+# KEY ENCODING
+# =============================================================================
+
+def _codes(values, name):
+    codes = encode(values).astype(np.int64)
+    if (codes < 0).any():
+        raise ValueError(f"{name}: missing ISO3 codes cannot be keyed")
+    return codes
+
+
+def _years(values):
+    years = pd.Series(values)
+    if years.isna().any():
+        raise ValueError("year: missing years cannot be keyed")
+    return years.to_numpy().astype(np.int64)
+
+
+def dyad_keys(sender, recipient, year):
+    """Pack (sender, recipient, year) into int64 keys"""
+    return (_years(year) << _YEAR_SHIFT) | (_codes(sender, 'sender') << _CODE_BITS) | _codes(recipient, 'recipient')
+
+
+def pair_keys(sender, recipient):
+    """Pack (sender, recipient) into int64 keys (year-invariant joins)"""
+    return (_codes(sender, 'sender') << _CODE_BITS) | _codes(recipient, 'recipient')
+
+
+def recipient_year_keys(recipient, year):
+    """Pack (recipient, year) into int64 keys (country-year joins)"""
+    return (_years(year) << _YEAR_SHIFT) | _codes(recipient, 'recipient')
+
+
+def decode_dyads(keys):
+    """int64 keys -> (sender codes, recipient codes, years)"""
+    keys = np.asarray(keys, dtype=np.int64)
+    sender = ((keys >> _CODE_BITS) & _CODE_MASK).astype(np.int16)
+    recipient = (keys & _CODE_MASK).astype(np.int16)
+    year = (keys >> _YEAR_SHIFT).astype(np.int16)
+    return sender, recipient, year
+
+
+def frame_keys(df, columns=DYAD_COLUMNS):
+    sender, recipient, year = columns
+    return dyad_keys(df[sender], df[recipient], df[year])
+
+
+def _lookup(table_keys, keys, name):
+    """Positions of keys in table_keys (-1 where absent); table_keys must be unique"""
+    table = pd.Index(table_keys)
+    if not table.is_unique:
+        raise ValueError(f"{name}: duplicate keys, aggregate before aligning")
+    return table.get_indexer(keys)
+
+
+def _take(values, positions):
+    """values[positions] with NaN where positions == -1"""
+    values = np.asarray(values, dtype=np.float64)
+    out = values[positions]
+    out[positions < 0] = np.nan
+    return out
+
+
+# =============================================================================
+# DYAD INDEX
+# =============================================================================
+
+class DyadIndex:
+    """Ordered set of unique dyad keys; rows of the dyadic panel"""
+
+    def __init__(self, keys):
+        self.keys = pd.unique(np.asarray(keys, dtype=np.int64))
+
+    @classmethod
+    def from_frames(cls, frames, columns=DYAD_COLUMNS):
+        """Union of the dyads in frames, in order of first appearance"""
+        return cls(np.concatenate([frame_keys(df, columns) for df in frames]))
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def years(self):
+        return self.keys >> _YEAR_SHIFT
+
+    def between_years(self, year_min, year_max):
+        """Dyads with year_min <= year <= year_max"""
+        years = self.years
+        return DyadIndex(self.keys[(years >= year_min) & (years <= year_max)])
+
+    def to_frame(self, columns=DYAD_COLUMNS):
+        """sender / recipient (shared categoricals) and year (int16) columns"""
+        sender, recipient, year = decode_dyads(self.keys)
+        dtype = country_dtype()
+        return pd.DataFrame({
+            columns[0]: pd.Categorical.from_codes(sender, dtype=dtype),
+            columns[1]: pd.Categorical.from_codes(recipient, dtype=dtype),
+            columns[2]: year,
+        })
+
+    def align(self, df, value_col, columns=DYAD_COLUMNS):
+        """Values of df[value_col] for every dyad (NaN where df has no row)
+
+        Equivalent to a left merge of df onto the index on the three dyad
+        columns; df must hold one row per dyad.
+        """
+        positions = _lookup(frame_keys(df, columns), self.keys, value_col)
+        return _take(df[value_col], positions)
+
+    def country_year_positions(self, arrays, side='recipient'):
+        """Flat positions of the dyads' sender or recipient in a CountryYearArrays grid"""
+        sender, recipient, year = decode_dyads(self.keys)
+        return arrays.locate(recipient if side == 'recipient' else sender, year)
+
+    def align_recipient_year(self, recipient, year, values):
+        """Country-year values matched on the dyad's recipient and year"""
+        frame = pd.DataFrame({'iso3': np.asarray(recipient), 'year': np.asarray(year),
+                              'value': np.asarray(values, dtype=np.float64)})
+        arrays = CountryYearArrays.from_frame(frame, ['value'])
+        return arrays.take('value', self.country_year_positions(arrays))
+
+    def has_pair(self, sender, recipient):
+        """Boolean mask: the dyad's (sender, recipient) pair is in the given pairs"""
+        pairs = np.unique(pair_keys(sender, recipient))
+        return np.isin(self.keys & _PAIR_MASK, pairs)
@@ -0,0 +1,186 @@
+# econ_score.py
+# Economic neo-colonial score per sender-recipient-year dyad (notebook 08)
+#
+#   complexity_asymmetry = (ECI_sender - ECI_receiver).clip(lower=0)
+#   trade_dependency     = bilateral_trade / receiver_GDP
+#   econ_neocol_score    = trade_dependency * complexity_asymmetry
+#
+# Same inputs, output columns and NaN propagation as
+# 08_econ_neocol_score.ipynb, but without the row-wise applies: ISO3 codes are
+# mapped to the global integer codes (country_codes.py) and packed into int64
+# keys as in dyad_index.py,
+#   undirected pair-year key = year << 32 | min(code_a, code_b) << 16 | max(code_a, code_b)
+#   country-year key         = year << 32 | code
+# Trade is summed per pair-year key and joined onto the panel with a
+# searchsorted on the sorted int64 keys; ECI and receiver GDP are gathered
+# from the shared dense year x country arrays (country_year.py). Any consistent ordering of the two codes gives the same
+# pairs as the notebook's alphabetical tuple(sorted(...)).
+#
+# USAGE: Run from project root directory:
+#   python src/econ_score.py           # write data/processed/econ_neocol_score.csv
+#   python src/econ_score.py --check   # compare with the existing file instead
+# or
+#   from econ_score import econ_neocol_score
+#   out = econ_neocol_score(panel, trade)   # ECI / GDP from country_year_arrays()
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, SCRIPT_DIR)
+
+from country_year import CountryYearArrays, country_year_arrays
+from dyad_index import _CODE_BITS, _YEAR_SHIFT, _codes, _take, _years
+
+TRADE_PATH = os.path.join(PROJECT_ROOT, 'data', 'processed', 'v3_imf_trade.csv')
+PANEL_PATH = os.path.join(PROJECT_ROOT, 'data', 'merged', 'panel_with_controls_1992_2024.csv')
+OUTPUT_PATH = os.path.join(PROJECT_ROOT, 'data', 'processed', 'econ_neocol_score.csv')
+
+OUTPUT_COLUMNS = [
+    'sender_iso3', 'recipient_iso3', 'year',
+    'eci_sender', 'eci_receiver',
+    'complexity_asymmetry',
+    'bilateral_trade',
+    'receiver_GDP',
+    'trade_dependency',
+    'econ_neocol_score',
+]
+
+
+# =============================================================================
+# KEYS
+# =============================================================================
+
+def undirected_keys(a_codes, b_codes, years):
+    """Pack (min code, max code, year) into int64 keys"""
+    lo = np.minimum(a_codes, b_codes)
+    hi = np.maximum(a_codes, b_codes)
+    return (years << _YEAR_SHIFT) | (lo << _CODE_BITS) | hi
+
+
+def _sorted_lookup(table_keys, keys):
+    """Positions of keys in the sorted, unique table_keys (-1 where absent)"""
+    pos = np.searchsorted(table_keys, keys)
+    pos[pos == len(table_keys)] = 0
+    if len(table_keys):
+        pos[table_keys[pos] != keys] = -1
+    else:
+        pos[:] = -1
+    return pos
+
+
+# =============================================================================
+# TABLES
+# =============================================================================
+
+def bilateral_trade(trade):
+    """usd_value summed per undirected pair-year: (sorted keys, totals)
+
+    Rows with a missing ISO3 code or year are dropped, as the notebook's
+    groupby does; the sum is pandas' groupby sum, so totals match it exactly.
+    """
+    ok = (trade['a_iso3'].notna() & trade['b_iso3'].notna() & trade['year'].notna()).to_numpy()
+    trade = trade[ok]
+    keys = undirected_keys(_codes(trade['a_iso3'], 'a_iso3'), _codes(trade['b_iso3'], 'b_iso3'),
+                           _years(trade['year']))
+    totals = pd.Series(trade['usd_value'].to_numpy(dtype=np.float64)).groupby(keys, sort=True).sum()
+    return totals.index.to_numpy(dtype=np.int64), totals.to_numpy()
+
+
+def country_year_attributes(eci, controls):
+    """ECI (eci_hs92), gdp_per_capita and population as CountryYearArrays"""
+    arrays = CountryYearArrays.from_frame(eci, ['eci_hs92'], country='country_iso3_code')
+    return arrays.add(controls, ['gdp_per_capita', 'population'])
+
+
+# =============================================================================
+# SCORE
+# =============================================================================
+
+INTERMEDIATE_COLUMNS = ['eci_sender', 'eci_receiver', 'bilateral_trade', 'receiver_GDP', 'sender_GDP']
+
+
+def intermediates(panel, trade, attributes=None):
+    """Formula-independent inputs of the score for every panel row
+
+    sender / recipient / year plus INTERMEDIATE_COLUMNS. attributes is a
+    CountryYearArrays with eci_hs92, gdp_per_capita and population (default:
+    the shared controls + ECI arrays).
+    """
+    if attributes is None:
+        attributes = country_year_arrays()
+    sender = _codes(panel['sender_iso3'], 'sender_iso3')
+    recipient = _codes(panel['recipient_iso3'], 'recipient_iso3')
+    years = _years(panel['year'])
+
+    pair_keys, pair_trade = bilateral_trade(trade)
+    pair_pos = _sorted_lookup(pair_keys, undirected_keys(sender, recipient, years))
+    sender_pos = attributes.locate(sender, years)
+    recipient_pos = attributes.locate(recipient, years)
+
+    out = panel[['sender_iso3', 'recipient_iso3', 'year']].copy()
+    out['eci_sender'] = attributes.take('eci_hs92', sender_pos)
+    out['eci_receiver'] = attributes.take('eci_hs92', recipient_pos)
+    out['bilateral_trade'] = _take(pair_trade, pair_pos)
+    for col, pos in (('receiver_GDP', recipient_pos), ('sender_GDP', sender_pos)):
+        out[col] = attributes.take('gdp_per_capita', pos) * attributes.take('population', pos)
+    return out
+
+
+def score_from_intermediates(inputs):
+    """Notebook 08's score and components (OUTPUT_COLUMNS) from intermediates()"""
+    out = inputs.drop(columns='sender_GDP')
+    out['complexity_asymmetry'] = np.maximum(out['eci_sender'].to_numpy() - out['eci_receiver'].to_numpy(), 0.0)
+    out['trade_dependency'] = out['bilateral_trade'] / out['receiver_GDP']
+    out['econ_neocol_score'] = out['trade_dependency'] * out['complexity_asymmetry']
+    return out[OUTPUT_COLUMNS]
+
+
+def econ_neocol_score(panel, trade, attributes=None):
+    """Score and its components for every panel row (OUTPUT_COLUMNS, panel order)"""
+    return score_from_intermediates(intermediates(panel, trade, attributes))
+
+
+def load_inputs():
+    """(panel, trade) as notebook 08 reads them; ECI and controls come from country_year_arrays()"""
+    trade = pd.read_csv(TRADE_PATH, usecols=['a_iso3', 'b_iso3', 'year', 'usd_value'])
+    panel = pd.read_csv(PANEL_PATH, usecols=['sender_iso3', 'recipient_iso3', 'year'])
+    return panel, trade
+
+
+def compare(output, reference):
+    """Per-column count of rows that differ (NaN == NaN); empty dict if identical"""
+    if len(output) != len(reference):
+        return {'rows': abs(len(output) - len(reference))}
+    diffs = {}
+    for col in OUTPUT_COLUMNS:
+        a, b = output[col].to_numpy(), reference[col].to_numpy()
+        if col in ('sender_iso3', 'recipient_iso3', 'year'):
+            same = a.astype(str) == b.astype(str)
+        else:
+            a, b = a.astype(np.float64), b.astype(np.float64)
+            same = (a == b) | (np.isnan(a) & np.isnan(b))
+        if not same.all():
+            diffs[col] = int((~same).sum())
+    return diffs
+
+
+if __name__ == '__main__':
+    output = econ_neocol_score(*load_inputs())
+
+    if '--check' in sys.argv[1:]:
+        # round_trip: the default float parser can be off by one ulp
+        diffs = compare(output, pd.read_csv(OUTPUT_PATH, float_precision='round_trip'))
+        if diffs:
+            print(f"✗ differs from {OUTPUT_PATH}: {diffs}")
+            sys.exit(1)
+        print(f"✓ identical to {OUTPUT_PATH}  {output.shape}")
+    else:
+        output.to_csv(OUTPUT_PATH, index=False)
+        print(f"✓ {OUTPUT_PATH}  {output.shape}")
+        print(f"  econ_neocol_score non-null: {output['econ_neocol_score'].notna().sum():,}, "
+              f"NaN: {output['econ_neocol_score'].isna().sum():,}")
@@ -0,0 +1,254 @@
+# econ_variants.py
+# Alternative econ_neocol_score formulas over shared intermediates
+#
+# Audits 18, 21 and 24 question notebook 08's formula
+#   trade_dependency * clip(ECI_sender - ECI_receiver, 0)
+# (the clip zeroes every dyad whose sender is less complex than the
+# receiver) and the log1p(score * 1e9) scaling of notebooks 09 and 12.
+# Trying a variant used to mean rerunning notebooks 08, 09, 12 and 14. Here
+# the formula-independent inputs (econ_score.intermediates: ECI of both
+# sides, bilateral trade, receiver and sender GDP) are computed once and
+# cached. A variant is then
+#   formula   a numpy expression over those inputs, e.g.
+#             'bilateral_trade / sender_GDP * clip(asymmetry, 0)'
+#   scale     how the raw score becomes the logged column: log1p_1e9
+#             (notebooks 09/12), asinh_1e9 (keeps the sign of signed
+#             formulas), rank (weight_transforms' per-year percentile rank),
+#             raw
+# and for every variant at once the engine emits, with a 'variant' column:
+#   dyadic    sender_iso3, recipient_iso3, year, econ_neocol_score,
+#             econ_neocol_score_log (scaled, the edge weight notebook 11 reads)
+#   monadic   recipient_iso3, year, econ_neocol_score_total
+#             (notebook 12: scale of the recipient-year sum of raw scores)
+#   network   country, year, econ_neocol_score_{measure} (network_engine's
+#             measures of the econ layer, weights = the scaled score)
+# so each output can stand in for its notebook counterpart. The monadic
+# sums of all variants are one groupby, and the network measures of all
+# variants come from one MultiplexGraph with one layer per variant.
+#
+# Names available in formulas: eci_sender, eci_receiver, asymmetry
+# (eci_sender - eci_receiver), bilateral_trade, receiver_GDP, sender_GDP,
+# trade_dependency (bilateral_trade / receiver_GDP), and the functions
+# clip(x, lo, hi=None), abs, exp, log, log1p, sqrt, minimum, maximum, where,
+# isnan and year_rank(x) (per-year percentile rank of x > 0; 0 stays 0).
+#
+# USAGE: Run from project root directory:
+#   python src/econ_variants.py [variant ...]      # default: all of VARIANTS
+# or
+#   from econ_variants import EconVariants
+#   engine = EconVariants.from_inputs()            # or EconVariants(intermediates_frame)
+#   dyadic, monadic, network = engine.run(['notebook', 'sender_gdp',
+#                                          ('tight', 'trade_dependency * clip(asymmetry - 0.5, 0)')])
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, SCRIPT_DIR)
+
+from country_year import DEFAULT_SOURCES, SOURCES
+from econ_score import PANEL_PATH, TRADE_PATH, intermediates, load_inputs
+from multiplex import MultiplexGraph
+from network_engine import MEASURES, MERGED_DIR, compute_network_measures
+from weight_transforms import rank_weights
+
+CACHE_PATH = os.path.join(MERGED_DIR, 'cache', 'econ_intermediates.pkl')
+OUTPUT_PATHS = {part: os.path.join(MERGED_DIR, f'econ_variants_{part}_1992_2024.csv')
+                for part in ('dyadic', 'monadic', 'network')}
+
+KEY = ['sender_iso3', 'recipient_iso3', 'year']
+SCORE_COLUMN = 'econ_neocol_score'
+
+# name -> (formula, scale); 'notebook' reproduces notebooks 08 / 09 / 12
+VARIANTS = {
+    'notebook': ('trade_dependency * clip(asymmetry, 0)', 'log1p_1e9'),
+    'unclipped': ('trade_dependency * asymmetry', 'asinh_1e9'),
+    'abs_asymmetry': ('trade_dependency * abs(asymmetry)', 'log1p_1e9'),
+    'clip_minus1': ('trade_dependency * clip(asymmetry + 1, 0)', 'log1p_1e9'),
+    'softplus': ('trade_dependency * log1p(exp(asymmetry))', 'log1p_1e9'),
+    'sender_gdp': ('bilateral_trade / sender_GDP * clip(asymmetry, 0)', 'log1p_1e9'),
+    'trade_only': ('trade_dependency', 'log1p_1e9'),
+    'rank': ('trade_dependency * clip(asymmetry, 0)', 'rank'),
+    'rank_product': ('year_rank(trade_dependency) * year_rank(clip(asymmetry, 0))', 'raw'),
+}
+DEFAULT_VARIANTS = list(VARIANTS)
+
+# scale(values, year) -> logged column; applied to dyadic scores and to the
+# recipient-year sums alike
+SCALES = {
+    'log1p_1e9': lambda values, year: np.log1p(values * 1e9),
+    'asinh_1e9': lambda values, year: np.arcsinh(values * 1e9),
+    'rank': lambda values, year: np.where(np.isnan(values), np.nan,
+                                          rank_weights(np.nan_to_num(values), year)),
+    'raw': lambda values, year: values,
+}
+
+
+def resolve(spec):
+    """(name, formula, scale) of a VARIANTS name or a (name, formula[, scale]) tuple"""
+    if isinstance(spec, str):
+        if spec not in VARIANTS:
+            raise KeyError(f"unknown econ score variant {spec!r} (defined: {', '.join(VARIANTS)})")
+        return (spec, *VARIANTS[spec])
+    name, formula, scale = (*spec, 'log1p_1e9') if len(spec) == 2 else spec
+    if scale not in SCALES:
+        raise KeyError(f"unknown scale {scale!r} (defined: {', '.join(SCALES)})")
+    return name, formula, scale
+
+
+def input_fingerprint():
+    """(path, size, mtime) of every file the intermediates are built from"""
+    paths = [PANEL_PATH, TRADE_PATH] + [SOURCES[name][0] for name in DEFAULT_SOURCES]
+    return tuple((p, os.path.getsize(p), os.stat(p).st_mtime_ns) if os.path.exists(p) else (p, None, None)
+                 for p in paths)
+
+
+# =============================================================================
+# ENGINE
+# =============================================================================
+
+class EconVariants:
+    """Dyadic, monadic and network outputs of any number of score formulas"""
+
+    def __init__(self, inputs):
+        self.inputs = inputs
+        self.keys = inputs[KEY]
+        self.year = inputs['year'].to_numpy(dtype=np.int64)
+        self.namespace = self._namespace()
+        self._scores = {}
+
+    @classmethod
+    def from_inputs(cls, panel=None, trade=None, attributes=None, cache_path=CACHE_PATH):
+        """Engine over econ_score.intermediates, read from cache_path when the inputs are unchanged
+
+        With panel / trade given the intermediates are always computed (and
+        not cached).
+        """
+        if panel is not None:
+            return cls(intermediates(panel, trade, attributes))
+        fingerprint = input_fingerprint()
+        if cache_path and os.path.exists(cache_path):
+            cached = pd.read_pickle(cache_path)
+            if cached['fingerprint'] == fingerprint:
+                return cls(cached['inputs'])
+        engine = cls(intermediates(*load_inputs(), attributes))
+        if cache_path:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            pd.to_pickle({'fingerprint': fingerprint, 'inputs': engine.inputs}, cache_path)
+        return engine
+
+    def _namespace(self):
+        columns = {c: self.inputs[c].to_numpy(dtype=np.float64)
+                   for c in ('eci_sender', 'eci_receiver', 'bilateral_trade', 'receiver_GDP', 'sender_GDP')}
+        year = self.year
+
+        def clip(x, lo=None, hi=None):
+            # np.clip's NaN handling, with either bound optional
+            x = np.maximum(x, lo) if lo is not None else x
+            return np.minimum(x, hi) if hi is not None else x
+
+        def year_rank(x):
+            x = np.asarray(x, dtype=np.float64)
+            return np.where(np.isnan(x), np.nan, rank_weights(np.nan_to_num(x), year))
+
+        return {
+            **columns,
+            'asymmetry': columns['eci_sender'] - columns['eci_receiver'],
+            'trade_dependency': columns['bilateral_trade'] / columns['receiver_GDP'],
+            'clip': clip, 'year_rank': year_rank,
+            'abs': np.abs, 'exp': np.exp, 'log': np.log, 'log1p': np.log1p, 'sqrt': np.sqrt,
+            'minimum': np.minimum, 'maximum': np.maximum, 'where': np.where, 'isnan': np.isnan,
+        }
+
+    def score(self, spec):
+        """(raw, scaled) score of every dyad under a variant (cached per name)"""
+        name, formula, scale = resolve(spec)
+        cached = self._scores.get(name)
+        if cached is None or cached[:2] != (formula, scale):
+            with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+                raw = eval(compile(formula, f'<variant {name}>', 'eval'),
+                           {'__builtins__': {}}, self.namespace)
+                raw = np.broadcast_to(np.asarray(raw, dtype=np.float64), self.year.shape).copy()
+                scaled = SCALES[scale](raw, self.year)
+            cached = self._scores[name] = (formula, scale, raw, np.asarray(scaled, dtype=np.float64))
+        return cached[2], cached[3]
+
+    # =========================================================================
+    # OUTPUTS
+    # =========================================================================
+
+    def dyadic(self, specs=DEFAULT_VARIANTS):
+        """Raw and scaled score per dyad and variant (long, 'variant' column)"""
+        frames = []
+        for spec in specs:
+            raw, scaled = self.score(spec)
+            frames.append(self.keys.assign(**{SCORE_COLUMN: raw, f'{SCORE_COLUMN}_log': scaled},
+                                           variant=resolve(spec)[0]))
+        return pd.concat(frames, ignore_index=True)
+
+    def monadic(self, specs=DEFAULT_VARIANTS):
+        """Notebook 12's econ_neocol_score_total per recipient-year and variant
+
+        The raw scores of all variants are summed in one groupby (NaN counts
+        as 0, as in notebook 12), then each variant's scale is applied.
+        """
+        names = [resolve(spec)[0] for spec in specs]
+        raw = pd.DataFrame({name: self.score(spec)[0] for name, spec in zip(names, specs)})
+        sums = raw.groupby([self.keys['recipient_iso3'].to_numpy(), self.year]).sum()
+        recipient = sums.index.get_level_values(0).to_numpy()
+        year = sums.index.get_level_values(1).to_numpy()
+        frames = [pd.DataFrame({'recipient_iso3': recipient, 'year': year,
+                                f'{SCORE_COLUMN}_total': SCALES[resolve(spec)[2]](sums[name].to_numpy(), year),
+                                'variant': name})
+                  for name, spec in zip(names, specs)]
+        return pd.concat(frames, ignore_index=True)
+
+    def network(self, specs=DEFAULT_VARIANTS):
+        """network_engine measures of the econ layer per country-year and variant
+
+        Every variant is one layer of a single MultiplexGraph (shared nodes:
+        every country in the year's dyads), so all variants are measured in
+        one batch. Scaled weights <= 0 or NaN are no tie.
+        """
+        names = [resolve(spec)[0] for spec in specs]
+        weights = {name: np.nan_to_num(self.score(spec)[1], nan=0.0) for name, spec in zip(names, specs)}
+        graph = MultiplexGraph.from_panel(self.keys, layers=names, weights=weights)
+        measures = compute_network_measures(graph)
+
+        report = measures.attrs.get('pagerank_report')
+        if report is not None:
+            for row in report[~report['converged']].itertuples():
+                print(f"PageRank did not converge for variant {row.layer} ({row.year}): "
+                      f"residual {row.residual:.2e} after {row.iterations} iterations")
+        measures.attrs = {}
+
+        frames = []
+        for name in names:
+            columns = {f'{SCORE_COLUMN}_{m}': measures[f'{name}_{m}'].to_numpy() for m in MEASURES}
+            frames.append(pd.DataFrame({'country': measures['country'].to_numpy(), **columns,
+                                        'year': measures['year'].to_numpy(), 'variant': name}))
+        return pd.concat(frames, ignore_index=True)
+
+    def run(self, specs=DEFAULT_VARIANTS):
+        """(dyadic, monadic, network) frames of every variant"""
+        return self.dyadic(specs), self.monadic(specs), self.network(specs)
+
+
+if __name__ == '__main__':
+    specs = sys.argv[1:] or DEFAULT_VARIANTS
+
+    engine = EconVariants.from_inputs()
+    outputs = dict(zip(('dyadic', 'monadic', 'network'), engine.run(specs)))
+    for part, frame in outputs.items():
+        frame.to_csv(OUTPUT_PATHS[part], index=False)
+        print(f"✓ {OUTPUT_PATHS[part]}  {frame.shape}")
+
+    monadic = outputs['monadic']
+    print(f"\n{'variant':16s} {'non-zero totals':>16s} {'mean total':>11s}")
+    for name, group in monadic.groupby('variant', sort=False):
+        total = group[f'{SCORE_COLUMN}_total']
+        print(f"{name:16s} {(total > 0).mean():16.1%} {total.mean():11.3f}")
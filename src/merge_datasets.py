@@ -39,6 +39,15 @@ os.makedirs(OUTPUT_DIR, exist_ok=True)
 # Add src to path so we can import country_utils_extended
 sys.path.insert(0, SCRIPT_DIR)
 from country_utils_extended import *
+from country_matching import AliasStore
+from dyad_index import DyadIndex
+from panel_store import apply_schema, write_panel
+
+# Persistent name -> ISO3 table so repeated runs skip pycountry lookups
+ISO3_CACHE_PATH = os.path.join(INPUT_DIR, 'cache', 'iso3_resolver_cache.csv')
+# Fuzzy-match decisions accepted via country_matching.FuzzyMatcher
+ACCEPTED_ALIASES_PATH = os.path.join(INPUT_DIR, 'country_aliases_accepted.csv')
+resolver = ISO3Resolver(cache_path=ISO3_CACHE_PATH, aliases=AliasStore(ACCEPTED_ALIASES_PATH).aliases)
 
 # Analysis window
 YEAR_MIN = 1992
@@ -70,14 +79,23 @@ dac2 = dac2.groupby(['donor', 'recipient', 'year', 'a_iso3', 'b_iso3'], as_index
 print(f"✓ OECD DAC2: {len(dac2)} bilateral ODA records")
 
 debt = pd.read_csv(os.path.join(INPUT_DIR, 'worldbank_bilateral_debt.csv'))
-debt = standardize_debt(debt)
+debt = standardize_debt(debt, resolver=resolver)
 print(f"✓ Debt: {len(debt)} bilateral debt records")
 
 # Static datasets
 coldat = pd.read_csv(os.path.join(INPUT_DIR, 'coldat_colonial_ties.csv'))
-coldat = standardize_coldat(coldat)
+coldat = standardize_coldat(coldat, resolver=resolver)
 print(f"✓ COLDAT: {len(coldat)} colonial relationships")
 
+# Compact keys: every ISO3 column becomes a categorical over the shared country
+# table (country_codes.py) and year int16, so the groupbys and merges below run
+# on integer codes. Values stay float64 throughout.
+cpj = apply_schema(cpj, schema={}, float_dtype=None)
+sipri = apply_schema(sipri, schema={}, float_dtype=None)
+dac2 = apply_schema(dac2, schema={}, float_dtype=None)
+debt = apply_schema(debt, schema={}, float_dtype=None)
+coldat = apply_schema(coldat, schema={}, float_dtype=None)
+
 # =============================================================================
 # CREATE DYADIC PANEL STRUCTURE
 # =============================================================================
@@ -108,19 +126,19 @@ print(f"Unique senders: {len(all_senders)}")
 # =============================================================================
 
 # SIPRI (arms transfers)
-sipri_agg = sipri.groupby(['supplier_iso3', 'recipient_iso3', 'year']).agg({
+sipri_agg = sipri.groupby(['supplier_iso3', 'recipient_iso3', 'year'], observed=True).agg({
     'tiv': 'sum'
 }).reset_index()
 sipri_agg.columns = ['sender_iso3', 'recipient_iso3', 'year', 'arms_tiv']
 
 # OECD DAC2 (bilateral ODA)
-dac2_agg = dac2.groupby(['a_iso3', 'b_iso3', 'year']).agg({
+dac2_agg = dac2.groupby(['a_iso3', 'b_iso3', 'year'], observed=True).agg({
     'oda_value': 'sum'
 }).reset_index()
 dac2_agg.columns = ['sender_iso3', 'recipient_iso3', 'year', 'bilateral_oda']
 
 # Debt (bilateral debt)
-debt_agg = debt.groupby(['creditor_iso3', 'debtor_iso3', 'year']).agg({
+debt_agg = debt.groupby(['creditor_iso3', 'debtor_iso3', 'year'], observed=True).agg({
     'debt_stock': 'sum'
 }).reset_index()
 debt_agg.columns = ['sender_iso3', 'recipient_iso3', 'year', 'bilateral_debt']
@@ -129,16 +147,10 @@ debt_agg.columns = ['sender_iso3', 'recipient_iso3', 'year', 'bilateral_debt']
 # BUILD BASE PANEL FROM ALL OBSERVED DYADS
 # =============================================================================
 
-# Combine all dyadic observations to get the universe of sender-recipient-year
-all_dyads = pd.concat([
-    sipri_agg[['sender_iso3', 'recipient_iso3', 'year']],
-    dac2_agg[['sender_iso3', 'recipient_iso3', 'year']],
-    debt_agg[['sender_iso3', 'recipient_iso3', 'year']],
-])
-
-# Get unique dyads within analysis window
-panel = all_dyads.drop_duplicates().copy()
-panel = panel[(panel['year'] >= YEAR_MIN) & (panel['year'] <= YEAR_MAX)]
+# Universe of sender-recipient-year dyads, keyed as int64 (see dyad_index.py),
+# in order of first appearance and restricted to the analysis window
+dyads = DyadIndex.from_frames([sipri_agg, dac2_agg, debt_agg]).between_years(YEAR_MIN, YEAR_MAX)
+panel = dyads.to_frame()
 
 print(f"\nBase panel: {len(panel)} sender-recipient-year observations")
 
@@ -146,10 +158,10 @@ print(f"\nBase panel: {len(panel)} sender-recipient-year observations")
 # MERGE IN EACH DATASET
 # =============================================================================
 
-# Bilateral variables (left join — missing = no relationship)
-panel = panel.merge(sipri_agg, on=['sender_iso3', 'recipient_iso3', 'year'], how='left')
-panel = panel.merge(dac2_agg, on=['sender_iso3', 'recipient_iso3', 'year'], how='left')
-panel = panel.merge(debt_agg, on=['sender_iso3', 'recipient_iso3', 'year'], how='left')
+# Bilateral variables (left join on the dyad key — missing = no relationship)
+panel['arms_tiv'] = dyads.align(sipri_agg, 'arms_tiv')
+panel['bilateral_oda'] = dyads.align(dac2_agg, 'bilateral_oda')
+panel['bilateral_debt'] = dyads.align(debt_agg, 'bilateral_debt')
 
 # Fill SIPRI: missing = no arms transfer = 0
 panel['arms_tiv'] = panel['arms_tiv'].fillna(0)
@@ -157,22 +169,21 @@ panel['arms_tiv'] = panel['arms_tiv'].fillna(0)
 # Debt and ODA: keep as NaN (genuinely missing vs zero is meaningful)
 
 # Add colonial ties (static — doesn't vary by year)
-coldat_binary = coldat[['colony_iso3', 'colonizer_iso3']].drop_duplicates()
-coldat_binary['colonial_tie'] = 1
-coldat_binary.columns = ['recipient_iso3', 'sender_iso3', 'colonial_tie']
-
-panel = panel.merge(coldat_binary, on=['sender_iso3', 'recipient_iso3'], how='left')
-panel['colonial_tie'] = panel['colonial_tie'].fillna(0).astype(int)
+coldat_pairs = coldat[['colony_iso3', 'colonizer_iso3']].dropna()
+panel['colonial_tie'] = dyads.has_pair(coldat_pairs['colonizer_iso3'], coldat_pairs['colony_iso3'])
 
 # Add target variable (journalist killings in recipient country)
-cpj_subset = cpj[['iso3', 'year', 'journalist_killings']].copy()
-cpj_subset.columns = ['recipient_iso3', 'year', 'journalist_killings']
-
-panel = panel.merge(cpj_subset, on=['recipient_iso3', 'year'], how='left')
+cpj_subset = cpj[['iso3', 'year', 'journalist_killings']].dropna(subset=['iso3', 'year'])
+panel['journalist_killings'] = dyads.align_recipient_year(
+    cpj_subset['iso3'], cpj_subset['year'], cpj_subset['journalist_killings'])
 
 # Fill missing journalist killings with 0 (absence from CPJ = no killings recorded)
 panel['journalist_killings'] = panel['journalist_killings'].fillna(0)
 
+# Compact keys only: the flows stay float64 so the CSV below is unchanged;
+# write_panel applies the float32 dyadic schema to the Parquet copy alone
+panel = apply_schema(panel, schema={}, float_dtype=None)
+
 # =============================================================================
 # SUMMARY STATISTICS
 # =============================================================================
@@ -184,6 +195,7 @@ print(f"Total observations: {len(panel)}")
 print(f"Unique senders: {panel['sender_iso3'].nunique()}")
 print(f"Unique recipients: {panel['recipient_iso3'].nunique()}")
 print(f"Year range: {panel['year'].min()} - {panel['year'].max()}")
+print(f"Memory: {panel.memory_usage(deep=True).sum() / 1e6:.1f} MB")
 print(f"\nColumn coverage (non-null %):")
 for col in panel.columns:
     if col not in ['sender_iso3', 'recipient_iso3', 'year']:
@@ -198,11 +210,15 @@ print(f"Total journalist killings in panel: {panel['journalist_killings'].sum():
 # =============================================================================
 
 output_path = os.path.join(OUTPUT_DIR, 'panel_dyadic_1992_2024.csv')
-panel.to_csv(output_path, index=False)
+# colonial_tie is written as 0/1 so the CSV reads the same as before
+panel.astype({'colonial_tie': 'int8'}).to_csv(output_path, index=False)
+# Typed Parquet copy for column/year-selective reads (see panel_store.py)
+parquet_output_path = write_panel(panel, output_path)
 
 print(f"\n{'='*60}")
 print("OUTPUT SAVED")
 print(f"{'='*60}")
 print(f"✓ {output_path}")
+print(f"✓ {parquet_output_path}")
 print(f"  ({len(panel)} rows, {len(panel.columns)} columns)")
 print(f"  Columns: {panel.columns.tolist()}")
\ No newline at end of file
@@ -0,0 +1,414 @@
+# monadic_collapse.py
+# Dyadic -> recipient-year and sender-year collapse with any number of aggregation specs
+#
+# Notebook 12 collapses the dyadic panel with one groupby().agg() for a fixed
+# spec (sum / max / first), and notebook 13 reloads the dyadic panel and
+# groups it again for the mean of econ_neocol_score_log. Here the panel is
+# sorted once by an integer country-year key ((year - first year) x codes +
+# the global country code, small enough for numpy's radix sort) and every
+# aggregate is a segment reduction over the sorted columns
+# (np.add.reduceat, np.fmax.reduceat, ...). Each input column is gathered
+# into sorted order once and shared by all specs that read it, so a new
+# monadic variant costs one reduction, not another read and groupby.
+#
+# A spec maps output names to (column, op) or (column, op, {params}). The ops
+# are the entries of REDUCTIONS:
+#   sum, mean, max, min, first, last, count   as pandas' groupby (NaNs skipped;
+#                                             sum of an all-NaN group is 0,
+#                                             first / last are the first / last
+#                                             non-null values)
+#   positive                                  rows with a value > 0
+#   size                                      rows per country-year
+#   hhi                                       Herfindahl index of the rows'
+#                                             shares of the column (NaN -> 0)
+#   top_share (k=1)                           share of the k largest rows
+# Every row of the dyadic panel is one partner, so on the recipient side
+# hhi / top_share are over senders and on the sender side over recipients
+# (clients). params may also hold 'post', a function applied to the result
+# (notebook 12 applies log1p(x * 1e9) to the econ score sum). SPECS holds
+# notebook 12's and notebook 13's specs and sender concentration measures;
+# SENDER_SPECS the patrons' exposure (totals, number of clients, client HHI).
+#
+# BidirectionalCollapse builds both sides from the same converted columns in
+# one job, and write_panels() stores them as Parquet through panel_store
+# (ISO3 columns as categoricals over the shared country table). Patron
+# features are joined back to recipients with patron_features(): a gather of
+# sender-year values onto the recipient-sorted dyads and one more segment
+# reduction, without regrouping.
+#
+# USAGE: Run from project root directory:
+#   python src/monadic_collapse.py [dyadic.csv]   # both panels, Parquet
+# or
+#   from monadic_collapse import BidirectionalCollapse
+#   collapse = BidirectionalCollapse(dyadic)
+#   recipient, sender = collapse.compute()
+#   recipient['arms_top1'] = collapse.recipient.reduce('arms_tiv', 'top_share', k=1)
+#   patrons = collapse.patron_features(sender, ['arms_n_clients'], weight='arms_tiv')
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, SCRIPT_DIR)
+
+from country_codes import decode
+from country_year import CountryYearArrays
+from dyad_index import _codes, _years
+from panel_store import write_panel
+
+MERGED_DIR = os.path.join(PROJECT_ROOT, 'data', 'merged')
+DYADIC_PATH = os.path.join(MERGED_DIR, 'dyadic_panel_1992_2024_oda_capped_log.csv')
+OUTPUT_PATH = os.path.join(MERGED_DIR, 'panel_monadic_collapse_1992_2024.parquet')
+SENDER_OUTPUT_PATH = os.path.join(MERGED_DIR, 'panel_sender_1992_2024.parquet')
+
+KEY = ['recipient_iso3', 'year']
+SENDER_KEY = ['sender_iso3', 'year']
+
+# Ops whose result keeps an integer / bool input's dtype (as pandas does)
+_KEEP_DTYPE = {'sum', 'max', 'min', 'first', 'last'}
+
+
+# =============================================================================
+# SEGMENTS
+# =============================================================================
+
+class Segments:
+    """Rows sorted by an int64 key; segment g is rows starts[g] .. starts[g] + sizes[g]"""
+
+    def __init__(self, keys):
+        # Small non-negative keys sort as uint16 (numpy's radix sort, O(n))
+        small = len(keys) and keys.min() >= 0 and keys.max() <= np.iinfo(np.uint16).max
+        self.order = np.argsort(keys.astype(np.uint16) if small else keys, kind='stable')
+        sorted_keys = keys[self.order]
+        first = np.r_[True, sorted_keys[1:] != sorted_keys[:-1]] if len(keys) else np.zeros(0, bool)
+        self.starts = np.flatnonzero(first)
+        self.sizes = np.diff(np.r_[self.starts, len(keys)])
+        self.keys = sorted_keys[self.starts]
+        self.segment = np.cumsum(first) - 1
+
+    def __len__(self):
+        return len(self.starts)
+
+    def reduceat(self, ufunc, values):
+        if not len(self.starts):
+            return np.zeros(0, dtype=values.dtype)
+        return ufunc.reduceat(values, self.starts)
+
+
+# =============================================================================
+# REDUCTIONS
+# =============================================================================
+
+REDUCTIONS = {}
+
+
+def reduction(name, **defaults):
+    """Add fn(values, segments, **params) -> one value per segment to REDUCTIONS
+
+    values are the column's float64 values in segment order.
+    """
+    def decorator(fn):
+        REDUCTIONS[name] = {'fn': fn, 'defaults': defaults}
+        return fn
+    return decorator
+
+
+def _present(values):
+    return ~np.isnan(values)
+
+
+@reduction('sum')
+def segment_sum(values, seg):
+    return seg.reduceat(np.add, np.where(_present(values), values, 0.0))
+
+
+@reduction('count')
+def segment_count(values, seg):
+    return seg.reduceat(np.add, _present(values).astype(np.int64))
+
+
+@reduction('positive')
+def segment_positive(values, seg):
+    return seg.reduceat(np.add, (values > 0).astype(np.int64))
+
+
+@reduction('size')
+def segment_size(values, seg):
+    return seg.sizes.copy()
+
+
+@reduction('mean')
+def segment_mean(values, seg):
+    count = segment_count(values, seg)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(count > 0, segment_sum(values, seg) / count, np.nan)
+
+
+@reduction('max')
+def segment_max(values, seg):
+    return seg.reduceat(np.fmax, values)
+
+
+@reduction('min')
+def segment_min(values, seg):
+    return seg.reduceat(np.fmin, values)
+
+
+def _first_valid(values, seg, ufunc, fill):
+    pos = np.where(_present(values), np.arange(len(values)), fill)
+    pick = seg.reduceat(ufunc, pos)
+    found = pick != fill
+    out = np.full(len(seg), np.nan)
+    out[found] = values[pick[found]]
+    return out
+
+
+@reduction('first')
+def segment_first(values, seg):
+    return _first_valid(values, seg, np.minimum, len(values))
+
+
+@reduction('last')
+def segment_last(values, seg):
+    return _first_valid(values, seg, np.maximum, -1)
+
+
+def _shares_base(values):
+    return np.where(_present(values), np.maximum(values, 0.0), 0.0)
+
+
+@reduction('hhi')
+def segment_hhi(values, seg):
+    x = _shares_base(values)
+    total = seg.reduceat(np.add, x)
+    squares = seg.reduceat(np.add, x * x)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(total > 0, squares / (total * total), np.nan)
+
+
+@reduction('top_share', k=1)
+def segment_top_share(values, seg, k):
+    x = _shares_base(values)
+    # Largest first within each segment, then the rank inside the segment
+    order = np.lexsort((-x, seg.segment))
+    rank = np.arange(len(x)) - seg.starts[seg.segment[order]]
+    top = np.bincount(seg.segment[order][rank < k], weights=x[order][rank < k], minlength=len(seg))
+    total = seg.reduceat(np.add, x)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(total > 0, top / total, np.nan)
+
+
+# =============================================================================
+# SPECS
+# =============================================================================
+
+# Notebook 12: recipient-level columns are constant within recipient-year
+NOTEBOOK_12_DEDUP = ['journalist_killings', 'gdp_per_capita', 'gdp_per_capita_log',
+                     'population', 'population_log', 'armed_conflict', 'conflict_intensity']
+
+SPECS = {
+    'notebook_12': {
+        'arms_tiv_total': ('arms_tiv', 'sum'),
+        'oda_total': ('bilateral_oda', 'sum'),
+        'colonial_tie_flag': ('colonial_tie', 'max'),
+        **{col: (col, 'first') for col in NOTEBOOK_12_DEDUP},
+        'econ_neocol_score_total': ('econ_neocol_score', 'sum', {'post': lambda x: np.log1p(x * 1e9)}),
+    },
+    'notebook_13': {
+        'econ_neocol_score_mean': ('econ_neocol_score_log', 'mean'),
+    },
+    # Recipient side. Senders are counted with 'positive': merge_datasets
+    # fills arms_tiv with 0 on every ODA / debt-only dyad, so 'count' would
+    # count all of a recipient's dyads
+    'concentration': {
+        'arms_tiv_n_senders': ('arms_tiv', 'positive'),
+        'arms_tiv_sender_hhi': ('arms_tiv', 'hhi'),
+        'arms_tiv_top1_share': ('arms_tiv', 'top_share', {'k': 1}),
+        'oda_n_senders': ('bilateral_oda', 'positive'),
+        'oda_sender_hhi': ('bilateral_oda', 'hhi'),
+        'oda_top3_share': ('bilateral_oda', 'top_share', {'k': 3}),
+        'econ_neocol_score_sender_hhi': ('econ_neocol_score', 'hhi'),
+    },
+}
+DEFAULT_SPECS = ['notebook_12', 'notebook_13', 'concentration']
+
+# Sender side: what each patron distributes, to how many clients
+SENDER_SPECS = {
+    'exposure': {
+        'arms_tiv_out_total': ('arms_tiv', 'sum'),
+        'arms_n_clients': ('arms_tiv', 'positive'),
+        'arms_client_hhi': ('arms_tiv', 'hhi'),
+        'oda_out_total': ('bilateral_oda', 'sum'),
+        'oda_n_clients': ('bilateral_oda', 'positive'),
+        'oda_client_hhi': ('bilateral_oda', 'hhi'),
+        'econ_neocol_score_out_total': ('econ_neocol_score', 'sum', {'post': lambda x: np.log1p(x * 1e9)}),
+        'econ_n_clients': ('econ_neocol_score', 'positive'),
+        'colonial_n_clients': ('colonial_tie', 'positive'),
+    },
+}
+DEFAULT_SENDER_SPECS = ['exposure']
+
+
+# =============================================================================
+# COLLAPSE
+# =============================================================================
+
+class MonadicCollapse:
+    """A dyadic panel sorted once by country-year (key: recipient or sender side), reduced on demand"""
+
+    def __init__(self, df, key=KEY, values=None):
+        country, year = key
+        self.df = df
+        self.key = list(key)
+        # groupby drops rows with a missing key
+        self.rows = np.flatnonzero((df[country].notna() & df[year].notna()).to_numpy())
+        codes = _codes(df[country].iloc[self.rows], country)
+        years = _years(df[year].iloc[self.rows])
+        # Dense country-year key: (year - first year) * n_codes + code
+        year_min = years.min() if len(years) else 0
+        width = codes.max() + 1 if len(codes) else 1
+        self.segments = Segments((years - year_min) * width + codes)
+        self.sorted_rows = self.rows[self.segments.order]
+
+        # Output rows sorted like groupby: by country name, then year
+        self.country = decode(self.segments.keys % width)
+        self.year = self.segments.keys // width + year_min
+        self.output_order = np.lexsort((self.year, self.country.astype(str)))
+        # Columns in panel row order, shareable between collapses of one panel
+        self._values = {} if values is None else values
+        self._columns = {}
+
+    def __len__(self):
+        return len(self.segments)
+
+    def values(self, name):
+        """A column as float64 in panel row order (converted once)"""
+        if name not in self._values:
+            self._values[name] = self.df[name].to_numpy(dtype=np.float64, na_value=np.nan)
+        return self._values[name]
+
+    def column(self, name):
+        """A column's float64 values in segment order (gathered once)"""
+        if name not in self._columns:
+            self._columns[name] = self.values(name)[self.sorted_rows]
+        return self._columns[name]
+
+    def reduce_sorted(self, values, op, **params):
+        """One aggregate per country-year of values already in segment order, in output row order"""
+        if op not in REDUCTIONS:
+            raise KeyError(f"unknown reduction {op!r} (registered: {', '.join(REDUCTIONS)})")
+        entry = REDUCTIONS[op]
+        post = params.pop('post', None)
+        unknown = set(params) - set(entry['defaults'])
+        if unknown:
+            raise TypeError(f"{op} has no parameter(s) {', '.join(sorted(unknown))}")
+        out = entry['fn'](values, self.segments, **{**entry['defaults'], **params})[self.output_order]
+        return post(out) if post is not None else out
+
+    def reduce(self, column, op, **params):
+        """One aggregate of a panel column per country-year, in output row order"""
+        post = params.pop('post', None)
+        values = self.reduce_sorted(self.column(column), op, **params)
+
+        dtype = self.df[column].dtype
+        if op in _KEEP_DTYPE and (pd.api.types.is_integer_dtype(dtype) or pd.api.types.is_bool_dtype(dtype)) \
+                and not np.isnan(values).any():
+            values = values.astype(np.int64 if op == 'sum' else dtype)
+        return post(values) if post is not None else values
+
+    def compute(self, *specs, registry=SPECS):
+        """country-year frame with the outputs of every spec (registry names or dicts)
+
+        Outputs whose input column is not in the panel are left out.
+        """
+        out = {self.key[0]: self.country[self.output_order], self.key[1]: self.year[self.output_order]}
+        for spec in specs:
+            spec = registry[spec] if isinstance(spec, str) else spec
+            for name, (column, op, *params) in spec.items():
+                if column not in self.df.columns:
+                    continue
+                out[name] = self.reduce(column, op, **(dict(params[0]) if params else {}))
+        return pd.DataFrame(out)
+
+
+class BidirectionalCollapse:
+    """Recipient-year and sender-year collapses of one dyadic panel
+
+    Both sides share the panel's float64 columns (each converted once); each
+    side sorts the rows by its own country-year key once.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        values = {}
+        self.recipient = MonadicCollapse(df, KEY, values=values)
+        self.sender = MonadicCollapse(df, SENDER_KEY, values=values)
+
+    def compute(self, recipient_specs=DEFAULT_SPECS, sender_specs=DEFAULT_SENDER_SPECS):
+        """(recipient-year panel, sender-year panel)"""
+        return (self.recipient.compute(*recipient_specs),
+                self.sender.compute(*sender_specs, registry=SENDER_SPECS))
+
+    def patron_features(self, sender_panel, columns, weight=None, prefix='patron_'):
+        """Sender-year features averaged over each recipient-year's senders
+
+        sender_panel is a sender-year panel (from compute() or read back with
+        read_panel(SENDER_OUTPUT_PATH), float64 as written); its values are gathered onto the dyads through the
+        shared country codes (country_year.CountryYearArrays) and reduced
+        over the recipient segments the panel is already sorted into, so
+        nothing is regrouped. With weight (a dyadic column, e.g. arms_tiv)
+        the mean is weighted by it; NaN features and weights are skipped.
+        """
+        side = self.recipient
+        arrays = CountryYearArrays.from_frame(sender_panel, columns, *SENDER_KEY)
+        rows = side.sorted_rows
+        positions = arrays.locate(_codes(self.df[SENDER_KEY[0]].iloc[rows], SENDER_KEY[0]),
+                                  _years(self.df[SENDER_KEY[1]].iloc[rows]))
+
+        out = {KEY[0]: side.country[side.output_order], KEY[1]: side.year[side.output_order]}
+        w = side.column(weight) if weight is not None else None
+        for col in columns:
+            x = arrays.take(col, positions)
+            if w is None:
+                out[f'{prefix}{col}'] = side.reduce_sorted(x, 'mean')
+                continue
+            ok = ~np.isnan(x) & ~np.isnan(w)
+            num = side.reduce_sorted(np.where(ok, x * w, 0.0), 'sum')
+            den = side.reduce_sorted(np.where(ok, w, 0.0), 'sum')
+            with np.errstate(invalid='ignore', divide='ignore'):
+                out[f'{prefix}{col}'] = np.where(den > 0, num / den, np.nan)
+        return pd.DataFrame(out)
+
+
+def collapse_monadic(df, specs=DEFAULT_SPECS):
+    """Recipient-year panel of df under the given specs"""
+    return MonadicCollapse(df).compute(*specs)
+
+
+def collapse_bidirectional(df, recipient_specs=DEFAULT_SPECS, sender_specs=DEFAULT_SENDER_SPECS):
+    """(recipient-year panel, sender-year panel) of df in one job"""
+    return BidirectionalCollapse(df).compute(recipient_specs, sender_specs)
+
+
+def write_panels(recipient, sender, recipient_path=OUTPUT_PATH, sender_path=SENDER_OUTPUT_PATH):
+    """Store both panels as Parquet (panel_store: shared ISO3 categoricals, one row group per year)
+
+    Aggregates are stored as float64, and panel_store.read_panel returns
+    them as float64 (it only downcasts dyadic panels, and only with
+    compact=True). Returns the two file paths.
+    """
+    return (write_panel(recipient, recipient_path, schema={}, float_dtype=None),
+            write_panel(sender, sender_path, schema={}, float_dtype=None))
+
+
+if __name__ == '__main__':
+    path = sys.argv[1] if len(sys.argv) > 1 else DYADIC_PATH
+
+    dyadic = pd.read_csv(path)
+    recipient, sender = collapse_bidirectional(dyadic)
+    for frame, output_path in zip((recipient, sender), write_panels(recipient, sender)):
+        print(f"✓ {output_path}  {frame.shape}")
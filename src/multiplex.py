@@ -0,0 +1,174 @@
+# multiplex.py
+# Temporal multiplex network: shared node index, per-(year, layer) CSR slices
+#
+# The four layers (arms_tiv, bilateral_oda, colonial_tie, econ_neocol_score)
+# used to be materialized as a long edge list (four stacked copies of the
+# dyadic key columns) that every consumer re-filtered by year and layer with
+# boolean masks. MultiplexGraph builds the network once, straight from the
+# dyadic panel:
+#   - one node index: labels (sorted ISO3 codes) shared by all years and
+#     layers; the nodes of a year are the countries appearing that year as
+#     sender or recipient, identical in every layer
+#   - all year x layer graphs in one block-diagonal CSR matrix (GraphBatch),
+#     so the vectorized measures in network_engine.py run on it directly
+#   - graph(year, layer) is a dict lookup plus three array views: the slice
+#     shares data with the batch matrix (no copy, no rescan)
+#   - aggregated (summed over layers) and temporal (one layer over all years)
+#     graphs are built once from the slices and cached
+#
+# USAGE:
+#   from multiplex import MultiplexGraph
+#   G = MultiplexGraph.from_panel(dyadic_panel)
+#   G.graph(2010, 'bilateral_oda')      # CSR over G.nodes(2010)
+#   G.edges(2007, 'arms_tiv')           # sender_iso3, recipient_iso3, weight
+#   G.summary()                         # nodes / edges / density / reciprocity per graph
+#   compute_network_measures(G)         # notebook 11's measures
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from network_engine import LAYERS, GraphBatch, encode_countries, layer_weights
+
+
+class MultiplexGraph(GraphBatch):
+    """Year x layer directed weighted graphs over a shared node index"""
+
+    @classmethod
+    def from_panel(cls, df, layers=LAYERS, weights=None):
+        """Build from the dyadic panel (edge weights as in notebook 11's edge list)
+
+        weights: {layer: weight per panel row} to use instead of notebook 11's.
+        """
+        weights = layer_weights(df) if weights is None else weights
+        sender, recipient, labels = encode_countries(df['sender_iso3'], df['recipient_iso3'])
+        k = len(layers)
+        return cls.from_arrays(
+            np.tile(df['year'].to_numpy(dtype=np.int64), k),
+            np.repeat(np.arange(k), len(df)),
+            np.tile(sender, k),
+            np.tile(recipient, k),
+            np.concatenate([np.asarray(weights[layer], dtype=np.float64) for layer in layers]),
+            layers=layers, labels=labels,
+        )
+
+    def _build(self, *args, **kwargs):
+        super()._build(*args, **kwargs)
+        n_graphs = len(self.sizes)
+        self.graph_ids = {(int(y), self.layers[l]): g
+                          for g, (y, l) in enumerate(zip(self.graph_year, self.graph_layer))}
+        self.year_rows = np.searchsorted(self.row_year_pos, np.arange(len(self.years) + 1))
+        self._cache = {}
+
+        # Slice-local column indices and row pointers, laid out like the
+        # batch's, so every graph's CSR arrays are plain views
+        a = self.adjacency
+        node_graph = np.repeat(np.arange(n_graphs), self.sizes)
+        self._local_indices = (a.indices - self.offsets[node_graph[a.indices]]).astype(a.indices.dtype)
+        ptr_graph = np.repeat(np.arange(n_graphs), self.sizes + 1)
+        ptr_row = np.arange(self.n + n_graphs) - ptr_graph
+        self._local_indptr = (a.indptr[ptr_row] - a.indptr[self.offsets[ptr_graph]]).astype(a.indptr.dtype)
+
+    def with_weights(self, weight):
+        batch = super().with_weights(weight)
+        # Aggregated / temporal graphs were summed from the old weights
+        batch._cache = {}
+        return batch
+
+    # =========================================================================
+    # SLICES
+    # =========================================================================
+
+    def graph_id(self, year, layer):
+        try:
+            return self.graph_ids[(int(year), layer)]
+        except KeyError:
+            raise KeyError(f"no graph for year {year}, layer {layer}") from None
+
+    def nodes(self, year):
+        """Countries of a year, in node order of its graphs"""
+        y = int(np.searchsorted(self.years, year))
+        if y >= len(self.years) or self.years[y] != year:
+            raise KeyError(f"no graphs for year {year}")
+        return self.node_country[self.year_rows[y]:self.year_rows[y + 1]]
+
+    def graph(self, year, layer=None):
+        """CSR of one (year, layer) graph, sharing memory with the batch matrix
+
+        graph(g) with a single int keeps GraphBatch's graph-number access.
+        """
+        g = year if layer is None else self.graph_id(year, layer)
+        start, size = self.offsets[g], self.sizes[g]
+        a, b = self.adjacency.indptr[start], self.adjacency.indptr[start + size]
+        p = start + g
+        # The csr constructor copies small views of large arrays (prune), so
+        # the views are attached to an empty matrix of the right shape instead
+        view = sparse.csr_matrix((size, size), dtype=self.adjacency.dtype)
+        view.data = self.adjacency.data[a:b]
+        view.indices = self._local_indices[a:b]
+        view.indptr = self._local_indptr[p:p + size + 1]
+        return view
+
+    def edges(self, year, layer):
+        """Edges of one graph as sender_iso3, recipient_iso3, weight"""
+        coo = self.graph(year, layer).tocoo()
+        nodes = self.nodes(year)
+        return pd.DataFrame({'sender_iso3': nodes[coo.row], 'recipient_iso3': nodes[coo.col],
+                             'weight': coo.data})
+
+    def aggregate(self, year, layers=None, weights=None):
+        """Sum of a year's layer graphs (optionally weighted), cached"""
+        layers = tuple(self.layers if layers is None else layers)
+        weights = tuple(np.ones(len(layers)) if weights is None else weights)
+        key = ('aggregate', int(year), layers, weights)
+        if key not in self._cache:
+            total = self.graph(year, layers[0]) * weights[0]
+            for layer, w in zip(layers[1:], weights[1:]):
+                total = total + self.graph(year, layer) * w
+            self._cache[key] = total.tocsr()
+        return self._cache[key]
+
+    def temporal(self, layer):
+        """One layer over all years as a block-diagonal CSR (year blocks in order), cached"""
+        key = ('temporal', layer)
+        if key not in self._cache:
+            self._cache[key] = sparse.block_diag(
+                [self.graph(y, layer) for y in self.years], format='csr')
+        return self._cache[key]
+
+    # =========================================================================
+    # DIAGNOSTICS
+    # =========================================================================
+
+    def summary(self):
+        """Per graph: year, layer, nodes, edges, density, reciprocity"""
+        ptr = self.adjacency.indptr
+        edges = ptr[self.offsets + self.sizes] - ptr[self.offsets]
+        # Block-diagonal, so A .* A^T only pairs edges within the same graph
+        mutual = self.adjacency.multiply(self.adjacency.T).tocsr()
+        mutual_edges = mutual.indptr[self.offsets + self.sizes] - mutual.indptr[self.offsets]
+        possible = self.sizes * (self.sizes - 1)
+        return pd.DataFrame({
+            'year': self.graph_year,
+            'layer': np.asarray(self.layers)[self.graph_layer],
+            'nodes': self.sizes,
+            'edges': edges,
+            'density': np.divide(edges, possible, out=np.zeros(len(edges)), where=possible > 0),
+            'reciprocity': np.divide(mutual_edges, edges, out=np.full(len(edges), np.nan), where=edges > 0),
+        })
+
+    def pair_keys(self, layer):
+        """Unique (sender, recipient) pairs with an edge in any year of a layer, as int64 keys"""
+        # temporal() rows / columns are node-table rows (year blocks in order)
+        coo = self.temporal(layer).tocoo()
+        return np.unique(self.node_code[coo.row] * len(self.labels) + self.node_code[coo.col])
+
+    def layer_overlap(self):
+        """Jaccard similarity of the layers' edge sets, pooled over years"""
+        keys = {layer: self.pair_keys(layer) for layer in self.layers}
+        out = pd.DataFrame(np.nan, index=self.layers, columns=self.layers)
+        for a in self.layers:
+            for b in self.layers:
+                union = len(np.union1d(keys[a], keys[b]))
+                out.loc[a, b] = len(np.intersect1d(keys[a], keys[b])) / union if union else np.nan
+        return out
@@ -0,0 +1,442 @@
+# network_engine.py
+# Vectorized network measures for the four-layer network (notebook 11)
+#
+# Notebook 11's compute_measures builds an nx.DiGraph per year x layer with
+# iterrows() and loops over nodes in Python. Here all year x layer graphs are
+# stored as one block-diagonal scipy CSR matrix (graph g owns a contiguous
+# block of node ids), built straight from the edge_list arrays, so:
+#   in-strength / out-strength  = column / row sums
+#   in-concentration (HHI)      = column sums of squared weights / in-strength^2
+#   dependency balance          = log1p(in) - log1p(out)
+# are computed for every graph at once. PageRank runs the same power iteration
+# as nx.pagerank (alpha 0.85, uniform teleport and dangling redistribution)
+# on all graphs together, with per-graph convergence checks; graphs that do
+# not converge are reported instead of being zeroed.
+#
+# The output matches notebook 11 column for column:
+#   network_measures:  country, {layer}_{measure} ..., year
+#   lagged features:   recipient_iso3, year, {layer}_{measure}_lag1 ...
+#
+# USAGE:
+#   from network_engine import build_edge_list, compute_network_measures, lag_measures
+#   edge_list = build_edge_list(dyadic_panel)
+#   network_measures = compute_network_measures(edge_list)
+#   network_features_lagged = lag_measures(network_measures)
+#
+# or from project root: python src/network_engine.py  (writes NETWORK_OUTPUT_PATH)
+
+import copy
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+MERGED_DIR = os.path.join(PROJECT_ROOT, 'data', 'merged')
+DYADIC_PATH = os.path.join(MERGED_DIR, 'dyadic_panel_1992_2024_oda_capped_log.csv')
+NETWORK_OUTPUT_PATH = os.path.join(MERGED_DIR, 'network_measures_1992_2024.csv')
+
+# Layers in notebook 11's (sorted) order and the measures computed per layer
+LAYERS = ['arms_tiv', 'bilateral_oda', 'colonial_tie', 'econ_neocol_score']
+MEASURES = ['in_strength', 'out_strength', 'dependency_balance', 'in_concentration', 'pagerank']
+
+# nx.pagerank defaults
+PAGERANK_ALPHA = 0.85
+PAGERANK_MAX_ITER = 100
+PAGERANK_TOL = 1e-06
+
+
+# =============================================================================
+# EDGE LIST
+# =============================================================================
+
+def layer_weights(df):
+    """Edge weight of every dyadic panel row per layer, in notebook 11's edge list order"""
+    return {
+        'arms_tiv': np.log1p(df['arms_tiv'].fillna(0)),
+        'bilateral_oda': np.log1p(df['bilateral_oda'].fillna(0)),
+        'econ_neocol_score': df['econ_neocol_score_log'].fillna(0),
+        'colonial_tie': df['colonial_tie'],
+    }
+
+
+def build_edge_list(df):
+    """Long edge list (sender_iso3, recipient_iso3, year, layer, weight), as in notebook 11"""
+    keys = df[['sender_iso3', 'recipient_iso3', 'year']]
+    return pd.concat(
+        [keys.assign(layer=layer, weight=weight) for layer, weight in layer_weights(df).items()],
+        ignore_index=True,
+    )
+
+
+def encode_countries(sender, recipient):
+    """(sender codes, recipient codes, labels); codes index labels, the sorted country names"""
+    sender = np.asarray(sender, dtype=object).astype(str)
+    recipient = np.asarray(recipient, dtype=object).astype(str)
+    codes, uniques = pd.factorize(np.concatenate([sender, recipient]))
+    order = np.argsort(uniques.astype(str))
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    inverse = rank[codes]
+    return inverse[:len(sender)], inverse[len(sender):], uniques[order]
+
+
+def encode_edges(edge_list, layers):
+    """Edge list as integer arrays: (year, layer, sender, recipient, weight), labels
+
+    sender / recipient are positions in labels, the sorted country names, so
+    sorting by code sorts by country. layer is the position in layers.
+    """
+    sender, recipient, labels = encode_countries(edge_list['sender_iso3'], edge_list['recipient_iso3'])
+    layer = pd.Categorical(edge_list['layer'], categories=layers).codes
+    arrays = (
+        edge_list['year'].to_numpy(dtype=np.int64),
+        layer.astype(np.int64),
+        sender,
+        recipient,
+        edge_list['weight'].to_numpy(dtype=np.float64),
+    )
+    return arrays, labels
+
+
+# =============================================================================
+# GRAPH BATCH
+# =============================================================================
+
+class GraphBatch:
+    """All year x layer graphs of an edge list as one block-diagonal CSR matrix
+
+    Graphs are ordered year-major, layer-minor. The nodes of a year (every
+    country appearing as sender or recipient that year) are shared by all its
+    layers, and graph g uses node ids offsets[g] .. offsets[g] + sizes[g].
+    Only positive weights become edges (NaN / 0 = no observed tie).
+    """
+
+    def __init__(self, edge_list, layers=None):
+        layers = sorted(edge_list['layer'].unique()) if layers is None else list(layers)
+        edge_list = edge_list[edge_list['layer'].isin(layers)]
+        arrays, labels = encode_edges(edge_list, layers)
+        self._build(*arrays, layers=layers, labels=labels)
+
+    @classmethod
+    def from_arrays(cls, year, layer, sender, recipient, weight, layers, labels):
+        """Batch from integer-coded edges (see encode_edges)"""
+        batch = cls.__new__(cls)
+        batch._build(year, layer, sender, recipient, weight, layers=layers, labels=labels)
+        return batch
+
+    def _build(self, year, layer, sender, recipient, weight, layers, labels):
+        self.layers = list(layers)
+        n_layers = len(self.layers)
+        year = np.asarray(year, dtype=np.int64)
+        sender = np.asarray(sender, dtype=np.int64)
+        recipient = np.asarray(recipient, dtype=np.int64)
+        n_labels = max(len(labels), 1)
+
+        # Node table: unique (year, country) pairs, sorted; labels are sorted,
+        # so code order is country order
+        node_keys, inverse = np.unique(
+            np.concatenate([year * n_labels + sender, year * n_labels + recipient]),
+            return_inverse=True)
+        s_row, r_row = inverse[:len(year)], inverse[len(year):]
+
+        self.labels = np.asarray(labels, dtype=object)
+        self.node_year = node_keys // n_labels
+        self.node_code = node_keys % n_labels
+        self.node_country = self.labels[self.node_code]
+        self.years = np.unique(self.node_year)
+        year_pos = np.searchsorted(self.years, self.node_year)
+        year_sizes = np.bincount(year_pos, minlength=len(self.years))
+        year_starts = np.r_[0, np.cumsum(year_sizes)[:-1]]
+        node_local = np.arange(len(node_keys)) - year_starts[year_pos]
+
+        self.sizes = np.repeat(year_sizes, n_layers)
+        self.offsets = np.r_[0, np.cumsum(self.sizes)[:-1]].astype(np.int64)
+        self.graph_year = np.repeat(self.years, n_layers)
+        self.graph_layer = np.tile(np.arange(n_layers), len(self.years))
+        self.n = int(self.sizes.sum())
+
+        # Global node id of (year row i, layer l): offsets[year_i * L + l] + local_i
+        self.row_year_pos = year_pos
+        self.row_local = node_local
+
+        # Edges: positive weights only; a repeated (sender, recipient) in one
+        # graph keeps its last weight, like nx.DiGraph.add_edge
+        weight = np.asarray(weight, dtype=np.float64)
+        keep = weight > 0
+        s_row, r_row = s_row[keep], r_row[keep]
+        graph = year_pos[s_row] * n_layers + np.asarray(layer, dtype=np.int64)[keep]
+        src = self.offsets[graph] + node_local[s_row]
+        dst = self.offsets[graph] + node_local[r_row]
+        w = weight[keep]
+
+        flat = src * self.n + dst
+        _, last = np.unique(flat[::-1], return_index=True)
+        last = len(flat) - 1 - last
+        self.adjacency = sparse.csr_matrix((w[last], (src[last], dst[last])), shape=(self.n, self.n))
+
+        # Input position of every stored edge (last is in CSR order: sorted by
+        # row, then column), so other weights of the same edges can be swapped in
+        self.edge_mask = keep
+        self.edge_source = np.flatnonzero(keep)[last]
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def graph(self, g):
+        """CSR adjacency of graph g (rows = senders, columns = recipients)"""
+        start, stop = self.offsets[g], self.offsets[g] + self.sizes[g]
+        return self.adjacency[start:stop, start:stop]
+
+    def node_ids(self, layer):
+        """Global node id of every (year, country) row for one layer index"""
+        return self.offsets[self.row_year_pos * len(self.layers) + layer] + self.row_local
+
+    def with_weights(self, weight):
+        """The same graphs with other edge weights (one per input edge, input order)
+
+        Node index and CSR structure are shared with this batch; only the data
+        array is new. The weights must be positive on exactly the same input
+        rows, otherwise the edge set differs and a new batch is needed.
+        """
+        weight = np.asarray(weight, dtype=np.float64)
+        if weight.shape != self.edge_mask.shape or not np.array_equal(weight > 0, self.edge_mask):
+            raise ValueError("new weights change the edge set; build a new batch instead")
+        batch = copy.copy(self)
+        a = self.adjacency
+        batch.adjacency = sparse.csr_matrix((weight[self.edge_source], a.indices, a.indptr), shape=a.shape)
+        return batch
+
+
+# =============================================================================
+# MEASURES
+# =============================================================================
+
+def strength_measures(adjacency):
+    """in/out strength, dependency balance and HHI in-concentration per node"""
+    in_strength = np.asarray(adjacency.sum(axis=0)).ravel()
+    out_strength = np.asarray(adjacency.sum(axis=1)).ravel()
+    squared = np.asarray(adjacency.multiply(adjacency).sum(axis=0)).ravel()
+
+    in_concentration = np.zeros_like(in_strength)
+    has_in = in_strength > 0
+    in_concentration[has_in] = squared[has_in] / in_strength[has_in] ** 2
+
+    return {
+        'in_strength': in_strength,
+        'out_strength': out_strength,
+        'dependency_balance': np.log1p(in_strength) - np.log1p(out_strength),
+        'in_concentration': in_concentration,
+    }
+
+
+def pagerank(adjacency, alpha=PAGERANK_ALPHA, max_iter=PAGERANK_MAX_ITER, tol=PAGERANK_TOL):
+    """nx.pagerank power iteration on one graph; None if it does not converge"""
+    n = adjacency.shape[0]
+    if n == 0:
+        return np.empty(0)
+    x, _, converged, _ = power_iterate(adjacency, np.zeros(n, dtype=np.int64), np.array([n]),
+                                       alpha=alpha, max_iter=max_iter, tol=tol)
+    return x if converged[0] else None
+
+
+def power_iterate(adjacency, node_graph, sizes, x0=None, alpha=PAGERANK_ALPHA,
+                  max_iter=PAGERANK_MAX_ITER, tol=PAGERANK_TOL):
+    """PageRank power iteration on a block-diagonal batch of graphs
+
+    node_graph maps every node id to its graph, sizes holds the node count of
+    each graph and tol may be a scalar or one tolerance per graph. Every graph
+    follows nx.pagerank (uniform teleport, dangling mass spread over its own
+    nodes, converged once the L1 change is below n * tol) and is frozen as
+    soon as it converges, so each block gets exactly the vector nx would
+    return. x0 (per-graph normalized here) is the starting vector; uniform by
+    default.
+
+    Returns (x, iterations, converged, residual), the last three per graph.
+    """
+    n_graphs = len(sizes)
+    sizes = np.asarray(sizes)
+    tol = np.broadcast_to(np.asarray(tol, dtype=np.float64), (n_graphs,))
+
+    out = np.asarray(adjacency.sum(axis=1)).ravel()
+    inv = np.zeros(len(out))
+    inv[out != 0] = 1.0 / out[out != 0]
+    # x @ (D^-1 A) as a CSR matvec
+    transition_t = (sparse.diags(inv) @ adjacency).T.tocsr()
+    dangling = np.flatnonzero(out == 0)
+    p = 1.0 / sizes[node_graph]
+
+    if x0 is None:
+        x = p.copy()
+    else:
+        x = np.asarray(x0, dtype=np.float64).copy()
+        totals = np.bincount(node_graph, weights=x, minlength=n_graphs)
+        empty = totals[node_graph] <= 0
+        x[empty] = p[empty]
+        x[~empty] /= totals[node_graph][~empty]
+
+    def step(x):
+        dangling_mass = np.bincount(node_graph[dangling], weights=x[dangling], minlength=n_graphs)
+        return alpha * (transition_t @ x + dangling_mass[node_graph] * p) + (1 - alpha) * p
+
+    return iterate_batch(step, x, node_graph, sizes * tol, max_iter)
+
+
+def iterate_batch(step, x, node_graph, threshold, max_iter):
+    """Fixed-point iteration x <- step(x) on a batch of graphs
+
+    A graph is converged (and frozen) once the L1 change of its block falls
+    below threshold[g]. Returns (x, iterations, converged, residual), the
+    last three per graph.
+    """
+    n_graphs = len(threshold)
+    iterations = np.zeros(n_graphs, dtype=np.int64)
+    converged = np.zeros(n_graphs, dtype=bool)
+    residual = np.full(n_graphs, np.inf)
+    for _ in range(max_iter):
+        active = ~converged
+        if not active.any():
+            break
+        new = step(x)
+        moving = active[node_graph]
+        err = np.bincount(node_graph, weights=np.abs(new - x) * moving, minlength=n_graphs)
+        x = np.where(moving, new, x)
+        iterations[active] += 1
+        residual[active] = err[active]
+        converged |= active & (err < threshold)
+    return x, iterations, converged, residual
+
+
+def _previous_year_start(batch, scores, year_pos):
+    """Starting vector for one year's graphs: last year's scores by country"""
+    n_layers = len(batch.layers)
+    rows = np.flatnonzero(batch.row_year_pos == year_pos)
+    prev_rows = np.flatnonzero(batch.row_year_pos == year_pos - 1)
+    match = pd.Index(batch.node_country[prev_rows]).get_indexer(batch.node_country[rows])
+    first = batch.offsets[year_pos * n_layers]
+    x0 = np.zeros(sum(batch.sizes[year_pos * n_layers:(year_pos + 1) * n_layers]))
+    for l in range(n_layers):
+        ids = batch.offsets[year_pos * n_layers + l] + batch.row_local[rows]
+        prev_ids = batch.offsets[(year_pos - 1) * n_layers + l] + batch.row_local[prev_rows]
+        # Countries new this year start at the mean score of the matched ones
+        x0[ids - first] = np.where(match >= 0, scores[prev_ids][match],
+                                   scores[prev_ids].mean() if len(prev_ids) else 0.0)
+    return x0
+
+
+def pagerank_batch(batch, alpha=PAGERANK_ALPHA, max_iter=PAGERANK_MAX_ITER, tol=PAGERANK_TOL,
+                   warm_start=False, x0=None):
+    """PageRank of every graph in the batch, iterated together
+
+    Returns (scores over all node ids, report) where report has one row per
+    graph: year, layer, nodes, iterations, converged, residual. Graphs that
+    do not converge keep their last iterate and are flagged in the report
+    (notebook 11 replaced them with zeros).
+
+    x0: starting vector over the batch's node ids, e.g. the scores of another
+        edge-weight variant of the same edge list.
+    warm_start: solve year by year (all layers of a year together), starting
+        each year from the previous year's scores matched by country.
+    """
+    node_graph = np.repeat(np.arange(len(batch)), batch.sizes)
+    tol = np.broadcast_to(np.asarray(tol, dtype=np.float64), (len(batch),))
+
+    if not warm_start:
+        scores, iterations, converged, residual = power_iterate(
+            batch.adjacency, node_graph, batch.sizes, x0=x0,
+            alpha=alpha, max_iter=max_iter, tol=tol)
+    else:
+        n_layers = len(batch.layers)
+        scores = np.zeros(batch.n)
+        iterations = np.zeros(len(batch), dtype=np.int64)
+        converged = np.zeros(len(batch), dtype=bool)
+        residual = np.zeros(len(batch))
+        for y in range(len(batch.years)):
+            graphs = slice(y * n_layers, (y + 1) * n_layers)
+            start = batch.offsets[y * n_layers]
+            stop = start + batch.sizes[graphs].sum()
+            start_x = None if y == 0 else _previous_year_start(batch, scores, y)
+            (scores[start:stop], iterations[graphs], converged[graphs],
+             residual[graphs]) = power_iterate(
+                batch.adjacency[start:stop, start:stop], node_graph[start:stop] - y * n_layers,
+                batch.sizes[graphs], x0=start_x, alpha=alpha, max_iter=max_iter, tol=tol[graphs])
+
+    report = pd.DataFrame({
+        'year': batch.graph_year,
+        'layer': np.asarray(batch.layers)[batch.graph_layer],
+        'nodes': batch.sizes,
+        'iterations': iterations,
+        'converged': converged,
+        'residual': residual,
+    })
+    return scores, report
+
+
+def measure_columns(batch, pagerank_fn=pagerank_batch):
+    """{layer}_{measure} arrays over the batch's (year, country) rows, and the PageRank report"""
+    measures = strength_measures(batch.adjacency)
+    measures['pagerank'], report = pagerank_fn(batch)
+
+    columns = {}
+    for l, layer in enumerate(batch.layers):
+        ids = batch.node_ids(l)
+        for measure in MEASURES:
+            columns[f'{layer}_{measure}'] = measures[measure][ids]
+    return columns, report
+
+
+def assemble_measures(country, year, columns, report):
+    """network_measures frame from row labels and measure columns"""
+    failed = report[~report['converged']]
+    for row in failed.itertuples():
+        print(f"PageRank did not converge for layer {row.layer} ({row.year}): "
+              f"residual {row.residual:.2e} after {row.iterations} iterations")
+
+    network_measures = pd.DataFrame({'country': country, **columns, 'year': year})
+    network_measures.attrs['pagerank_report'] = report
+    return network_measures
+
+
+def compute_network_measures(edge_list, layers=None, pagerank_fn=pagerank_batch):
+    """Notebook 11's network_measures frame: country, {layer}_{measure}..., year
+
+    edge_list may also be an already built GraphBatch / MultiplexGraph.
+    pagerank_fn(batch) returns (scores, report); the report is kept in
+    network_measures.attrs['pagerank_report'].
+    """
+    batch = GraphBatch(edge_list, layers=layers) if isinstance(edge_list, pd.DataFrame) else edge_list
+    columns, report = measure_columns(batch, pagerank_fn)
+    return assemble_measures(batch.node_country, batch.node_year, columns, report)
+
+
+def lag_measures(network_measures, lag=1):
+    """Per-country shifted features, renamed to recipient_iso3 (notebook 11's lag step)"""
+    df = network_measures.sort_values(['country', 'year'], kind='stable')
+    feature_cols = [c for c in df.columns if c not in ('country', 'year')]
+
+    country = df['country'].to_numpy()
+    values = df[feature_cols].to_numpy(dtype=np.float64)
+    lagged = np.full_like(values, np.nan)
+    same = country[lag:] == country[:-lag]
+    lagged[lag:][same] = values[:-lag][same]
+
+    out = pd.DataFrame(lagged, columns=[f'{c}_lag{lag}' for c in feature_cols], index=df.index)
+    out.insert(0, 'year', df['year'].to_numpy())
+    out.insert(0, 'recipient_iso3', country)
+    return out
+
+
+if __name__ == '__main__':
+    path = sys.argv[1] if len(sys.argv) > 1 else DYADIC_PATH
+    output_path = sys.argv[2] if len(sys.argv) > 2 else NETWORK_OUTPUT_PATH
+
+    from multiplex import MultiplexGraph
+
+    df = pd.read_csv(path)
+    network_measures = compute_network_measures(MultiplexGraph.from_panel(df))
+    network_features_lagged = lag_measures(network_measures)
+    network_features_lagged.to_csv(output_path, index=False)
+    print(f"✓ {output_path}  {network_features_lagged.shape}")
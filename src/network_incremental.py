@@ -0,0 +1,268 @@
+# network_incremental.py
+# Incremental year-over-year update of the network measures table
+#
+# network_measures_1992_2024.csv (notebook 11 / network_engine.py) holds the
+# per-country _lag1 network features. Appending a data year or correcting one
+# year's flows used to mean recomputing every year x layer graph and the whole
+# lag table. Here every (year, layer) edge set is fingerprinted by a content
+# hash; on update only graphs whose hash changed are recomputed, the cached
+# unlagged measures are patched, and only the _lag1 cells that read from a
+# changed graph are rewritten in the stored table.
+#
+# A year whose node set changed (countries added or dropped) is recomputed in
+# all layers, since every layer's in/out strength rows and PageRank teleport
+# depend on the node set.
+#
+# Cache (cache/ next to the output, e.g. data/merged/cache/):
+#   <output>_unlagged.parquet   measures per (country, year), unlagged
+#   <output>_graphs.json        sha256 per (year, layer) edge set
+# Without a cache (first run, or a table written by notebook 11) everything is
+# computed once and the cache is created.
+#
+# USAGE: Run from project root directory:
+#   python src/network_incremental.py [dyadic_panel.csv] [output.csv] [--full]
+
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPT_DIR)
+from network_engine import (DYADIC_PATH, LAYERS, MEASURES, NETWORK_OUTPUT_PATH,
+                            build_edge_list, compute_network_measures, lag_measures)
+from panel_store import parquet_path, write_panel
+
+LAG = 1
+
+
+# =============================================================================
+# GRAPH HASHES
+# =============================================================================
+
+def _graph_key(year, layer):
+    return f'{int(year)}/{layer}'
+
+
+def graph_hashes(edge_list):
+    """sha256 of every (year, layer) edge set -> {'year/layer': hexdigest}
+
+    Rows are hashed in (sender, recipient) order, so the fingerprint does not
+    depend on the row order of the dyadic panel. Zero weights are included:
+    they define the year's node set even though they are not edges.
+    """
+    el = edge_list.sort_values(['year', 'layer', 'sender_iso3', 'recipient_iso3'],
+                               kind='stable', ignore_index=True)
+    el = el.assign(sender_iso3=el['sender_iso3'].astype(str),
+                   recipient_iso3=el['recipient_iso3'].astype(str),
+                   weight=el['weight'].astype(np.float64))
+    row_hashes = pd.util.hash_pandas_object(
+        el[['sender_iso3', 'recipient_iso3', 'weight']], index=False).to_numpy()
+
+    year = el['year'].to_numpy()
+    layer = el['layer'].astype(str).to_numpy()
+    starts = np.flatnonzero(np.r_[True, (year[1:] != year[:-1]) | (layer[1:] != layer[:-1])])
+    ends = np.r_[starts[1:], len(el)]
+    return {_graph_key(year[s], layer[s]): hashlib.sha256(row_hashes[s:e].tobytes()).hexdigest()
+            for s, e in zip(starts, ends)}
+
+
+def year_nodes(edge_list, years):
+    """Sorted node set (countries as sender or recipient) of each year"""
+    el = edge_list[edge_list['year'].isin(years)]
+    nodes = pd.concat([
+        el[['year', 'sender_iso3']].set_axis(['year', 'country'], axis=1),
+        el[['year', 'recipient_iso3']].set_axis(['year', 'country'], axis=1),
+    ]).astype({'country': str}).drop_duplicates()
+    return {int(y): np.sort(g['country'].to_numpy()) for y, g in nodes.groupby('year')}
+
+
+# =============================================================================
+# CACHE
+# =============================================================================
+
+def cache_paths(output_path):
+    """(unlagged measures path, graph hashes path) for a lag table path"""
+    cache_dir = os.path.join(os.path.dirname(os.path.abspath(output_path)), 'cache')
+    stem = os.path.splitext(os.path.basename(output_path))[0]
+    return (os.path.join(cache_dir, f'{stem}_unlagged.parquet'),
+            os.path.join(cache_dir, f'{stem}_graphs.json'))
+
+
+def load_cache(output_path=NETWORK_OUTPUT_PATH):
+    """(hashes, unlagged measures, stored lag table), or None if incomplete"""
+    unlagged_path, hashes_path = cache_paths(output_path)
+    if not (os.path.exists(hashes_path) and os.path.exists(unlagged_path)
+            and os.path.exists(output_path)):
+        return None
+    with open(hashes_path) as f:
+        hashes = json.load(f)
+    unlagged = pd.read_parquet(unlagged_path)
+    unlagged['country'] = unlagged['country'].astype(str)
+    stored = pd.read_csv(output_path)
+    return hashes, unlagged, stored
+
+
+def save(hashes, unlagged, lagged, output_path=NETWORK_OUTPUT_PATH):
+    unlagged_path, hashes_path = cache_paths(output_path)
+    # attrs holds the PageRank report (a DataFrame), which Parquet metadata cannot store
+    unlagged = unlagged.copy()
+    unlagged.attrs = {}
+    write_panel(unlagged, unlagged_path, schema={}, float_dtype=None)
+    with open(hashes_path, 'w') as f:
+        json.dump(hashes, f, indent=1, sort_keys=True)
+
+    lagged.to_csv(output_path, index=False)
+    # Keep a Parquet copy (panel_store.py) in sync instead of letting read_panel serve it stale
+    if os.path.exists(parquet_path(output_path)):
+        write_panel(lagged, output_path, schema={}, float_dtype=None)
+
+
+# =============================================================================
+# UPDATE
+# =============================================================================
+
+def changed_graphs(hashes, old_hashes, edge_list, unlagged):
+    """{year: set of layers} to recompute, and the years that were dropped"""
+    changed = {}
+    for key, digest in hashes.items():
+        if old_hashes.get(key) != digest:
+            year, layer = key.split('/')
+            changed.setdefault(int(year), set()).add(layer)
+    new_years = {int(key.split('/')[0]) for key in hashes}
+    dropped = {int(key.split('/')[0]) for key in old_hashes} - new_years
+
+    # A changed node set invalidates every layer of that year
+    nodes = year_nodes(edge_list, list(changed))
+    for year in changed:
+        old_nodes = np.sort(unlagged.loc[unlagged['year'] == year, 'country'].to_numpy())
+        if not np.array_equal(nodes.get(year, np.empty(0)), old_nodes):
+            changed[year] = set(LAYERS)
+    return changed, dropped
+
+
+def recompute(edge_list, changed):
+    """Measures of the changed graphs only
+
+    Rows of unchanged layers in the changed years are kept with weight 0 so
+    the node set (and hence the measures of the changed layers) is the same
+    as in a full run; their empty graphs cost next to nothing.
+    """
+    el = edge_list[edge_list['year'].isin(list(changed))]
+    keep = np.array([layer in changed[year] for year, layer
+                     in zip(el['year'].to_numpy(), el['layer'].to_numpy())], dtype=bool)
+    el = el.assign(weight=el['weight'].where(keep, 0))
+    return compute_network_measures(el, layers=LAYERS)
+
+
+def _layer_columns(layer):
+    return [f'{layer}_{m}' for m in MEASURES]
+
+
+def patch_unlagged(unlagged, fresh, changed, dropped):
+    """Unlagged measures with the changed years' rows / layers replaced"""
+    years = set(changed) | dropped
+    kept = unlagged[~unlagged['year'].isin(years)]
+
+    rows = []
+    for year, layers in sorted(changed.items()):
+        new = fresh[fresh['year'] == year].reset_index(drop=True)
+        old = unlagged[unlagged['year'] == year].set_index('country')
+        for layer in set(LAYERS) - layers:
+            # Same node set (checked in changed_graphs): carry the old values over
+            cols = _layer_columns(layer)
+            new[cols] = old.loc[new['country'], cols].to_numpy()
+        rows.append(new)
+
+    out = pd.concat([kept] + rows, ignore_index=True)
+    return out.sort_values(['year', 'country'], ignore_index=True)
+
+
+def _previous_years(unlagged, lag=LAG):
+    """Per (country, year) row: the year its lag reads from (NaN if none)"""
+    df = unlagged[['country', 'year']].sort_values(['country', 'year'], kind='stable')
+    country = df['country'].to_numpy()
+    year = df['year'].to_numpy(dtype=np.float64)
+    prev = np.full(len(df), np.nan)
+    same = country[lag:] == country[:-lag]
+    prev[lag:][same] = year[:-lag][same]
+    return pd.Series(prev, index=pd.MultiIndex.from_arrays([country, df['year'].to_numpy()]))
+
+
+def patch_lagged(stored, unlagged, old_unlagged, changed, dropped):
+    """Rewrite only the _lag1 cells whose source row changed
+
+    A lag cell (country, year, layer) is rewritten when the row is new, when
+    the year it reads from changed in that layer, or when the year it reads
+    from moved (a country entering or leaving an intermediate year).
+    Returns (lag table, number of rewritten cells).
+    """
+    fresh = lag_measures(unlagged, lag=LAG)
+    keys = pd.MultiIndex.from_arrays([fresh['recipient_iso3'].to_numpy(), fresh['year'].to_numpy()])
+    stored_keys = pd.MultiIndex.from_arrays([stored['recipient_iso3'].astype(str).to_numpy(),
+                                             stored['year'].to_numpy()])
+
+    position = stored_keys.get_indexer(keys)
+    new_row = position < 0
+    prev_new = _previous_years(unlagged).reindex(keys).to_numpy()
+    prev_old = _previous_years(old_unlagged).reindex(keys).to_numpy()
+    moved = ~((prev_new == prev_old) | (np.isnan(prev_new) & np.isnan(prev_old)))
+
+    out = pd.DataFrame({'recipient_iso3': fresh['recipient_iso3'].to_numpy(),
+                        'year': fresh['year'].to_numpy()})
+    n_cells = 0
+    for layer in LAYERS:
+        touched = np.array([layer in changed.get(p, ()) if p == p else False for p in prev_new])
+        touched |= np.array([(layer in changed.get(p, ()) or p in dropped) if p == p else False
+                             for p in prev_old])
+        rewrite = new_row | moved | touched
+        for col in [f'{c}_lag{LAG}' for c in _layer_columns(layer)]:
+            values = np.full(len(out), np.nan)
+            values[~new_row] = stored[col].to_numpy()[position[~new_row]]
+            values[rewrite] = fresh[col].to_numpy()[rewrite]
+            out[col] = values
+        n_cells += int(rewrite.sum()) * len(MEASURES)
+    return out[stored.columns], n_cells
+
+
+def update_network_measures(edge_list, output_path=NETWORK_OUTPUT_PATH, full=False):
+    """Bring the stored lag table up to date with edge_list; returns the lag table"""
+    hashes = graph_hashes(edge_list)
+    cache = None if full else load_cache(output_path)
+
+    if cache is None:
+        unlagged = compute_network_measures(edge_list, layers=LAYERS)
+        lagged = lag_measures(unlagged, lag=LAG)
+        save(hashes, unlagged, lagged, output_path)
+        print(f"✓ Full computation: {len(hashes)} graphs, {len(lagged):,} rows")
+        return lagged
+
+    old_hashes, old_unlagged, stored = cache
+    changed, dropped = changed_graphs(hashes, old_hashes, edge_list, old_unlagged)
+    if not changed and not dropped:
+        print(f"✓ Network measures up to date ({len(hashes)} graphs unchanged)")
+        return stored
+
+    fresh = recompute(edge_list, changed) if changed else None
+    unlagged = patch_unlagged(old_unlagged, fresh, changed, dropped)
+    lagged, n_cells = patch_lagged(stored, unlagged, old_unlagged, changed, dropped)
+    save(hashes, unlagged, lagged, output_path)
+
+    n_graphs = sum(len(layers) for layers in changed.values())
+    print(f"✓ Recomputed {n_graphs} of {len(hashes)} graphs "
+          f"(years {', '.join(str(y) for y in sorted(changed)) or '-'}"
+          f"{'; dropped ' + ', '.join(str(y) for y in sorted(dropped)) if dropped else ''})")
+    print(f"✓ Patched {n_cells:,} lag cells in {os.path.basename(output_path)}")
+    return lagged
+
+
+if __name__ == '__main__':
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    path = args[0] if len(args) > 0 else DYADIC_PATH
+    output_path = args[1] if len(args) > 1 else NETWORK_OUTPUT_PATH
+
+    df = pd.read_csv(path)
+    update_network_measures(build_edge_list(df), output_path, full='--full' in sys.argv)
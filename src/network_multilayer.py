@@ -0,0 +1,183 @@
+# network_multilayer.py
+# Multilayer (supra-adjacency) centrality for the combined multiplex network
+#
+# Every measure in notebook 11 is computed per layer. Here the four layers of
+# a year are coupled into one supra-adjacency matrix (De Domenico et al.):
+#
+#   S = blockdiag(A_1, ..., A_L) + C (x) I_n
+#
+# where A_l is layer l's graph over the year's n countries (each country has
+# one replica per layer) and C is the L x L inter-layer coupling (omega off
+# the diagonal by default). Multiplex PageRank / eigenvector centrality are
+# computed on S and each country's versatility is the sum over its replicas.
+#
+# A MultiplexGraph already stores each year's layers as consecutive blocks
+# over the same node order, so the supra-adjacency of every year is the batch
+# matrix plus the coupling entries; all years are iterated together with the
+# batched power iteration of network_engine.py (per-year convergence).
+#
+# Layer weights are on different scales (log TIV / log ODA vs a 0-1 colonial
+# tie), so by default each (year, layer) graph is divided by its largest
+# weight before coupling (layer_scale='max'; None keeps raw weights).
+#
+# Output columns (per country-year, notebook 11 rows): multiplex_pagerank,
+# multiplex_eigenvector. Lagged with lag_measures() they are written as *_lag1
+# columns to their own table, network_multilayer_1992_2024.csv (notebook 11's
+# network_measures_1992_2024.csv is left as notebook 11 wrote it), and joined
+# onto a country-year panel with merge_multilayer() (notebook 14).
+#
+# USAGE: Run from project root directory:
+#   python src/network_multilayer.py [dyadic_panel.csv] [output.csv] [omega]
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPT_DIR)
+from network_engine import (DYADIC_PATH, NETWORK_OUTPUT_PATH, PAGERANK_ALPHA, PAGERANK_MAX_ITER,
+                            PAGERANK_TOL, iterate_batch, lag_measures, power_iterate)
+
+MULTILAYER_OUTPUT_PATH = os.path.join(os.path.dirname(NETWORK_OUTPUT_PATH), 'network_multilayer_1992_2024.csv')
+
+# Inter-layer coupling weight (off-diagonal entries of C)
+OMEGA = 1.0
+
+MULTILAYER_MEASURES = ['multiplex_pagerank', 'multiplex_eigenvector']
+
+EIGENVECTOR_MAX_ITER = 1000
+EIGENVECTOR_TOL = 1e-06
+
+
+# =============================================================================
+# SUPRA-ADJACENCY
+# =============================================================================
+
+def coupling_matrix(n_layers, omega=OMEGA):
+    """L x L inter-layer coupling: omega (scalar or matrix) with a zero diagonal"""
+    coupling = np.array(np.broadcast_to(np.asarray(omega, dtype=np.float64), (n_layers, n_layers)))
+    np.fill_diagonal(coupling, 0.0)
+    return coupling
+
+
+def supra_adjacency(batch, omega=OMEGA, layer_scale='max'):
+    """Supra-adjacency of every year as one block-diagonal CSR
+
+    Returns (matrix, supra_year, supra_sizes): node id -> year position, and
+    the number of replicas (countries x layers) of each year.
+    """
+    n_layers = len(batch.layers)
+    a = batch.adjacency.tocsr(copy=True)
+
+    if layer_scale == 'max':
+        node_graph = np.repeat(np.arange(len(batch)), batch.sizes)
+        row_graph = node_graph[np.repeat(np.arange(a.shape[0]), np.diff(a.indptr))]
+        graph_max = np.zeros(len(batch))
+        np.maximum.at(graph_max, row_graph, a.data)
+        a.data /= graph_max[row_graph]
+    elif layer_scale is not None:
+        raise ValueError(f"layer_scale must be 'max' or None, not {layer_scale!r}")
+
+    # Replica ids of every (year, country) row, one row per layer
+    replicas = np.stack([batch.node_ids(l) for l in range(n_layers)])
+    coupling = coupling_matrix(n_layers, omega)
+    src, dst, w = [], [], []
+    for l, m in zip(*np.nonzero(coupling)):
+        src.append(replicas[l])
+        dst.append(replicas[m])
+        w.append(np.full(replicas.shape[1], coupling[l, m]))
+    if src:
+        a = a + sparse.csr_matrix((np.concatenate(w), (np.concatenate(src), np.concatenate(dst))),
+                                  shape=a.shape)
+
+    supra_year = np.repeat(np.arange(len(batch)) // n_layers, batch.sizes)
+    supra_sizes = batch.sizes.reshape(-1, n_layers).sum(axis=1)
+    return a.tocsr(), supra_year, supra_sizes
+
+
+# =============================================================================
+# MEASURES
+# =============================================================================
+
+def multiplex_pagerank(supra, supra_year, supra_sizes, alpha=PAGERANK_ALPHA,
+                       max_iter=PAGERANK_MAX_ITER, tol=PAGERANK_TOL):
+    """PageRank on each year's supra-adjacency (teleport over all replicas)"""
+    return power_iterate(supra, supra_year, supra_sizes, alpha=alpha, max_iter=max_iter, tol=tol)
+
+
+def multiplex_eigenvector(supra, supra_year, supra_sizes, max_iter=EIGENVECTOR_MAX_ITER,
+                          tol=EIGENVECTOR_TOL):
+    """In-edge eigenvector centrality on each year's supra-adjacency ((S + I)^T iteration)"""
+    n_years = len(supra_sizes)
+    supra_t = supra.T.tocsr()
+
+    def step(x):
+        x = x + supra_t @ x
+        norm = np.sqrt(np.bincount(supra_year, weights=x ** 2, minlength=n_years))
+        norm[norm == 0] = 1.0
+        return x / norm[supra_year]
+
+    x0 = 1.0 / supra_sizes[supra_year]
+    return iterate_batch(step, x0, supra_year, supra_sizes * tol, max_iter)
+
+
+def versatility(batch, scores):
+    """Sum of a replica-level score over each country's layers, per notebook 11 row"""
+    return sum(scores[batch.node_ids(l)] for l in range(len(batch.layers)))
+
+
+def compute_multilayer_measures(batch, omega=OMEGA, layer_scale='max'):
+    """country, multiplex_pagerank, multiplex_eigenvector, year (one row per node of the batch)"""
+    supra, supra_year, supra_sizes = supra_adjacency(batch, omega, layer_scale)
+    pagerank, pr_iter, pr_conv, pr_res = multiplex_pagerank(supra, supra_year, supra_sizes)
+    eigen, ev_iter, ev_conv, ev_res = multiplex_eigenvector(supra, supra_year, supra_sizes)
+
+    report = pd.DataFrame({
+        'year': np.tile(batch.years, 2),
+        'measure': np.repeat(MULTILAYER_MEASURES, len(batch.years)),
+        'replicas': np.tile(supra_sizes, 2),
+        'iterations': np.r_[pr_iter, ev_iter],
+        'converged': np.r_[pr_conv, ev_conv],
+        'residual': np.r_[pr_res, ev_res],
+    })
+    for row in report[~report['converged']].itertuples():
+        print(f"{row.measure} did not converge ({row.year}): "
+              f"residual {row.residual:.2e} after {row.iterations} iterations")
+
+    measures = pd.DataFrame({
+        'country': batch.node_country,
+        'multiplex_pagerank': versatility(batch, pagerank),
+        'multiplex_eigenvector': versatility(batch, eigen),
+        'year': batch.node_year,
+    })
+    measures.attrs['convergence_report'] = report
+    return measures
+
+
+def merge_multilayer(table, multilayer_lagged=MULTILAYER_OUTPUT_PATH):
+    """Left-join the *_lag1 multilayer columns (frame or CSV path) onto a recipient-year table
+
+    Columns of the same name already in table are replaced.
+    """
+    if isinstance(multilayer_lagged, str):
+        multilayer_lagged = pd.read_csv(multilayer_lagged)
+    new_cols = [c for c in multilayer_lagged.columns if c not in ('recipient_iso3', 'year')]
+    table = table.drop(columns=[c for c in new_cols if c in table.columns])
+    return table.merge(multilayer_lagged, on=['recipient_iso3', 'year'], how='left')
+
+
+if __name__ == '__main__':
+    from multiplex import MultiplexGraph
+
+    path = sys.argv[1] if len(sys.argv) > 1 else DYADIC_PATH
+    output_path = sys.argv[2] if len(sys.argv) > 2 else MULTILAYER_OUTPUT_PATH
+    omega = float(sys.argv[3]) if len(sys.argv) > 3 else OMEGA
+
+    df = pd.read_csv(path)
+    measures = compute_multilayer_measures(MultiplexGraph.from_panel(df), omega=omega)
+    lagged = lag_measures(measures)
+    lagged.to_csv(output_path, index=False)
+    print(f"✓ {output_path}  {lagged.shape} (omega = {omega})")
@@ -0,0 +1,499 @@
+# network_null.py
+# Null-model benchmark for the network measures (degree / strength preserving)
+#
+# Notebook 15 reports coefficients of variation and reciprocity per layer but
+# gives no baseline for whether the observed in-strength / PageRank patterns
+# are more than what the degree sequences alone produce. Here every year x
+# layer graph is randomized many times and the notebook 11 measures are
+# recomputed on each replicate:
+#   degree     directed configuration model: every node keeps its in- and
+#              out-degree; recipient stubs are shuffled within the graph and
+#              each weight stays with its sender stub (out-strength kept too)
+#   strength   the same rewiring, then the weights are rescaled (RAS /
+#              iterative proportional fitting) toward the observed in- and
+#              out-strengths. In-strength is always met; out-strength only
+#              when the rewired graph admits it (a hub whose new recipients
+#              have little in-strength cannot reach its own). Graphs where
+#              some replicate misses by more than STRENGTH_TOL are warned
+#              about and get strength_preserved = False
+# Self-loops and repeated edges from the stub shuffle are removed by swapping
+# recipients with random edges of the same graph (vectorized rounds over all
+# graphs); edges that cannot be repaired are dropped and counted.
+#
+# Replicates are stacked into one block-diagonal CSR matrix per job and the
+# measures run on network_engine's batch engine (strength_measures,
+# power_iterate). Jobs go to a process pool over shared-memory edge arrays
+# (network_parallel.SharedArrays); each job has its own seed, so the result
+# does not depend on the number of processes.
+#
+# Output:
+#   nodes   country, year, layer, measure, observed, null_mean, null_std, z,
+#           p_greater, p_less (empirical, (1 + count) / (1 + replicates)),
+#           strength_preserved (of the node's graph)
+#   graphs  year, layer, statistic (nb15's in_strength_cv, pagerank_cv,
+#           reciprocity), observed, null mean / std / 2.5% / 97.5%, z, p-values,
+#           dropped_edges, ras_residual, strength_preserved
+#   samples replicate, year, layer, statistic, value (the null distributions)
+#
+# USAGE: Run from project root directory:
+#   python src/network_null.py [dyadic_panel.csv] [degree|strength] [n_replicates] [processes]
+# or
+#   from network_null import null_model_test
+#   nodes, graphs, samples = null_model_test(MultiplexGraph.from_panel(df), model='strength', n_replicates=1000)
+
+import multiprocessing as mp
+import os
+import sys
+import warnings
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, SCRIPT_DIR)
+from network_engine import DYADIC_PATH, MEASURES, power_iterate, strength_measures
+from network_parallel import SharedArrays, attach
+
+NULL_OUTPUT_DIR = os.path.join(PROJECT_ROOT, 'outputs', 'results')
+
+NULL_MODELS = ['degree', 'strength']
+GRAPH_STATISTICS = ['in_strength_cv', 'pagerank_cv', 'reciprocity']
+
+N_REPLICATES = 1000
+# Replicates stacked into one batch per job (memory ~ replicates x edges)
+REPLICATES_PER_JOB = 4
+REPAIR_ROUNDS = 100
+# Random partners tried per round, as a share of the edges (split over the bad edges)
+REPAIR_BUDGET = 0.25
+# Rounds without any repaired edge before the rest is given up (dropped)
+REPAIR_PATIENCE = 3
+RAS_MAX_ITER = 100
+RAS_TOL = 1e-08
+# Largest relative out-strength error for a strength-model graph to count as
+# strength preserving (ras_residual is the largest over its replicates)
+STRENGTH_TOL = 1e-06
+# Relative tolerance for counting a null value as equal to the observed one
+TIE_TOL = 1e-09
+
+
+# =============================================================================
+# RANDOMIZATION
+# =============================================================================
+
+def graph_edges(batch):
+    """(sender, recipient, weight, graph) of every edge in the batch, sorted by graph"""
+    a = batch.adjacency
+    src = np.repeat(np.arange(a.shape[0]), np.diff(a.indptr))
+    node_graph = np.repeat(np.arange(len(batch)), batch.sizes)
+    return src, a.indices.astype(np.int64), a.data.copy(), node_graph[src]
+
+
+def _shuffle_within(group, rng):
+    """Permutation that shuffles positions within runs of equal (sorted) group ids"""
+    return np.argsort(group + rng.random(len(group)), kind='stable')
+
+
+def _is_member(keys, sorted_keys):
+    if len(sorted_keys) == 0:
+        return np.zeros(len(keys), dtype=bool)
+    # Sorted needles: searchsorted walks the table once instead of cache-missing per key
+    order = np.argsort(keys)
+    pos = np.empty(len(keys), dtype=np.int64)
+    pos[order] = np.searchsorted(sorted_keys, keys[order])
+    pos[pos == len(sorted_keys)] = 0
+    return sorted_keys[pos] == keys
+
+
+def _remove_sorted(sorted_keys, keys):
+    """sorted_keys minus one copy of every key"""
+    keys = np.sort(keys)
+    pos = np.searchsorted(sorted_keys, keys)
+    run = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    pos += np.arange(len(keys)) - np.repeat(run, np.diff(np.r_[run, len(keys)]))
+    return np.delete(sorted_keys, pos)
+
+
+def _insert_sorted(sorted_keys, keys):
+    keys = np.sort(keys)
+    return np.insert(sorted_keys, np.searchsorted(sorted_keys, keys), keys)
+
+
+def _once(a, b):
+    """Mask over the pairs (a[i], b[i]) whose two items occur once in a and b together"""
+    _, inverse, counts = np.unique(np.r_[a, b], return_inverse=True, return_counts=True)
+    return (counts[inverse] == 1).reshape(2, -1).all(axis=0)
+
+
+def repair(src, dst, group, n_nodes, rng, max_rounds=REPAIR_ROUNDS):
+    """Remove self-loops and repeated edges by recipient swaps within each group
+
+    A bad edge a -> b and a random edge c -> d of its group become a -> d and
+    c -> b when neither new edge is a self-loop or already present (degrees
+    are unchanged). All bad edges are tried at once in each round, each with
+    several random partners once few are left (hub senders have few valid
+    ones). Returns the new recipients and a mask of edges still bad after
+    max_rounds (or once no swap is found for REPAIR_PATIENCE rounds).
+    """
+    dst = dst.copy()
+    counts = np.bincount(group)
+    starts = np.r_[0, np.cumsum(counts)[:-1]]
+
+    key = src * n_nodes + dst
+    order = np.argsort(key, kind='stable')
+    sorted_keys = key[order]
+    bad = np.zeros(len(src), dtype=bool)
+    bad[order[1:]] = sorted_keys[1:] == sorted_keys[:-1]
+    bad |= src == dst
+
+    stalled = 0
+    for _ in range(max_rounds):
+        b = np.flatnonzero(bad)
+        if len(b) == 0 or stalled == REPAIR_PATIENCE:
+            break
+        tries = max(int(REPAIR_BUDGET * len(src)) // len(b), 1)
+        b = np.repeat(b, tries)
+        p = starts[group[b]] + (rng.random(len(b)) * counts[group[b]]).astype(np.int64)
+        # Cheap self-loop test first, then the key lookups on what is left
+        valid = (src[b] != dst[p]) & (src[p] != dst[b])
+        k1 = src[b] * n_nodes + dst[p]
+        k2 = src[p] * n_nodes + dst[b]
+        valid[valid] = ~_is_member(k1[valid], sorted_keys)
+        valid[valid] = ~_is_member(k2[valid], sorted_keys)
+
+        # First valid partner of every bad edge, then every edge and every
+        # new edge in at most one swap
+        valid = valid.reshape(-1, tries)
+        pick = np.flatnonzero(valid.any(axis=1)) * tries + valid.argmax(axis=1)[valid.any(axis=1)]
+        b, p, k1, k2 = b[pick], p[pick], k1[pick], k2[pick]
+        ok = _once(b, p) & _once(k1, k2)
+        b, p, k1, k2 = b[ok], p[ok], k1[ok], k2[ok]
+        stalled = 0 if len(b) else stalled + 1
+        if len(b) == 0:
+            continue
+
+        sorted_keys = _remove_sorted(sorted_keys, np.r_[src[b] * n_nodes + dst[b],
+                                                        src[p] * n_nodes + dst[p]])
+        sorted_keys = _insert_sorted(sorted_keys, np.r_[k1, k2])
+        dst[b], dst[p] = dst[p], dst[b].copy()
+        # Both new edges are checked to be new and distinct, so both are fine
+        bad[b] = False
+        bad[p] = False
+    return dst, bad
+
+
+def ras(src, dst, weight, out_target, in_target, max_iter=RAS_MAX_ITER, tol=RAS_TOL):
+    """Rescale edge weights to the target out- and in-strengths (iterative proportional fitting)
+
+    Returns (weights, relative out-strength error per node); in-strengths are
+    exact after the last column step.
+    """
+    n = len(out_target)
+    weight = weight.copy()
+
+    def scale(target, current):
+        return np.divide(target, current, out=np.ones(n), where=current > 0)
+
+    for _ in range(max_iter):
+        weight *= scale(out_target, np.bincount(src, weights=weight, minlength=n))[src]
+        weight *= scale(in_target, np.bincount(dst, weights=weight, minlength=n))[dst]
+        out = np.bincount(src, weights=weight, minlength=n)
+        error = np.divide(np.abs(out - out_target), out_target, out=np.zeros(n), where=out_target > 0)
+        if error.max(initial=0.0) < tol:
+            break
+    return weight, error
+
+
+# =============================================================================
+# MEASURES
+# =============================================================================
+
+def _measures(src, dst, weight, node_graph, sizes):
+    """MEASURES over the node ids of a stacked batch, as a (measures, nodes) array"""
+    n = len(node_graph)
+    adjacency = sparse.csr_matrix((weight, (src, dst)), shape=(n, n))
+    measures = strength_measures(adjacency)
+    measures['pagerank'], _, _, _ = power_iterate(adjacency, node_graph, sizes)
+    return np.stack([measures[m] for m in MEASURES]), adjacency
+
+
+def _positive_cv(values, node_graph, n_graphs):
+    """std (ddof 1) / mean of each graph's positive values, as notebook 15"""
+    positive = values > 0
+    count = np.bincount(node_graph, weights=positive, minlength=n_graphs)
+    total = np.bincount(node_graph, weights=np.where(positive, values, 0.0), minlength=n_graphs)
+    mean = np.divide(total, count, out=np.full(n_graphs, np.nan), where=count > 0)
+    sq = np.bincount(node_graph, weights=np.where(positive, (values - mean[node_graph]) ** 2, 0.0),
+                     minlength=n_graphs)
+    std = np.sqrt(np.divide(sq, count - 1, out=np.full(n_graphs, np.nan), where=count > 1))
+    return np.divide(std, mean, out=np.full(n_graphs, np.nan), where=mean > 0)
+
+
+def graph_statistics(values, adjacency, node_graph, n_graphs):
+    """(graphs, GRAPH_STATISTICS) array: in-strength CV, PageRank CV, reciprocity"""
+    coo = adjacency.tocoo()
+    n = adjacency.shape[0]
+    keys = np.sort(coo.row.astype(np.int64) * n + coo.col)
+    mutual = _is_member(coo.col.astype(np.int64) * n + coo.row, keys)
+    edge_graph = node_graph[coo.row]
+    edges = np.bincount(edge_graph, minlength=n_graphs)
+    reciprocity = np.divide(np.bincount(edge_graph, weights=mutual, minlength=n_graphs), edges,
+                            out=np.zeros(n_graphs), where=edges > 0)
+    return np.column_stack([
+        _positive_cv(values[MEASURES.index('in_strength')], node_graph, n_graphs),
+        _positive_cv(values[MEASURES.index('pagerank')], node_graph, n_graphs),
+        reciprocity,
+    ])
+
+
+# =============================================================================
+# REPLICATES
+# =============================================================================
+
+def randomize(edges, n_nodes, n_graphs, observed, model, n_replicates, rng):
+    """n_replicates randomized copies of every graph as one stacked edge list
+
+    Replicate r uses node ids r * n_nodes + id and graph ids r * n_graphs + g.
+    Returns (sender, recipient, weight, dropped, error): dropped marks the
+    edges that could not be made simple (weight 0), error is the RAS relative
+    out-strength error per stacked node (zeros for the degree model).
+    """
+    if model not in NULL_MODELS:
+        raise ValueError(f"model must be one of {NULL_MODELS}, not {model!r}")
+    src, dst, weight, edge_graph = edges
+    rep = np.repeat(np.arange(n_replicates), len(src))
+    s = np.tile(src, n_replicates) + rep * n_nodes
+    d = np.tile(dst, n_replicates) + rep * n_nodes
+    group = np.tile(edge_graph, n_replicates) + rep * n_graphs
+    w = np.tile(weight, n_replicates)
+
+    # Configuration model: recipient stubs shuffled, weights stay with senders
+    d = d[_shuffle_within(group, rng)]
+    d, dropped = repair(s, d, group, n_nodes * n_replicates, rng)
+    w[dropped] = 0.0
+
+    error = np.zeros(n_nodes * n_replicates)
+    if model == 'strength':
+        keep = ~dropped
+        out_target = np.tile(observed[MEASURES.index('out_strength')], n_replicates)
+        in_target = np.tile(observed[MEASURES.index('in_strength')], n_replicates)
+        w[keep], error = ras(s[keep], d[keep], w[keep], out_target, in_target)
+    return s, d, w, dropped, error
+
+
+def null_replicates(edges, node_graph, sizes, observed, model, n_replicates, rng):
+    """Measures of n_replicates randomized copies of every graph, stacked
+
+    Returns (values (replicates, measures, nodes), graph statistics
+    (replicates, graphs, statistics), dropped edges per graph (summed over
+    replicates), largest RAS residual per graph).
+    """
+    n, n_graphs = len(node_graph), len(sizes)
+    s, d, w, dropped, error = randomize(edges, n, n_graphs, observed, model, n_replicates, rng)
+    stacked_graph = np.tile(node_graph, n_replicates) + np.repeat(np.arange(n_replicates), n) * n_graphs
+    dropped_per_graph = np.bincount(stacked_graph[s[dropped]] % n_graphs, minlength=n_graphs)
+    residual = np.zeros(n_graphs)
+    np.maximum.at(residual, stacked_graph % n_graphs, error)
+
+    keep = ~dropped
+    values, adjacency = _measures(s[keep], d[keep], w[keep], stacked_graph, np.tile(sizes, n_replicates))
+    stats = graph_statistics(values, adjacency, stacked_graph, n_graphs * n_replicates)
+    return (values.reshape(len(MEASURES), n_replicates, n).transpose(1, 0, 2),
+            stats.reshape(n_replicates, n_graphs, -1), dropped_per_graph, residual)
+
+
+def _summarize(values, observed):
+    """Per-job sums: (sum, sum of squares, count >= observed, count <= observed)"""
+    tie = TIE_TOL * np.maximum(np.abs(observed), 1e-300)
+    return (values.sum(axis=0), (values ** 2).sum(axis=0),
+            (values >= observed - tie).sum(axis=0), (values <= observed + tie).sum(axis=0))
+
+
+# =============================================================================
+# WORKER
+# =============================================================================
+
+_worker = {}
+
+
+def _init_worker(specs, model):
+    arrays, blocks = attach(specs)
+    _worker.update(arrays=arrays, blocks=blocks, model=model)
+
+
+def _run_job(job):
+    """Summaries of one job's replicates (in a worker or in-process)"""
+    n_replicates, seed = job
+    src, dst, weight, edge_graph, node_graph, sizes, observed = _worker['arrays']
+    values, stats, dropped, residual = null_replicates(
+        (src, dst, weight, edge_graph), node_graph, sizes, observed, _worker['model'],
+        n_replicates, np.random.default_rng(seed))
+    return _summarize(values, observed) + (stats, dropped, residual)
+
+
+def _jobs(n_replicates, per_job, seed):
+    sizes = [per_job] * (n_replicates // per_job)
+    if n_replicates % per_job:
+        sizes.append(n_replicates % per_job)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    return list(zip(sizes, seeds))
+
+
+# =============================================================================
+# TEST
+# =============================================================================
+
+def _p_values(count, n_replicates):
+    return (1.0 + count) / (1.0 + n_replicates)
+
+
+def _z(observed, mean, std):
+    """(observed - mean) / std; NaN where the null does not vary (up to rounding)"""
+    observed, mean, std = (np.asarray(x, dtype=np.float64) for x in (observed, mean, std))
+    varies = std > TIE_TOL * np.abs(mean)
+    return np.divide(observed - mean, std, out=np.full(len(std), np.nan), where=varies)
+
+
+def null_model_test(batch, model='degree', n_replicates=N_REPLICATES, processes=None, seed=0,
+                    replicates_per_job=REPLICATES_PER_JOB):
+    """Observed vs null distributions of the measures of every graph in a batch
+
+    Returns (nodes, graphs, samples); see the file header for the columns.
+    """
+    if model not in NULL_MODELS:
+        raise ValueError(f"model must be one of {NULL_MODELS}, not {model!r}")
+    edges = graph_edges(batch)
+    node_graph = np.repeat(np.arange(len(batch)), batch.sizes)
+    sizes = np.asarray(batch.sizes, dtype=np.int64)
+    observed, adjacency = _measures(*edges[:3], node_graph, sizes)
+    observed_stats = graph_statistics(observed, adjacency, node_graph, len(batch))
+
+    jobs = _jobs(n_replicates, replicates_per_job, seed)
+    processes = min(processes or os.cpu_count() or 1, len(jobs))
+    arrays = list(edges) + [node_graph, sizes, observed]
+    if processes == 1:
+        _worker.update(arrays=arrays, blocks=[], model=model)
+        parts = [_run_job(job) for job in jobs]
+    else:
+        shared = SharedArrays(arrays)
+        try:
+            with mp.get_context().Pool(processes, initializer=_init_worker,
+                                       initargs=(shared.specs, model)) as pool:
+                parts = pool.map(_run_job, jobs, chunksize=1)
+        finally:
+            shared.close()
+
+    total, total_sq, n_ge, n_le = (sum(p[i] for p in parts) for i in range(4))
+    stats = np.concatenate([p[4] for p in parts])
+    dropped = sum(p[5] for p in parts)
+    residual = np.max([p[6] for p in parts], axis=0)
+
+    # The degree model never preserves in-strength; RAS may fail to reach it
+    preserved = residual <= STRENGTH_TOL if model == 'strength' else np.zeros(len(batch), dtype=bool)
+    if model == 'strength':
+        layer = np.asarray(batch.layers)[batch.graph_layer]
+        for g in np.flatnonzero(~preserved):
+            warnings.warn(f"{layer[g]} {batch.graph_year[g]}: RAS left a relative out-strength "
+                          f"error of {residual[g]:.1%}; rows marked strength_preserved=False")
+
+    nodes = _node_table(batch, observed, total, total_sq, n_ge, n_le, n_replicates, preserved)
+    graphs, samples = _graph_table(batch, observed_stats, stats, dropped / n_replicates, residual,
+                                   preserved)
+    return nodes, graphs, samples
+
+
+def _node_table(batch, observed, total, total_sq, n_ge, n_le, n_replicates, preserved):
+    mean = total / n_replicates
+    std = np.sqrt(np.maximum(total_sq / n_replicates - mean ** 2, 0.0))
+    node_graph = np.repeat(np.arange(len(batch)), batch.sizes)
+    frames = []
+    for l, layer in enumerate(batch.layers):
+        ids = batch.node_ids(l)
+        for k, measure in enumerate(MEASURES):
+            frames.append(pd.DataFrame({
+                'country': batch.node_country,
+                'year': batch.node_year,
+                'layer': layer,
+                'measure': measure,
+                'observed': observed[k, ids],
+                'null_mean': mean[k, ids],
+                'null_std': std[k, ids],
+                'p_greater': _p_values(n_ge[k, ids], n_replicates),
+                'p_less': _p_values(n_le[k, ids], n_replicates),
+                'strength_preserved': preserved[node_graph[ids]],
+            }))
+    nodes = pd.concat(frames, ignore_index=True)
+    nodes.insert(7, 'z', _z(nodes['observed'], nodes['null_mean'], nodes['null_std']))
+    return nodes
+
+
+def _graph_table(batch, observed_stats, stats, dropped, residual, preserved):
+    n_replicates, n_graphs, _ = stats.shape
+    layer = np.asarray(batch.layers)[batch.graph_layer]
+    frames = []
+    for k, statistic in enumerate(GRAPH_STATISTICS):
+        obs, null = observed_stats[:, k], stats[:, :, k]
+        # Graphs without positive values have an all-NaN null (nan* warns)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            mean, std = np.nanmean(null, axis=0), np.nanstd(null, axis=0)
+            q025, q975 = np.nanquantile(null, [0.025, 0.975], axis=0)
+            n_ge = (null >= obs - TIE_TOL * np.abs(obs)).sum(axis=0)
+            n_le = (null <= obs + TIE_TOL * np.abs(obs)).sum(axis=0)
+        frames.append(pd.DataFrame({
+            'year': batch.graph_year,
+            'layer': layer,
+            'statistic': statistic,
+            'observed': obs,
+            'null_mean': mean,
+            'null_std': std,
+            'null_q025': q025,
+            'null_q975': q975,
+            'z': _z(obs, mean, std),
+            'p_greater': _p_values(n_ge, n_replicates),
+            'p_less': _p_values(n_le, n_replicates),
+            'dropped_edges': dropped,
+            'ras_residual': residual,
+            'strength_preserved': preserved,
+        }))
+    graphs = pd.concat(frames, ignore_index=True)
+
+    samples = pd.DataFrame({
+        'replicate': np.repeat(np.arange(n_replicates), n_graphs * len(GRAPH_STATISTICS)),
+        'year': np.tile(np.repeat(batch.graph_year, len(GRAPH_STATISTICS)), n_replicates),
+        'layer': np.tile(np.repeat(layer, len(GRAPH_STATISTICS)), n_replicates),
+        'statistic': np.tile(GRAPH_STATISTICS, n_replicates * n_graphs),
+        'value': stats.ravel(),
+    })
+    return graphs, samples
+
+
+def print_summary(graphs, alpha=0.05):
+    """Per layer and statistic: mean observed vs null, share of years outside the null"""
+    print(f"{'layer':20s} {'statistic':16s} {'observed':>10s} {'null':>10s} "
+          f"{'> null':>8s} {'< null':>8s}")
+    for (layer, statistic), rows in graphs.groupby(['layer', 'statistic'], sort=False):
+        print(f"{layer:20s} {statistic:16s} {rows['observed'].mean():10.4f} "
+              f"{rows['null_mean'].mean():10.4f} {(rows['p_greater'] < alpha).mean():8.0%} "
+              f"{(rows['p_less'] < alpha).mean():8.0%}")
+
+
+if __name__ == '__main__':
+    from multiplex import MultiplexGraph
+
+    path = sys.argv[1] if len(sys.argv) > 1 else DYADIC_PATH
+    model = sys.argv[2] if len(sys.argv) > 2 else 'degree'
+    n_replicates = int(sys.argv[3]) if len(sys.argv) > 3 else N_REPLICATES
+    processes = int(sys.argv[4]) if len(sys.argv) > 4 else None
+
+    df = pd.read_csv(path)
+    nodes, graphs, samples = null_model_test(MultiplexGraph.from_panel(df), model=model,
+                                             n_replicates=n_replicates, processes=processes)
+    print_summary(graphs)
+
+    os.makedirs(NULL_OUTPUT_DIR, exist_ok=True)
+    for name, table in (('nodes', nodes), ('graphs', graphs), ('samples', samples)):
+        output_path = os.path.join(NULL_OUTPUT_DIR, f'network_null_{model}_{name}.csv')
+        table.to_csv(output_path, index=False)
+        print(f"✓ {output_path}  {table.shape}")
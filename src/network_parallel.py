@@ -0,0 +1,156 @@
+# network_parallel.py
+# Year x layer network measures over a process pool
+#
+# Notebook 11 loops over years and layers one graph at a time and outer-merges
+# the per-layer frames of every year. network_engine.py already computes a
+# year range as one block-diagonal batch; here the years are split into
+# contiguous ranges of roughly equal edge count and fanned out over a process
+# pool:
+#   - the edge list is encoded once as integer arrays (encode_edges) sorted by
+#     year and placed in shared memory; each job only receives its
+#     (start, stop) slice bounds, nothing is pickled per job
+#   - every worker builds a GraphBatch for its years and returns the measure
+#     columns of its (year, country) rows
+#   - the parent concatenates the per-job columns once, in year order, so the
+#     frame is identical to network_engine.compute_network_measures
+#
+# USAGE:
+#   from network_parallel import compute_network_measures_parallel
+#   network_measures = compute_network_measures_parallel(edge_list, processes=8)
+#
+# or from project root: python src/network_parallel.py [dyadic_panel.csv] [output.csv] [processes]
+
+import multiprocessing as mp
+import os
+import sys
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPT_DIR)
+from network_engine import (DYADIC_PATH, NETWORK_OUTPUT_PATH, GraphBatch, assemble_measures,
+                            build_edge_list, compute_network_measures, encode_edges,
+                            lag_measures, measure_columns, pagerank_batch)
+
+# Jobs per worker process (smaller year ranges balance uneven years better)
+JOBS_PER_PROCESS = 4
+
+
+# =============================================================================
+# SHARED EDGE ARRAYS
+# =============================================================================
+
+class SharedArrays:
+    """numpy arrays copied into named shared memory blocks (owner side)"""
+
+    def __init__(self, arrays):
+        self.blocks = []
+        self.specs = []
+        for arr in arrays:
+            arr = np.ascontiguousarray(arr)
+            block = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+            np.ndarray(arr.shape, dtype=arr.dtype, buffer=block.buf)[...] = arr
+            self.blocks.append(block)
+            self.specs.append((block.name, arr.dtype.str, arr.shape))
+
+    def close(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+
+def attach(specs):
+    """Views onto shared blocks (worker side); returns (arrays, blocks)"""
+    blocks = [shared_memory.SharedMemory(name=name) for name, _, _ in specs]
+    arrays = [np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+              for block, (_, dtype, shape) in zip(blocks, specs)]
+    return arrays, blocks
+
+
+# =============================================================================
+# WORKER
+# =============================================================================
+
+_worker = {}
+
+
+def _init_worker(specs, layers, labels, pagerank_fn):
+    arrays, blocks = attach(specs)
+    _worker.update(arrays=arrays, blocks=blocks, layers=layers, labels=labels,
+                   pagerank_fn=pagerank_fn)
+
+
+def _measure_range(bounds):
+    """Measure columns of the years in edge rows start:stop"""
+    start, stop = bounds
+    arrays = [arr[start:stop] for arr in _worker['arrays']]
+    batch = GraphBatch.from_arrays(*arrays, layers=_worker['layers'], labels=_worker['labels'])
+    columns, report = measure_columns(batch, _worker['pagerank_fn'])
+    return batch.node_country, batch.node_year, columns, report
+
+
+# =============================================================================
+# SCHEDULER
+# =============================================================================
+
+def year_ranges(year, n_jobs):
+    """Split rows sorted by year into <= n_jobs contiguous (start, stop) ranges
+
+    Ranges end on year boundaries and hold roughly equal numbers of edges.
+    """
+    year_starts = np.flatnonzero(np.r_[True, year[1:] != year[:-1]])
+    targets = np.linspace(0, len(year), n_jobs + 1)[1:-1]
+    cuts = year_starts[np.clip(np.searchsorted(year_starts, targets), 0, len(year_starts) - 1)]
+    bounds = np.unique(np.r_[0, cuts, len(year)])
+    return list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+
+def compute_network_measures_parallel(edge_list, layers=None, processes=None,
+                                      pagerank_fn=pagerank_batch, jobs_per_process=JOBS_PER_PROCESS):
+    """compute_network_measures with year ranges spread over a process pool"""
+    processes = processes or os.cpu_count() or 1
+    if processes == 1:
+        return compute_network_measures(edge_list, layers=layers, pagerank_fn=pagerank_fn)
+
+    layers = sorted(edge_list['layer'].unique()) if layers is None else list(layers)
+    edge_list = edge_list[edge_list['layer'].isin(layers)]
+    if edge_list.empty:
+        # No years to split into jobs: the serial path returns the empty measures frame
+        return compute_network_measures(edge_list, layers=layers, pagerank_fn=pagerank_fn)
+
+    arrays, labels = encode_edges(edge_list, layers)
+    # Stable sort keeps the row order within a year (last repeated edge wins)
+    order = np.argsort(arrays[0], kind='stable')
+    arrays = [arr[order] for arr in arrays]
+    jobs = year_ranges(arrays[0], processes * jobs_per_process)
+
+    shared = SharedArrays(arrays)
+    del arrays
+    try:
+        with mp.get_context().Pool(processes, initializer=_init_worker,
+                                   initargs=(shared.specs, layers, labels, pagerank_fn)) as pool:
+            parts = pool.map(_measure_range, jobs, chunksize=1)
+    finally:
+        shared.close()
+
+    # One concatenation of every job's columns, in year order
+    country = np.concatenate([p[0] for p in parts])
+    year = np.concatenate([p[1] for p in parts])
+    columns = {col: np.concatenate([p[2][col] for p in parts]) for col in parts[0][2]}
+    report = pd.concat([p[3] for p in parts], ignore_index=True)
+    return assemble_measures(country, year, columns, report)
+
+
+if __name__ == '__main__':
+    path = sys.argv[1] if len(sys.argv) > 1 else DYADIC_PATH
+    output_path = sys.argv[2] if len(sys.argv) > 2 else NETWORK_OUTPUT_PATH
+    processes = int(sys.argv[3]) if len(sys.argv) > 3 else None
+
+    df = pd.read_csv(path)
+    network_measures = compute_network_measures_parallel(build_edge_list(df), processes=processes)
+    network_features_lagged = lag_measures(network_measures)
+    network_features_lagged.to_csv(output_path, index=False)
+    print(f"✓ {output_path}  {network_features_lagged.shape}")
@@ -0,0 +1,249 @@
+# panel_store.py
+# Columnar (Parquet) storage layer for processed and merged panels
+#
+# Panels are written as typed Parquet (ISO3 codes as categoricals over the
+# shared country table, int16 year), sorted by year with one row group per
+# year. Dyadic panels (sender_iso3 + recipient_iso3) additionally get the
+# compact DYADIC_SCHEMA (float32 measures, boolean colonial_tie); monadic and
+# other panels keep their float64 values. Reading
+# with read_panel() then only touches the requested columns (projection) and
+# the row groups of the requested years (predicate pushdown), instead of
+# parsing the whole CSV every time.
+#
+# read_panel() takes the usual CSV path: if a .parquet file with the same
+# name exists next to it and is at least as new as the CSV, that is read;
+# otherwise (no Parquet, or the CSV was rewritten after the conversion, e.g.
+# by a notebook that only writes CSV) it falls back to the CSV, with usecols /
+# year filtering applied after parsing. The frame comes back with the dtypes
+# stored on disk; compact=True casts it with apply_schema().
+#
+# USAGE: convert existing CSV panels, from project root:
+#   python src/panel_store.py                      # every CSV in data/merged/
+#   python src/panel_store.py data/merged/x.csv    # specific files
+#
+# Requires pyarrow (see environment.yml).
+
+import os
+import sys
+import warnings
+
+import numpy as np
+import pandas as pd
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+MERGED_DIR = os.path.join(PROJECT_ROOT, 'data', 'merged')
+
+YEAR_COLUMN = 'year'
+
+# Key columns that mark a frame as a dyadic panel
+DYADIC_KEYS = {'sender_iso3', 'recipient_iso3'}
+
+# Columns holding ISO3 codes (stored as categoricals over the shared country table)
+ISO3_COLUMNS = {'iso3', 'country', 'sender_iso3', 'recipient_iso3', 'a_iso3', 'b_iso3',
+                'colony_iso3', 'colonizer_iso3', 'supplier_iso3', 'debtor_iso3', 'creditor_iso3'}
+
+# Compact schema of the dyadic panel (merge_datasets.py output and the dyadic
+# panels built from it). 'country' = shared ISO3 categorical, see country_codes.py.
+# Applied by default only to dyadic frames (is_dyadic); columns not listed here
+# follow the generic rules in apply_schema().
+DYADIC_SCHEMA = {
+    'sender_iso3': 'country',
+    'recipient_iso3': 'country',
+    'year': 'int16',
+    'arms_tiv': 'float32',
+    'bilateral_oda': 'float32',
+    'bilateral_debt': 'float32',
+    'econ_neocol_score': 'float32',
+    'econ_neocol_score_log': 'float32',
+    'colonial_tie': 'bool',
+    'journalist_killings': 'float32',
+}
+
+_OPS = {
+    '==': lambda s, v: s == v,
+    '!=': lambda s, v: s != v,
+    '<': lambda s, v: s < v,
+    '<=': lambda s, v: s <= v,
+    '>': lambda s, v: s > v,
+    '>=': lambda s, v: s >= v,
+    'in': lambda s, v: s.isin(v),
+    'not in': lambda s, v: ~s.isin(v),
+}
+
+
+# =============================================================================
+# SCHEMA
+# =============================================================================
+
+def is_iso3_column(col):
+    return col in ISO3_COLUMNS or col.endswith('_iso3')
+
+
+def is_dyadic(df):
+    """True for sender-recipient frames (the ones DYADIC_SCHEMA describes)"""
+    return DYADIC_KEYS <= set(df.columns)
+
+
+def _schema_for(df, schema, float_dtype):
+    """Target dtype per column: explicit schema first, then the generic rules"""
+    targets = {}
+    for col in df.columns:
+        if col in schema:
+            targets[col] = schema[col]
+        elif is_iso3_column(col):
+            targets[col] = 'country'
+        elif col == YEAR_COLUMN and df[col].notna().all():
+            targets[col] = 'int16'
+        elif float_dtype is not None and pd.api.types.is_float_dtype(df[col]):
+            targets[col] = float_dtype
+    return targets
+
+
+def apply_schema(df, schema=None, float_dtype='auto'):
+    """Cast df to the compact panel schema
+
+    ISO3 columns become categoricals over the shared country table, year
+    int16. schema defaults to DYADIC_SCHEMA for dyadic frames and {}
+    otherwise; float_dtype='auto' downcasts floats to float32 for dyadic
+    frames only (None keeps them everywhere). Columns in schema get exactly
+    the listed dtype; a missing value in an int/bool column raises
+    ValueError instead of being silently filled.
+    """
+    from country_codes import as_country
+
+    dyadic = is_dyadic(df)
+    if schema is None:
+        schema = DYADIC_SCHEMA if dyadic else {}
+    if float_dtype == 'auto':
+        float_dtype = 'float32' if dyadic else None
+    df = df.copy()
+    for col, dtype in _schema_for(df, schema, float_dtype).items():
+        if dtype == 'country':
+            df[col] = as_country(df[col])
+            continue
+        if df[col].dtype == dtype:
+            continue
+        if (dtype == 'bool' or dtype.startswith('int')) and df[col].isna().any():
+            raise ValueError(f"{col}: missing values cannot be stored as {dtype}")
+        df[col] = df[col].astype(dtype)
+    return df
+
+
+def parquet_path(path):
+    """Parquet sibling of a CSV path (x.csv -> x.parquet)"""
+    root, ext = os.path.splitext(path)
+    return path if ext == '.parquet' else root + '.parquet'
+
+
+# =============================================================================
+# WRITE
+# =============================================================================
+
+def write_panel(df, path, schema=None, float_dtype='auto'):
+    """Write df as typed Parquet, one row group per year; returns the file path"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    path = parquet_path(path)
+    df = apply_schema(df, schema=schema, float_dtype=float_dtype)
+
+    if YEAR_COLUMN in df.columns:
+        df = df.sort_values(YEAR_COLUMN, kind='stable').reset_index(drop=True)
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    with pq.ParquetWriter(path, table.schema, compression='zstd') as writer:
+        if YEAR_COLUMN in df.columns and len(df):
+            # Boundaries of each year's block in the sorted frame
+            years = df[YEAR_COLUMN].to_numpy()
+            starts = np.flatnonzero(np.r_[True, years[1:] != years[:-1]])
+            ends = np.r_[starts[1:], len(df)]
+            for start, end in zip(starts, ends):
+                writer.write_table(table.slice(start, end - start))
+        else:
+            writer.write_table(table)
+
+    return path
+
+
+# =============================================================================
+# READ
+# =============================================================================
+
+def _year_filters(years):
+    """years may be a single year or an inclusive (min, max) tuple"""
+    if years is None:
+        return []
+    if np.isscalar(years):
+        return [(YEAR_COLUMN, '==', years)]
+    lo, hi = years
+    return [(YEAR_COLUMN, '>=', lo), (YEAR_COLUMN, '<=', hi)]
+
+
+def parquet_is_fresh(path):
+    """True if the Parquet sibling exists and is not older than the CSV"""
+    pq_path = parquet_path(path)
+    if not os.path.exists(pq_path):
+        return False
+    if pq_path == path or not os.path.exists(path):
+        return True
+    return os.path.getmtime(pq_path) >= os.path.getmtime(path)
+
+
+def read_panel(path, columns=None, years=None, filters=None, schema=None, compact=False):
+    """Load a panel, reading only the requested columns and years
+
+    filters is a list of (column, op, value) tuples, op in
+    ==, !=, <, <=, >, >=, in, not in (ANDed together).
+    A Parquet sibling older than the CSV is ignored (with a warning).
+    With compact=True the result is cast with apply_schema(df, schema).
+    """
+    filters = _year_filters(years) + list(filters or [])
+    pq_path = parquet_path(path)
+
+    if os.path.exists(pq_path) and not parquet_is_fresh(path):
+        warnings.warn(f"{pq_path} is older than {path}; reading the CSV "
+                      f"(rerun python src/panel_store.py to refresh it)")
+    elif os.path.exists(pq_path):
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(pq_path, columns=columns, filters=filters or None)
+        df = table.to_pandas()
+        return apply_schema(df, schema=schema) if compact else df
+
+    # CSV fallback: parse the needed columns only, then filter rows
+    filter_cols = [col for col, _, _ in filters]
+    usecols = None
+    if columns is not None:
+        usecols = list(dict.fromkeys(list(columns) + filter_cols))
+    df = pd.read_csv(path, usecols=usecols)
+
+    if filters:
+        mask = np.ones(len(df), dtype=bool)
+        for col, op, value in filters:
+            mask &= _OPS[op](df[col], value).to_numpy()
+        df = df[mask].reset_index(drop=True)
+
+    if columns is not None:
+        df = df[list(columns)]
+    return apply_schema(df, schema=schema) if compact else df
+
+
+def convert_csv(csv_path, schema=None, float_dtype='auto'):
+    """Convert one CSV panel to Parquet next to it"""
+    df = pd.read_csv(csv_path)
+    out = write_panel(df, csv_path, schema=schema, float_dtype=float_dtype)
+    csv_mb = os.path.getsize(csv_path) / 1e6
+    pq_mb = os.path.getsize(out) / 1e6
+    print(f"✓ {os.path.relpath(out, PROJECT_ROOT)}  ({len(df):,} rows, {csv_mb:.1f} MB CSV -> {pq_mb:.1f} MB Parquet)")
+    return out
+
+
+if __name__ == '__main__':
+    paths = sys.argv[1:] or sorted(
+        os.path.join(MERGED_DIR, f) for f in os.listdir(MERGED_DIR) if f.endswith('.csv')
+    )
+    for p in paths:
+        convert_csv(p)
@@ -0,0 +1,477 @@
+# pipeline.py
+# Headless pipeline runner: notebooks and scripts as a declared DAG
+#
+# Every stage lists the files it reads and writes (paths relative to the
+# project root); optional inputs are read only if present (they order and
+# invalidate the stage like inputs, but a missing one does not block it).
+# The runner derives the dependency graph from those lists,
+# runs stages whose dependencies are done in parallel (each stage in its own
+# worker process: a python / notebook kernel subprocess), and
+# skips a stage when the content hashes of its inputs (including the
+# notebook/script itself) and of its outputs are the same as after its last
+# successful run. A stage that is re-run but writes byte-identical outputs
+# does not trigger its downstream stages.
+#
+# Notebooks are executed with nbclient in their own directory (as when run by
+# hand); the executed copies go to .pipeline/executed/, so the notebooks in
+# the repo are not modified. Hash state is kept in .pipeline/state.json.
+#
+# USAGE: Run from project root directory:
+#   python src/pipeline.py                      # bring everything up to date
+#   python src/pipeline.py 14_final_panel_merge # a stage and its upstream stages
+#   python src/pipeline.py --dry-run            # show what would run
+#   python src/pipeline.py --list               # stages, inputs and outputs
+#   python src/pipeline.py --force [stage ...]  # re-run regardless of hashes
+#   python src/pipeline.py --jobs 4             # parallel workers (default: CPU count)
+#
+# A stage whose upstream stage cannot run (source data not in the repo) still
+# runs on the upstream outputs already on disk; it is blocked only if one of
+# its own inputs is missing too ("unavailable" if its outputs exist).
+#
+# 02_country_standardization is archival and not part of the graph (it
+# rewrites its own inputs in place); see README.md. The step that joins
+# merge_datasets' panel_dyadic_1992_2024.csv, the controls and
+# econ_neocol_score.csv into dyadic_panel_1992_2024_pre_oda_floor.csv (09's
+# input) is not in the repo either, so a change upstream of it does not
+# re-run 09 and below: re-create that file, then run the pipeline.
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+STATE_DIR = os.path.join(PROJECT_ROOT, '.pipeline')
+STATE_PATH = os.path.join(STATE_DIR, 'state.json')
+EXECUTED_DIR = os.path.join(STATE_DIR, 'executed')
+LOG_DIR = os.path.join(STATE_DIR, 'logs')
+
+# Executes one notebook in a fresh interpreter: argv = notebook, cwd, output copy
+NOTEBOOK_RUNNER = """
+import sys
+import nbformat
+from nbclient import NotebookClient
+
+src, cwd, out = sys.argv[1:4]
+nb = nbformat.read(src, as_version=4)
+NotebookClient(nb, timeout=None, kernel_name='python3',
+               resources={'metadata': {'path': cwd}}).execute()
+nbformat.write(nb, out)
+"""
+
+
+# =============================================================================
+# STAGES
+# =============================================================================
+
+class Stage:
+    """One pipeline step: a notebook or script with declared inputs and outputs"""
+
+    def __init__(self, name, path, inputs, outputs, cwd=None, optional_inputs=()):
+        self.name = name
+        self.path = path
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.optional_inputs = list(optional_inputs)
+        # Working directory relative to the project root (default: the file's own)
+        self.cwd = cwd if cwd is not None else os.path.dirname(path)
+
+    def __repr__(self):
+        return f"Stage({self.name!r})"
+
+    @property
+    def hashed_inputs(self):
+        """Files whose content decides whether the stage is stale (code included)"""
+        return list(dict.fromkeys([self.path] + self.inputs + self.optional_inputs))
+
+    def command(self):
+        """Subprocess argv for this stage"""
+        src = os.path.join(PROJECT_ROOT, self.path)
+        cwd = os.path.join(PROJECT_ROOT, self.cwd)
+        if self.path.endswith('.ipynb'):
+            out = os.path.join(EXECUTED_DIR, os.path.basename(self.path))
+            return [sys.executable, '-c', NOTEBOOK_RUNNER, src, cwd, out]
+        return [sys.executable, src]
+
+
+PRE = 'notebooks/01_preprocessing'
+PIPE = 'notebooks/02_pipeline'
+ANA = 'notebooks/03_analysis'
+RAW = 'data/raw'
+PROC = 'data/processed'
+MERGED = 'data/merged'
+RES = 'outputs/results'
+
+DYADIC_CAPPED = f'{MERGED}/dyadic_panel_1992_2024_oda_capped.csv'
+DYADIC_LOG = f'{MERGED}/dyadic_panel_1992_2024_oda_capped_log.csv'
+MONADIC = f'{MERGED}/panel_monadic_1992_2024.csv'
+NETWORK = f'{MERGED}/network_measures_1992_2024.csv'
+MULTILAYER = f'{MERGED}/network_multilayer_1992_2024.csv'
+FINAL = f'{MERGED}/panel_final_1992_2024.csv'
+NB16_RESULTS = [
+    f'{RES}/nb16_logit_any_killing_coefficients.csv',
+    f'{RES}/nb16_logit_any_killing_metrics.csv',
+    f'{RES}/nb16_negative_binomial_positive_counts_coefficients.csv',
+    f'{RES}/nb16_negative_binomial_positive_counts_metrics.csv',
+    f'{RES}/nb16_vif_baseline_features.csv',
+    f'{RES}/nb16_sample_loss.csv',
+    'outputs/models/nb16_logit_any_killing.pkl',
+]
+NB17_RESULTS = [
+    f'{RES}/nb17_interaction_terms_summary.csv',
+    f'{RES}/nb17_network_features_summary.csv',
+    f'{RES}/nb17_vs_nb16_comparison.csv',
+]
+COUNTRY_CODE = ['src/country_utils_extended.py', 'src/country_aliases.json']
+
+# In README order; the graph itself comes from the inputs/outputs
+STAGES = [
+    Stage('05_controls_preprocessing', f'{PRE}/05_controls_preprocessing.ipynb',
+          inputs=[f'{RAW}/controls/gdp-control-raw.csv',
+                  f'{RAW}/controls/pop-worldbank-control-raw.csv',
+                  f'{RAW}/controls/ucdp-control-raw.csv',
+                  f'{RAW}/controls/v-dem-core-control-raw.csv'],
+          outputs=[f'{PROC}/controls/controls_merged.csv']),
+    # Rewrites oecd_dac2_oda.csv in place (duplicate / FSM fix)
+    Stage('06_oecd_dac2_oda_fixing', f'{PRE}/06_oecd_dac2_oda_fixing.ipynb',
+          inputs=[f'{PROC}/oecd_dac2_oda.csv'],
+          outputs=[f'{PROC}/oecd_dac2_oda.csv']),
+    # Vectorized port of 08_econ_neocol_score.ipynb (identical output)
+    Stage('08_econ_neocol_score', 'src/econ_score.py',
+          inputs=[f'{RAW}/economic/eci-rankings-raw.csv',
+                  f'{PROC}/v3_imf_trade.csv',
+                  f'{PROC}/controls/controls_merged.csv',
+                  f'{MERGED}/panel_with_controls_1992_2024.csv',
+                  'src/country_codes.py', 'src/country_year.py', 'src/dyad_index.py'] + COUNTRY_CODE,
+          outputs=[f'{PROC}/econ_neocol_score.csv']),
+    Stage('merge_datasets', 'src/merge_datasets.py',
+          inputs=[f'{PROC}/target_journalist_killings.csv',
+                  f'{PROC}/sipri_trade_register.csv',
+                  f'{PROC}/oecd_dac2_oda.csv',
+                  f'{PROC}/worldbank_bilateral_debt.csv',
+                  f'{PROC}/coldat_colonial_ties.csv',
+                  'src/country_matching.py', 'src/country_codes.py',
+                  'src/country_year.py', 'src/dyad_index.py', 'src/panel_store.py'] + COUNTRY_CODE,
+          outputs=[f'{MERGED}/panel_dyadic_1992_2024.csv'],
+          cwd='.'),
+    # Input built outside the repo from panel_dyadic + controls + econ score
+    # (see the header): no producer stage, so 09 runs only if the file exists
+    Stage('09_transform_oda_values', f'{PRE}/09_transform_oda_values.ipynb',
+          inputs=[f'{MERGED}/dyadic_panel_1992_2024_pre_oda_floor.csv'],
+          outputs=[DYADIC_CAPPED, DYADIC_LOG]),
+    Stage('11_network_construction', f'{PIPE}/11_network_construction.ipynb',
+          inputs=[DYADIC_LOG],
+          outputs=[NETWORK]),
+    Stage('12_collapse_monadic_panel', f'{PIPE}/12_collapse_monadic_panel.ipynb',
+          inputs=[DYADIC_LOG],
+          outputs=[MONADIC]),
+    Stage('network_multilayer', 'src/network_multilayer.py',
+          inputs=[DYADIC_LOG, 'src/multiplex.py', 'src/network_engine.py'],
+          outputs=[MULTILAYER],
+          cwd='.'),
+    Stage('14_final_panel_merge', f'{PIPE}/14_final_panel_merge.ipynb',
+          inputs=[MONADIC, NETWORK, 'src/network_multilayer.py'],
+          outputs=[FINAL, 'outputs/data&methods/panel_final_columns.csv'],
+          optional_inputs=[MULTILAYER]),
+    Stage('13_robustness_variants', f'{ANA}/13_robustness_variants.ipynb',
+          inputs=[MONADIC, DYADIC_LOG],
+          outputs=[f'{MERGED}/panel_monadic_enriched_1992_2024.csv']),
+    Stage('15_network_diagnostics', f'{ANA}/15_network_diagnostics.ipynb',
+          inputs=[NETWORK, DYADIC_LOG, 'src/multiplex.py', 'src/network_engine.py'],
+          outputs=['outputs/results/network_top_nodes.png']),
+    Stage('16_baseline_hurdle_model', f'{ANA}/16_baseline_hurdle_model.ipynb',
+          inputs=[FINAL],
+          outputs=NB16_RESULTS),
+    Stage('17_network_augmented_hurdle_model', f'{ANA}/17_network_augmented_hurdle_model.ipynb',
+          inputs=[FINAL] + NB16_RESULTS[:4],
+          outputs=NB17_RESULTS),
+    Stage('18_econ_neocol_score_diagnostic', f'{ANA}/18_econ_neocol_score_diagnostic.ipynb',
+          inputs=[MONADIC],
+          outputs=[f'{RES}/nb18_econ_score_by_killing_status.csv']),
+    Stage('19_case_study_diagnostic', f'{ANA}/19_case_study_diagnostic.ipynb',
+          inputs=[FINAL, DYADIC_LOG],
+          outputs=['outputs/case_study/country_residuals.csv']),
+    Stage('20_gephi_export', f'{ANA}/20_gephi_export.ipynb',
+          inputs=[DYADIC_CAPPED, MONADIC],
+          outputs=['outputs/gephi/edges_arms_allyears.csv']),
+    Stage('21_econ_neocol_score_variance_audit', f'{ANA}/21_econ_neocol_score_variance_audit.ipynb',
+          inputs=[FINAL, DYADIC_LOG, f'{RAW}/economic/eci-rankings-raw.csv'],
+          outputs=['outputs/final_report/04_appendix/fig_audit_eci_distribution.png']),
+    Stage('22_temporal_train_test_validation', f'{ANA}/22_temporal_train_test_validation.ipynb',
+          inputs=[FINAL, 'outputs/models/nb16_logit_any_killing.pkl'],
+          outputs=[f'{RES}/nb22_temporal_validation_summary.csv']),
+    Stage('23_oos_validation', f'{ANA}/23_oos_validation.ipynb',
+          inputs=[FINAL],
+          outputs=['outputs/evaluation/nb23_oos_auc_summary.csv']),
+    Stage('24_econ_neocol_score_audit', f'{ANA}/24_econ_neocol_score_audit.ipynb',
+          inputs=[FINAL],
+          outputs=['outputs/final_report/04_appendix/tab_nb24_variance_summary.csv']),
+    Stage('generate_report_outputs', 'notebooks/generate_report_outputs.py',
+          inputs=[MONADIC, DYADIC_LOG, 'src/panel_store.py'],
+          outputs=['outputs/data&methods/summary_stats.csv']),
+    Stage('generate_final_report_figures', 'notebooks/generate_final_report_figures.py',
+          inputs=[MONADIC, FINAL, 'src/panel_store.py', f'{RES}/nb18_econ_score_by_killing_status.csv']
+          + NB16_RESULTS[:6] + NB17_RESULTS,
+          outputs=['outputs/final_report/01_data_and_methods/fig01_summary_stats.png']),
+]
+
+
+# =============================================================================
+# GRAPH
+# =============================================================================
+
+def build_graph(stages):
+    """name -> set of upstream stage names (producer of any non-own input)"""
+    producers = {}
+    for stage in stages:
+        for path in stage.outputs:
+            if path in producers and path not in stage.inputs:
+                raise ValueError(f"{path} is written by both {producers[path]} and {stage.name}")
+            producers.setdefault(path, stage.name)
+
+    upstream = {}
+    for stage in stages:
+        upstream[stage.name] = {
+            producers[path] for path in stage.inputs + stage.optional_inputs
+            if path in producers and producers[path] != stage.name
+        }
+    _check_acyclic(upstream)
+    return upstream
+
+
+def _check_acyclic(upstream):
+    visiting, done = set(), set()
+
+    def visit(name, trail):
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Cycle in pipeline: {' -> '.join(trail + [name])}")
+        visiting.add(name)
+        for dep in upstream[name]:
+            visit(dep, trail + [name])
+        visiting.discard(name)
+        done.add(name)
+
+    for name in upstream:
+        visit(name, [])
+
+
+def with_upstream(targets, upstream):
+    """targets plus everything they (transitively) depend on"""
+    selected, stack = set(), list(targets)
+    while stack:
+        name = stack.pop()
+        if name not in upstream:
+            raise KeyError(f"Unknown stage: {name}")
+        if name not in selected:
+            selected.add(name)
+            stack.extend(upstream[name])
+    return selected
+
+
+# =============================================================================
+# CONTENT HASHES
+# =============================================================================
+
+class HashState:
+    """Content hashes (memoized by size + mtime) and per-stage run records"""
+
+    def __init__(self, path=None):
+        self.path = path or STATE_PATH
+        self.files = {}
+        self.stages = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                state = json.load(f)
+            self.files = state.get('files', {})
+            self.stages = state.get('stages', {})
+
+    def file_hash(self, rel_path):
+        """sha256 of a file's content (None if missing)"""
+        path = os.path.join(PROJECT_ROOT, rel_path)
+        if not os.path.exists(path):
+            return None
+
+        st = os.stat(path)
+        cached = self.files.get(rel_path)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2]
+
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                h.update(block)
+        digest = h.hexdigest()
+        self.files[rel_path] = [st.st_size, st.st_mtime_ns, digest]
+        return digest
+
+    def snapshot(self, paths):
+        return {p: self.file_hash(p) for p in paths}
+
+    def is_current(self, stage):
+        """True if inputs and outputs hash the same as after the last successful run"""
+        record = self.stages.get(stage.name)
+        if record is None:
+            return False
+        outputs = self.snapshot(stage.outputs)
+        if any(h is None for h in outputs.values()):
+            return False
+        return record['inputs'] == self.snapshot(stage.hashed_inputs) and record['outputs'] == outputs
+
+    def record(self, stage, seconds):
+        # Inputs are hashed after the run, so in-place stages record their result
+        self.stages[stage.name] = {
+            'inputs': self.snapshot(stage.hashed_inputs),
+            'outputs': self.snapshot(stage.outputs),
+            'seconds': round(seconds, 1),
+            'finished': time.strftime('%Y-%m-%d %H:%M:%S'),
+        }
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'w') as f:
+            json.dump({'files': self.files, 'stages': self.stages}, f, indent=1, sort_keys=True)
+
+
+# =============================================================================
+# RUNNER
+# =============================================================================
+
+# Statuses after which a stage's outputs are (or will be) freshly written
+PRODUCED = ('ran', 'skipped', 'would run')
+
+
+def _execute(stage):
+    """Run one stage in a worker process; returns (returncode, seconds, log path)"""
+    os.makedirs(EXECUTED_DIR, exist_ok=True)
+    os.makedirs(LOG_DIR, exist_ok=True)
+    log_path = os.path.join(LOG_DIR, f'{stage.name}.log')
+    start = time.perf_counter()
+    with open(log_path, 'w') as log:
+        proc = subprocess.run(stage.command(), cwd=os.path.join(PROJECT_ROOT, stage.cwd),
+                              stdout=log, stderr=subprocess.STDOUT)
+    return proc.returncode, time.perf_counter() - start, log_path
+
+
+def missing_sources(stage, upstream, stages_by_name, state, status):
+    """Inputs that do not exist and will not be written by an upstream stage
+
+    Only upstream stages that ran (or are up to date / would run) count as
+    producers; the outputs of a blocked or unavailable stage must already be
+    on disk.
+    """
+    produced = {p for dep in upstream[stage.name] if status.get(dep) in PRODUCED
+                for p in stages_by_name[dep].outputs}
+    return [p for p in stage.inputs
+            if p not in produced and p not in stage.outputs and state.file_hash(p) is None]
+
+
+def run(targets=None, jobs=None, force=(), dry_run=False, stages=STAGES):
+    """Bring targets (default: all stages) up to date; returns {name: status}"""
+    stages_by_name = {s.name: s for s in stages}
+    upstream = build_graph(stages)
+    selected = with_upstream(targets or stages_by_name, upstream)
+    order = [s.name for s in stages if s.name in selected]
+    force = set(order) if force is True else set(force)
+
+    state = HashState()
+    status = {}
+    running = {}
+    jobs = jobs or os.cpu_count() or 1
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while len(status) < len(order):
+            for name in order:
+                if name in status or name in running.values():
+                    continue
+                deps = upstream[name] & selected
+                if any(status.get(d) == 'failed' for d in deps):
+                    status[name] = 'blocked'
+                    print(f"  - {name}: blocked (upstream stage failed)")
+                    continue
+                if not all(d in status for d in deps):
+                    continue
+
+                # An upstream stage that cannot run does not block this one
+                # as long as the inputs it would have written are on disk
+                stage = stages_by_name[name]
+                missing = missing_sources(stage, upstream, stages_by_name, state, status)
+                if missing and all(state.file_hash(p) is not None for p in stage.outputs):
+                    # Source data not available locally (e.g. raw files not in
+                    # the repo): keep the existing outputs for downstream stages
+                    status[name] = 'unavailable'
+                    print(f"  = {name}: inputs not available, keeping existing outputs")
+                elif missing:
+                    status[name] = 'blocked'
+                    print(f"  - {name}: blocked, missing input(s): {', '.join(missing)}")
+                elif dry_run:
+                    # Stages below a would-run stage are assumed stale
+                    stale = (name in force or not state.is_current(stage)
+                             or any(status.get(d) == 'would run' for d in deps))
+                    status[name] = 'would run' if stale else 'skipped'
+                    print(f"  {'>' if stale else '='} {name}: {'would run' if stale else 'up to date'}")
+                elif name not in force and state.is_current(stage):
+                    status[name] = 'skipped'
+                    print(f"  = {name}: up to date")
+                else:
+                    print(f"  > {name}: running")
+                    running[pool.submit(_execute, stage)] = name
+
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                code, seconds, log_path = future.result()
+                if code == 0:
+                    state.record(stages_by_name[name], seconds)
+                    state.save()
+                    status[name] = 'ran'
+                    print(f"✓ {name} ({seconds:.1f}s)")
+                else:
+                    status[name] = 'failed'
+                    print(f"✗ {name} failed (exit {code}), see {os.path.relpath(log_path, PROJECT_ROOT)}")
+
+    state.save()
+    return status
+
+
+def list_stages(stages=STAGES):
+    upstream = build_graph(stages)
+    for stage in stages:
+        print(f"{stage.name}  [{stage.path}]")
+        print(f"  after:   {', '.join(sorted(upstream[stage.name])) or '-'}")
+        print(f"  inputs:  {', '.join(stage.inputs)}")
+        if stage.optional_inputs:
+            print(f"  optional: {', '.join(stage.optional_inputs)}")
+        print(f"  outputs: {', '.join(stage.outputs)}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run the GPV notebook/script pipeline')
+    parser.add_argument('targets', nargs='*', help='stages to bring up to date (default: all)')
+    parser.add_argument('--jobs', '-j', type=int, default=None, help='parallel workers')
+    parser.add_argument('--force', action='store_true', help='re-run the selected stages regardless of hashes')
+    parser.add_argument('--dry-run', action='store_true', help='only report what would run')
+    parser.add_argument('--list', action='store_true', help='list stages and exit')
+    args = parser.parse_args()
+
+    if args.list:
+        list_stages()
+        sys.exit(0)
+
+    print("=" * 60)
+    print("PIPELINE")
+    print("=" * 60)
+    force = (set(args.targets) or True) if args.force else ()
+    result = run(args.targets or None, jobs=args.jobs, force=force, dry_run=args.dry_run)
+    failed = [n for n, s in result.items() if s in ('failed', 'blocked')]
+    counts = {s: sum(1 for v in result.values() if v == s) for s in sorted(set(result.values()))}
+    print(f"\n{counts}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,267 @@
+# streaming_ingest.py
+# Chunked ingestion of raw bilateral registers into sender-recipient-year aggregates
+#
+# The preprocessing notebooks read raw registers (SIPRI trade register, IMF
+# bilateral trade) fully into memory before filtering to the analysis window
+# and aggregating. Here the file is read in chunks; each chunk is
+# standardized (ISO3 resolution via ISO3Resolver, year parsing), filtered to
+# the year window and reduced to per-dyad sums, which are folded into a
+# running aggregate keyed by the int64 dyad key (dyad_index.py). Peak memory
+# is therefore bounded by the number of distinct dyads plus one chunk, not by
+# the size of the raw file.
+#
+# Rows whose names do not resolve to an ISO3 code cannot be keyed and are
+# dropped; the names are reported (with row counts) so they can be added
+# to country_aliases.json or accepted via country_matching.FuzzyMatcher.
+#
+# USAGE: Run from project root directory:
+#   python src/streaming_ingest.py sipri [raw_path] [output_path]
+#   python src/streaming_ingest.py imf   [raw_path] [output_path]
+
+import os
+import sys
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+RAW_DIR = os.path.join(PROJECT_ROOT, 'data', 'raw')
+PROCESSED_DIR = os.path.join(PROJECT_ROOT, 'data', 'processed')
+
+sys.path.insert(0, SCRIPT_DIR)
+from country_codes import country_dtype
+from country_matching import AliasStore
+from country_utils_extended import ISO3Resolver, default_resolver
+from dyad_index import DYAD_COLUMNS, decode_dyads, dyad_keys
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+# Analysis window (as in merge_datasets.py)
+YEAR_MIN = 1992
+YEAR_MAX = 2024
+
+# Raw rows per chunk
+CHUNK_ROWS = 200_000
+
+# Pending per-chunk partial aggregates are merged into the running
+# aggregate once they hold this many rows
+COMPACT_ROWS = 1_000_000
+
+SIPRI_RAW_PATH = os.path.join(RAW_DIR, 'military', 'sirpi-trade-register.csv')
+SIPRI_OUTPUT_PATH = os.path.join(PROCESSED_DIR, 'sipri_trade_register_agg.csv')
+# Metadata block above the SIPRI header row
+SIPRI_SKIPROWS = 11
+
+IMF_RAW_PATH = os.path.join(RAW_DIR, 'v3_raw_imf_trade.csv')
+IMF_OUTPUT_PATH = os.path.join(PROCESSED_DIR, 'v3_imf_trade_agg.csv')
+IMF_INDICATORS = {
+    'Exports of goods, Free on board (FOB), US dollar': 'export',
+    'Imports of goods, Free on board (FOB), US dollar': 'import',
+}
+
+
+# =============================================================================
+# CHUNK STANDARDIZATION
+# =============================================================================
+
+def parse_year(values):
+    """Extract the 4-digit year (handles '1990', '1990.0', '1990. ' ...); NaN otherwise"""
+    years = pd.Series(values).astype(str).str.extract(r'(\d{4})', expand=False)
+    return pd.to_numeric(years, errors='coerce')
+
+
+# =============================================================================
+# RUNNING AGGREGATE
+# =============================================================================
+
+class RunningAggregate:
+    """Per-dyad sums and non-missing counts, folded in chunk by chunk"""
+
+    def __init__(self, value_cols, compact_rows=COMPACT_ROWS):
+        self.value_cols = list(value_cols)
+        self.compact_rows = compact_rows
+        k = len(self.value_cols)
+        self._keys = np.empty(0, dtype=np.int64)
+        self._sums = np.empty((0, k))
+        self._counts = np.empty((0, k), dtype=np.int64)
+        self._pending = []
+        self._pending_rows = 0
+
+    def __len__(self):
+        self._compact()
+        return len(self._keys)
+
+    @staticmethod
+    def _reduce(keys, sums, counts):
+        """Collapse duplicate keys by summing their sums and counts"""
+        unique, inverse = np.unique(keys, return_inverse=True)
+        out_sums = np.empty((len(unique), sums.shape[1]))
+        out_counts = np.empty((len(unique), counts.shape[1]), dtype=np.int64)
+        for j in range(sums.shape[1]):
+            out_sums[:, j] = np.bincount(inverse, weights=sums[:, j], minlength=len(unique))
+            out_counts[:, j] = np.bincount(inverse, weights=counts[:, j], minlength=len(unique))
+        return unique, out_sums, out_counts
+
+    def add(self, keys, values):
+        """Fold one chunk in: keys (n,) int64, values (n, k) float with NaN for missing"""
+        values = np.asarray(values, dtype=np.float64).reshape(len(keys), len(self.value_cols))
+        present = ~np.isnan(values)
+        partial = self._reduce(np.asarray(keys, dtype=np.int64),
+                               np.where(present, values, 0.0), present.astype(np.int64))
+        self._pending.append(partial)
+        self._pending_rows += len(partial[0])
+        if self._pending_rows >= self.compact_rows:
+            self._compact()
+
+    def _compact(self):
+        if not self._pending:
+            return
+        parts = [(self._keys, self._sums, self._counts)] + self._pending
+        self._keys, self._sums, self._counts = self._reduce(
+            np.concatenate([p[0] for p in parts]),
+            np.concatenate([p[1] for p in parts]),
+            np.concatenate([p[2] for p in parts]),
+        )
+        self._pending = []
+        self._pending_rows = 0
+
+    def result(self, columns=DYAD_COLUMNS):
+        """Aggregate as a frame (sums; NaN where a dyad never had a value)
+
+        Dyads that only ever had missing values are dropped.
+        """
+        self._compact()
+        observed = (self._counts > 0).any(axis=1)
+        sums, counts = self._sums[observed], self._counts[observed]
+        sender, recipient, year = decode_dyads(self._keys[observed])
+        dtype = country_dtype()
+        df = pd.DataFrame({
+            columns[0]: pd.Categorical.from_codes(sender, dtype=dtype),
+            columns[1]: pd.Categorical.from_codes(recipient, dtype=dtype),
+            columns[2]: year,
+        })
+        for j, col in enumerate(self.value_cols):
+            df[col] = np.where(counts[:, j] > 0, sums[:, j], np.nan)
+        return df
+
+
+# =============================================================================
+# STREAMING DRIVER
+# =============================================================================
+
+def stream_bilateral(path, prepare, value_cols, columns=DYAD_COLUMNS, resolver=None,
+                     year_min=YEAR_MIN, year_max=YEAR_MAX, chunksize=CHUNK_ROWS,
+                     **read_csv_kwargs):
+    """Stream a raw bilateral CSV into a sender-recipient-year aggregate
+
+    prepare(chunk) maps a raw chunk to a frame with 'sender', 'recipient',
+    'year' (raw names / raw year values) and the value_cols. Returns
+    (aggregate frame, stats dict).
+    """
+    if resolver is None:
+        resolver = default_resolver
+
+    running = RunningAggregate(value_cols)
+    stats = {'rows_read': 0, 'rows_kept': 0, 'rows_outside_window': 0,
+             'rows_unresolved': 0, 'unresolved_names': Counter()}
+
+    for chunk in pd.read_csv(path, chunksize=chunksize, **read_csv_kwargs):
+        stats['rows_read'] += len(chunk)
+        chunk = prepare(chunk)
+
+        year = parse_year(chunk['year']).to_numpy()
+        in_window = (year >= year_min) & (year <= year_max)
+        stats['rows_outside_window'] += int((~in_window).sum())
+        chunk = chunk[in_window]
+        year = year[in_window]
+
+        sender = resolver.resolve_series(chunk['sender'])
+        recipient = resolver.resolve_series(chunk['recipient'])
+        resolved = (sender.notna() & recipient.notna()).to_numpy()
+        if not resolved.all():
+            stats['rows_unresolved'] += int((~resolved).sum())
+            for names, iso3 in ((chunk['sender'], sender), (chunk['recipient'], recipient)):
+                stats['unresolved_names'].update(names[iso3.isna()].astype(str))
+
+        keys = dyad_keys(sender[resolved], recipient[resolved], year[resolved])
+        running.add(keys, chunk.loc[resolved, value_cols].to_numpy(dtype=np.float64))
+        stats['rows_kept'] += int(resolved.sum())
+
+    return running.result(columns), stats
+
+
+def print_stats(name, aggregate, stats):
+    print(f"✓ {name}: {stats['rows_read']:,} raw rows -> {len(aggregate):,} dyad-years")
+    print(f"  Outside {YEAR_MIN}-{YEAR_MAX}: {stats['rows_outside_window']:,} rows")
+    print(f"  Unresolved names: {stats['rows_unresolved']:,} rows")
+    for name, count in stats['unresolved_names'].most_common(20):
+        print(f"    {name}: {count}")
+
+
+# =============================================================================
+# REGISTERS
+# =============================================================================
+
+def _prepare_sipri(chunk):
+    return chunk.rename(columns={'supplier': 'sender'})
+
+
+def ingest_sipri(path=SIPRI_RAW_PATH, resolver=None, **kwargs):
+    """SIPRI trade register -> supplier_iso3, recipient_iso3, year, tiv (summed)"""
+    return stream_bilateral(
+        path, _prepare_sipri, ['tiv'],
+        columns=('supplier_iso3', 'recipient_iso3', 'year'), resolver=resolver,
+        skiprows=SIPRI_SKIPROWS, usecols=['supplier', 'recipient', 'year', 'tiv'], **kwargs,
+    )
+
+
+def _prepare_imf(chunk):
+    indicator = chunk['INDICATOR'].map(IMF_INDICATORS)
+    value = pd.to_numeric(chunk['OBS_VALUE'], errors='coerce')
+    return pd.DataFrame({
+        'sender': chunk['COUNTRY'],
+        'recipient': chunk['COUNTERPART_COUNTRY'],
+        'year': chunk['TIME_PERIOD'],
+        'export': value.where(indicator == 'export'),
+        'import': value.where(indicator == 'import'),
+    })
+
+
+def ingest_imf_trade(path=IMF_RAW_PATH, resolver=None, **kwargs):
+    """IMF bilateral trade -> a_iso3, b_iso3, year, export, import (USD, summed)"""
+    return stream_bilateral(
+        path, _prepare_imf, ['export', 'import'],
+        columns=('a_iso3', 'b_iso3', 'year'), resolver=resolver,
+        usecols=['COUNTRY', 'COUNTERPART_COUNTRY', 'TIME_PERIOD', 'OBS_VALUE', 'INDICATOR'],
+        **kwargs,
+    )
+
+
+REGISTERS = {
+    'sipri': (ingest_sipri, SIPRI_RAW_PATH, SIPRI_OUTPUT_PATH),
+    'imf': (ingest_imf_trade, IMF_RAW_PATH, IMF_OUTPUT_PATH),
+}
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] not in REGISTERS:
+        print(f"Usage: python src/streaming_ingest.py {{{'|'.join(REGISTERS)}}} [raw_path] [output_path]")
+        sys.exit(1)
+
+    ingest, raw_path, output_path = REGISTERS[sys.argv[1]]
+    raw_path = sys.argv[2] if len(sys.argv) > 2 else raw_path
+    output_path = sys.argv[3] if len(sys.argv) > 3 else output_path
+
+    # Same resolver setup as merge_datasets.py
+    resolver = ISO3Resolver(
+        cache_path=os.path.join(PROCESSED_DIR, 'cache', 'iso3_resolver_cache.csv'),
+        aliases=AliasStore(os.path.join(PROCESSED_DIR, 'country_aliases_accepted.csv')).aliases,
+    )
+    aggregate, stats = ingest(raw_path, resolver=resolver)
+    aggregate.to_csv(output_path, index=False)
+    print_stats(sys.argv[1], aggregate, stats)
+    print(f"✓ {output_path}")
@@ -0,0 +1,197 @@
+# temporal_features.py
+# Rolling-window and exponentially decayed versions of country-year features
+#
+# Only a one-year lag (groupby('recipient_iso3').shift(1), notebooks 11/14) is
+# available for the network measures and flow totals, while arms transfers in
+# particular are lumpy year to year. This computes, for every requested
+# column at once:
+#   {base}_roll{w}_{mean|sum}    rolling window over the last w calendar years
+#                                (years t-w+1 .. t; min_periods present values)
+#   {base}_ewm{h}_{mean|sum}     exponential decay with half-life h years: a value
+#                                from year s has weight 0.5^((t - s) / h);
+#                                mean = weighted mean, sum = depreciated stock
+#                                x_t + 0.5^(1/h) * sum_{t-1}
+# lagged by `lag` years; a column that is already lagged keeps its lag in the
+# name (arms_tiv_in_strength_lag1 -> arms_tiv_in_strength_roll3_mean_lag1).
+#
+# Windows, half-lives and lags are in calendar years, not rows: 28 countries
+# in panel_final have gaps in their years, and a row-based "3-year" window
+# would reach back over the gap. Each country is placed on the full year grid
+# (missing years are NaN, i.e. skipped by the means, and still age the decay);
+# for a country without gaps this is groupby().rolling(w, min_periods) and
+# groupby().ewm(halflife=h).mean() on its rows.
+#
+# The panel is laid out once as a dense (country, year, column) array;
+# rolling windows are differences of cumulative sums and the decay is one
+# recursion over the (at most 33) years, vectorized over countries and
+# columns, so the cost is O(countries x years x columns) for all windows, not
+# one groupby per column and window.
+#
+# USAGE: Run from project root directory:
+#   python src/temporal_features.py [panel.csv] [output.csv]
+# or
+#   from temporal_features import temporal_features
+#   feats = temporal_features(panel, ['arms_tiv_total_log'], windows=(3, 5), half_lives=(2,), lag=1)
+
+import os
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+MERGED_DIR = os.path.join(PROJECT_ROOT, 'data', 'merged')
+PANEL_PATH = os.path.join(MERGED_DIR, 'panel_final_1992_2024.csv')
+OUTPUT_PATH = os.path.join(MERGED_DIR, 'temporal_features_1992_2024.csv')
+
+KEY = ['recipient_iso3', 'year']
+
+WINDOWS = (3, 5)
+HALF_LIVES = (1, 3)
+STATS = ('mean', 'sum')
+
+# Flow totals are contemporaneous (lagged here); network measures are
+# already _lag1 in panel_final (kept as they are)
+FLOW_COLUMNS = ['arms_tiv_total_log', 'oda_total_log']
+NETWORK_LAYERS = ['arms_tiv', 'bilateral_oda', 'econ_neocol_score', 'colonial_tie']
+NETWORK_COLUMNS = [f'{layer}_{measure}_lag1'
+                   for layer in NETWORK_LAYERS for measure in ('in_strength', 'pagerank')]
+
+_LAG_SUFFIX = re.compile(r'_lag(\d+)$')
+
+
+# =============================================================================
+# LAYOUT
+# =============================================================================
+
+class CountryYearGrid:
+    """Rows of a country-year frame as a dense (country, calendar year) grid
+
+    Column j of the grid is year year_min + j for every country; years a
+    country has no row for are NaN.
+    """
+
+    def __init__(self, df, key=KEY):
+        country, year = key
+        self.group, uniques = pd.factorize(df[country])
+        years = df[year].to_numpy().astype(np.int64)
+        self.year_min = int(years.min()) if len(df) else 0
+        self.pos = years - self.year_min
+        self.shape = (len(uniques), int(self.pos.max()) + 1 if len(df) else 0)
+        flat = self.group * self.shape[1] + self.pos
+        if len(np.unique(flat)) != len(flat):
+            raise ValueError(f"{country}/{year}: duplicate country-year rows")
+
+    def to_grid(self, values):
+        """(rows, k) in frame order -> (countries, years, k)"""
+        grid = np.full(self.shape + (values.shape[1],), np.nan)
+        grid[self.group, self.pos] = values
+        return grid
+
+    def to_rows(self, grid):
+        """(countries, years, k) -> (rows, k) in frame order"""
+        return grid[self.group, self.pos]
+
+
+# =============================================================================
+# KERNELS
+# =============================================================================
+
+def rolling(grid, window, min_periods=1):
+    """Rolling sum and mean over the last `window` years of the grid (NaNs skipped)"""
+    present = ~np.isnan(grid)
+    zeros = np.zeros(grid[:, :1].shape)
+    cum = np.concatenate([zeros, np.cumsum(np.where(present, grid, 0.0), axis=1)], axis=1)
+    cnt = np.concatenate([zeros, np.cumsum(present, axis=1)], axis=1)
+    lo = np.maximum(np.arange(grid.shape[1]) + 1 - window, 0)
+    total = cum[:, 1:] - cum[:, lo]
+    count = cnt[:, 1:] - cnt[:, lo]
+    enough = count >= min_periods
+    return (np.where(enough, total, np.nan),
+            np.where(enough, total / np.maximum(count, 1), np.nan))
+
+
+def decay(grid, half_life):
+    """Exponentially decayed sum (stock) and mean over the grid's years
+
+    The mean is pandas' ewm(halflife=half_life).mean() on the full year grid
+    (NaN years keep aging the earlier values, ignore_na=False).
+    """
+    keep = 0.5 ** (1.0 / half_life)
+    present = ~np.isnan(grid)
+    x = np.where(present, grid, 0.0)
+    total = np.empty_like(x)
+    weight = np.empty_like(x)
+    total[:, 0] = x[:, 0]
+    weight[:, 0] = present[:, 0]
+    for t in range(1, grid.shape[1]):
+        total[:, t] = x[:, t] + keep * total[:, t - 1]
+        weight[:, t] = present[:, t] + keep * weight[:, t - 1]
+    seen = weight > 0
+    return (np.where(seen, total, np.nan),
+            np.where(seen, total / np.where(seen, weight, 1.0), np.nan))
+
+
+def shift(grid, lag):
+    """Shift every country's years by lag (NaN at the start)"""
+    if lag == 0:
+        return grid
+    out = np.full_like(grid, np.nan)
+    out[:, lag:] = grid[:, :-lag]
+    return out
+
+
+# =============================================================================
+# FEATURES
+# =============================================================================
+
+def feature_name(col, kind, param, stat, lag):
+    """{base}_{kind}{param}_{stat}_lag{existing + lag}"""
+    m = _LAG_SUFFIX.search(col)
+    base, existing = (col[:m.start()], int(m.group(1))) if m else (col, 0)
+    name = f'{base}_{kind}{param:g}_{stat}'
+    return name + (f'_lag{existing + lag}' if existing + lag else '')
+
+
+def temporal_features(df, columns, windows=WINDOWS, half_lives=HALF_LIVES, stats=STATS,
+                      lag=0, min_periods=1, key=KEY):
+    """Rolling and decayed versions of columns, one row per df row (same index)"""
+    layout = CountryYearGrid(df, key)
+    grid = layout.to_grid(df[columns].to_numpy(dtype=np.float64))
+
+    blocks, names = [], []
+    for kind, params, kernel in (('roll', windows, lambda g, w: rolling(g, w, min_periods)),
+                                 ('ewm', half_lives, decay)):
+        for param in params:
+            total, mean = kernel(grid, param)
+            for stat, values in (('sum', total), ('mean', mean)):
+                if stat not in stats:
+                    continue
+                blocks.append(shift(values, lag))
+                names += [feature_name(col, kind, param, stat, lag) for col in columns]
+
+    values = layout.to_rows(np.concatenate(blocks, axis=2)) if blocks else np.empty((len(df), 0))
+    return pd.DataFrame(values, columns=names, index=df.index)
+
+
+def panel_temporal_features(panel, windows=WINDOWS, half_lives=HALF_LIVES, stats=STATS):
+    """Flow totals (lagged 1) and _lag1 network measures of panel_final, with the key columns"""
+    flows = [c for c in FLOW_COLUMNS if c in panel.columns]
+    network = [c for c in NETWORK_COLUMNS if c in panel.columns]
+    return pd.concat([
+        panel[KEY],
+        temporal_features(panel, flows, windows, half_lives, stats, lag=1),
+        temporal_features(panel, network, windows, half_lives, stats, lag=0),
+    ], axis=1)
+
+
+if __name__ == '__main__':
+    path = sys.argv[1] if len(sys.argv) > 1 else PANEL_PATH
+    output_path = sys.argv[2] if len(sys.argv) > 2 else OUTPUT_PATH
+
+    panel = pd.read_csv(path)
+    features = panel_temporal_features(panel)
+    features.to_csv(output_path, index=False)
+    print(f"✓ {output_path}  {features.shape}")
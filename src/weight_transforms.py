@@ -0,0 +1,331 @@
+# weight_transforms.py
+# Edge-weight transform registry and cached sensitivity sweeps
+#
+# Notebook 11 hard-codes the edge weights: log1p(arms_tiv), log1p(bilateral_oda),
+# econ_neocol_score_log (notebook 09: log1p(score * 1e9)) and the raw 0/1
+# colonial_tie. Checking how the network measures react to another choice
+# meant editing and rerunning the notebook. Here every transform is a named,
+# parameterized entry in TRANSFORMS:
+#   notebook          log1p of the raw flows (notebook 11's weights)
+#   raw               the raw flows
+#   rank              percentile rank of the year's positive flows, in (0, 1]
+#   capped            log1p, capped at the q-quantile of the layer's positive flows
+#   year_normalized   log1p divided by the year's largest value (max = 1)
+#   minmax            log1p scaled to [0, 1] over all years, as
+#                     sklearn's MinMaxScaler().fit_transform (imported but
+#                     never used in notebook 11); computed in numpy so the
+#                     sweep does not import scikit-learn for a min / max
+# Transforms map the raw flows of one layer (0 = no tie) to weights and keep
+# zeros at zero and positive flows positive, so every transform has the same
+# edges. colonial_tie is a 0/1 indicator and is passed through unchanged.
+#
+# WeightSweep builds the MultiplexGraph once; each transform only swaps the
+# edge weights into the shared CSR structure (GraphBatch.with_weights) and
+# reruns the measures. Weights and measures are cached per
+# (transform, layer, year) together with a hash of the graph's input rows
+# (of the whole layer for transforms fitted over all years), so a repeated
+# transform is free and, with a saved cache, only years whose data changed
+# are recomputed.
+#
+# USAGE: Run from project root directory:
+#   python src/weight_transforms.py [dyadic_panel.csv] [transform ...]
+# or
+#   from weight_transforms import WeightSweep
+#   sweep = WeightSweep(dyadic_panel)
+#   sweep.measures('rank')                          # network_measures frame
+#   sweep.measures(('capped', {'q': 0.95}))
+#   long = sweep.sweep(['notebook', 'raw', 'rank'])  # + a 'transform' column
+
+import hashlib
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPT_DIR)
+from multiplex import MultiplexGraph
+from network_engine import DYADIC_PATH, LAYERS, MEASURES, MERGED_DIR, measure_columns, pagerank_batch
+from network_incremental import graph_hashes
+
+CACHE_PATH = os.path.join(MERGED_DIR, 'cache', 'weight_sweep.pkl')
+
+# Layers notebook 11 reads already logged (notebook 09: log1p(score * 1e9));
+# their raw flow is expm1 of that column, i.e. the score in units of 1e-9
+LOGGED_LAYERS = {'econ_neocol_score': 'econ_neocol_score_log'}
+# Indicator layers keep their 0/1 values under every transform
+BINARY_LAYERS = ['colonial_tie']
+
+DEFAULT_TRANSFORM = 'notebook'
+
+
+# =============================================================================
+# REGISTRY
+# =============================================================================
+
+TRANSFORMS = {}
+
+
+def register(name, scope='row', **defaults):
+    """Add fn(values, year, **params) -> weights to TRANSFORMS
+
+    scope says what the weight of a row depends on besides its own value:
+    'row' (nothing), 'year' (the layer's other rows that year) or 'global'
+    (the layer's rows in all years); it decides what the cache hashes.
+    """
+    if scope not in ('row', 'year', 'global'):
+        raise ValueError(f"scope must be 'row', 'year' or 'global', not {scope!r}")
+
+    def decorator(fn):
+        TRANSFORMS[name] = {'fn': fn, 'scope': scope, 'defaults': defaults}
+        return fn
+    return decorator
+
+
+def resolve(spec):
+    """(label, transform entry, params) of a transform name or (name, {param: value})"""
+    name, params = (spec, {}) if isinstance(spec, str) else spec
+    if name not in TRANSFORMS:
+        raise KeyError(f"unknown weight transform {name!r} (registered: {', '.join(TRANSFORMS)})")
+    entry = TRANSFORMS[name]
+    unknown = set(params) - set(entry['defaults'])
+    if unknown:
+        raise TypeError(f"{name} has no parameter(s) {', '.join(sorted(unknown))}")
+    params = {**entry['defaults'], **params}
+    changed = [f'{k}={v:g}' if isinstance(v, float) else f'{k}={v}'
+               for k, v in sorted(params.items()) if v != entry['defaults'][k]]
+    label = f"{name}({', '.join(changed)})" if changed else name
+    return label, entry, params
+
+
+def _year_max(values, year):
+    """Largest value of each row's year, broadcast to rows"""
+    years, pos = np.unique(year, return_inverse=True)
+    top = np.zeros(len(years))
+    np.maximum.at(top, pos, values)
+    return top[pos]
+
+
+@register('notebook')
+def log1p_weights(values, year):
+    return np.log1p(values)
+
+
+@register('raw')
+def raw_weights(values, year):
+    return values
+
+
+@register('rank', scope='year')
+def rank_weights(values, year):
+    positive = pd.Series(np.where(values > 0, values, np.nan))
+    return positive.groupby(year).rank(pct=True).fillna(0.0).to_numpy()
+
+
+@register('capped', scope='global', q=0.99)
+def capped_weights(values, year, q):
+    logged = np.log1p(values)
+    positive = logged[logged > 0]
+    cap = np.quantile(positive, q) if len(positive) else 0.0
+    return np.minimum(logged, cap)
+
+
+@register('year_normalized', scope='year')
+def year_normalized_weights(values, year):
+    logged = np.log1p(values)
+    top = _year_max(logged, year)
+    return np.divide(logged, top, out=np.zeros_like(logged), where=top > 0)
+
+
+@register('minmax', scope='global')
+def minmax_weights(values, year):
+    logged = np.log1p(values)
+    lo, hi = logged.min(), logged.max()
+    return (logged - lo) / (hi - lo) if hi > lo else np.zeros_like(logged)
+
+
+# =============================================================================
+# INPUTS
+# =============================================================================
+
+def raw_flows(df, layers=LAYERS):
+    """Untransformed layer values per panel row (no tie = 0)
+
+    Negative values are set to 0: in notebook 11 they give a NaN or negative
+    log1p weight, i.e. no edge.
+    """
+    flows = {}
+    for layer in layers:
+        if layer in LOGGED_LAYERS:
+            values = np.expm1(df[LOGGED_LAYERS[layer]].fillna(0).to_numpy(dtype=np.float64))
+        else:
+            values = df[layer].fillna(0).to_numpy(dtype=np.float64)
+        flows[layer] = np.maximum(values, 0.0)
+    return flows
+
+
+def input_hashes(df, flows, layers=LAYERS):
+    """sha256 of every (layer, year) graph input, and of each layer over all years"""
+    keys = df[['sender_iso3', 'recipient_iso3', 'year']]
+    edge_list = pd.concat([keys.assign(layer=layer, weight=flows[layer]) for layer in layers],
+                          ignore_index=True)
+    by_graph = graph_hashes(edge_list)
+    years = sorted(df['year'].unique())
+    hashes = {}
+    for layer in layers:
+        per_year = [by_graph[f'{int(y)}/{layer}'] for y in years]
+        hashes[(layer, 'all')] = hashlib.sha256(''.join(per_year).encode()).hexdigest()
+        hashes.update({(layer, int(y)): h for y, h in zip(years, per_year)})
+    return hashes
+
+
+# =============================================================================
+# SWEEP
+# =============================================================================
+
+class WeightSweep:
+    """Network measures of one dyadic panel under any number of weight transforms"""
+
+    def __init__(self, df, layers=LAYERS, pagerank_fn=pagerank_batch):
+        self.df = df
+        self.layers = list(layers)
+        self.pagerank_fn = pagerank_fn
+        self.flows = raw_flows(df, self.layers)
+        self.year = df['year'].to_numpy(dtype=np.int64)
+        self.years = [int(y) for y in np.unique(self.year)]
+        self.hashes = input_hashes(df, self.flows, self.layers)
+
+        self.graph = MultiplexGraph.from_panel(df, self.layers, weights=self.flows)
+        self.year_index = {int(y): np.flatnonzero(self.year == y) for y in self.years}
+        self._weights = {}
+        self._measures = {}
+
+    def _key_hash(self, scope, layer, year):
+        if scope == 'global':
+            return self.hashes[(layer, 'all')] + self.hashes[(layer, year)]
+        return self.hashes[(layer, year)]
+
+    # =========================================================================
+    # WEIGHTS
+    # =========================================================================
+
+    def layer_weights(self, spec, layer):
+        """Weights of one layer under a transform, per panel row"""
+        label, entry, params = resolve(spec)
+        if not all((label, layer, y) in self._weights for y in self.years):
+            values = self.flows[layer]
+            if layer not in BINARY_LAYERS:
+                values = entry['fn'](values, self.year, **params)
+                if not np.array_equal(values > 0, self.flows[layer] > 0):
+                    raise ValueError(f"transform {label} changes the edges of layer {layer}")
+            for y, rows in self.year_index.items():
+                self._weights[(label, layer, y)] = values[rows]
+
+        out = np.empty(len(self.df))
+        for y, rows in self.year_index.items():
+            out[rows] = self._weights[(label, layer, y)]
+        return out
+
+    def weights(self, spec):
+        """{layer: weights per panel row} under a transform"""
+        return {layer: self.layer_weights(spec, layer) for layer in self.layers}
+
+    # =========================================================================
+    # MEASURES
+    # =========================================================================
+
+    def _stale_years(self, label, scope):
+        return [y for y in self.years
+                if any(self._measures.get((label, layer, y), {}).get('hash')
+                       != self._key_hash(scope, layer, y) for layer in self.layers)]
+
+    def _compute(self, label, scope, weights, years):
+        """Measures of the given years, stored per (transform, layer, year)"""
+        if len(years) == len(self.years):
+            batch = self.graph.with_weights(
+                np.concatenate([weights[layer] for layer in self.layers]))
+        else:
+            rows = np.isin(self.year, years)
+            batch = MultiplexGraph.from_panel(self.df[rows], self.layers,
+                                              weights={l: w[rows] for l, w in weights.items()})
+        columns, report = measure_columns(batch, self.pagerank_fn)
+
+        bounds = np.searchsorted(batch.node_year, batch.years, side='right')
+        starts = np.r_[0, bounds[:-1]]
+        for y, start, stop in zip(batch.years, starts, bounds):
+            y = int(y)
+            for layer in self.layers:
+                self._measures[(label, layer, y)] = {
+                    'hash': self._key_hash(scope, layer, y),
+                    'country': batch.node_country[start:stop],
+                    'columns': {m: columns[f'{layer}_{m}'][start:stop] for m in MEASURES},
+                    'report': report[(report['year'] == y) & (report['layer'] == layer)],
+                }
+
+    def measures(self, spec=DEFAULT_TRANSFORM):
+        """Notebook 11's network_measures frame under a transform
+
+        Only (layer, year) graphs without an up-to-date cache entry are
+        computed; the PageRank report of every graph is in
+        attrs['pagerank_report'].
+        """
+        label, entry, _ = resolve(spec)
+        stale = self._stale_years(label, entry['scope'])
+        if stale:
+            self._compute(label, entry['scope'], self.weights(spec), stale)
+
+        entries = {(layer, y): self._measures[(label, layer, y)]
+                   for y in self.years for layer in self.layers}
+        country = np.concatenate([entries[(self.layers[0], y)]['country'] for y in self.years])
+        year = np.repeat(self.years, [len(entries[(self.layers[0], y)]['country']) for y in self.years])
+        columns = {f'{layer}_{m}': np.concatenate([entries[(layer, y)]['columns'][m] for y in self.years])
+                   for layer in self.layers for m in MEASURES}
+        report = pd.concat([e['report'] for e in entries.values()])
+        report = report.sort_values(['year', 'layer'], ignore_index=True)
+
+        failed = report[~report['converged']]
+        for row in failed.itertuples():
+            print(f"PageRank did not converge for layer {row.layer} ({row.year}, {label}): "
+                  f"residual {row.residual:.2e} after {row.iterations} iterations")
+        network_measures = pd.DataFrame({'country': country, **columns, 'year': year})
+        network_measures.attrs['pagerank_report'] = report
+        return network_measures
+
+    def sweep(self, specs):
+        """network_measures of every transform stacked, with a 'transform' column"""
+        frames = []
+        for spec in specs:
+            label = resolve(spec)[0]
+            network_measures = self.measures(spec).assign(transform=label)
+            network_measures.attrs = {}
+            frames.append(network_measures)
+        return pd.concat(frames, ignore_index=True)
+
+    # =========================================================================
+    # PERSISTENCE
+    # =========================================================================
+
+    def save(self, path=CACHE_PATH):
+        """Write the measure cache (weights are cheap to recompute)"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        pd.to_pickle(self._measures, path)
+
+    def load(self, path=CACHE_PATH):
+        """Read a saved measure cache; entries whose input hash changed are recomputed on use"""
+        if os.path.exists(path):
+            self._measures.update(pd.read_pickle(path))
+        return self
+
+
+if __name__ == '__main__':
+    path = sys.argv[1] if len(sys.argv) > 1 else DYADIC_PATH
+    specs = sys.argv[2:] or list(TRANSFORMS)
+
+    df = pd.read_csv(path)
+    sweep = WeightSweep(df).load()
+    for spec in specs:
+        network_measures = sweep.measures(spec)
+        print(f"✓ {spec}: {network_measures.shape}")
+    sweep.save()
+    print(f"✓ {CACHE_PATH}")